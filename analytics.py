@@ -0,0 +1,178 @@
+"""
+Background ingestion of SiteVisit analytics.
+
+Views call ``visit_recorder.record(...)`` which only builds a small dict and
+puts it on a bounded in-memory queue. A writer thread drains the queue and
+inserts visits in multi-row batches, so page latency never includes an
+analytics INSERT or commit.
+
+When the queue is full (the database is slower than the traffic), new
+visits are dropped rather than blocking the request; drops are counted and
+reported by ``visit_recorder.stats()``. Queued visits are written on normal
+interpreter exit.
+
+Config:
+    ANALYTICS_QUEUE_SIZE: Maximum queued visits (default 10000)
+    ANALYTICS_BATCH_SIZE: Maximum visits per INSERT batch (default 500)
+    ANALYTICS_FLUSH_INTERVAL: Seconds to wait for a batch to fill (default 2)
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Column limits from models.SiteVisit, so oversized headers never fail a batch
+FIELD_LIMITS = {'page': 255, 'ip_address': 50, 'user_agent': 255, 'referrer': 255}
+
+
+def sqlalchemy_writer(app):
+    """
+    Return a writer that bulk-inserts visits through Flask-SQLAlchemy and
+    folds them into the dashboard rollups in the same transaction
+    """
+    from db import db
+    from models import SiteVisit
+    from rollups import record_visits
+
+    def write(visits):
+        with app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(db.insert(SiteVisit), visits)
+                record_visits(conn, visits)
+
+    return write
+
+
+class VisitRecorder:
+    """Bounded queue of page visits drained by a bulk-insert thread"""
+
+    def __init__(self, writer=None, queue_size=DEFAULT_QUEUE_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._counts = {'recorded': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+        self._counts_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app, writer=None):
+        """Configure from the app and register the exit-time flush"""
+        queue_size = app.config.get('ANALYTICS_QUEUE_SIZE', self._queue.maxsize)
+        if queue_size != self._queue.maxsize:
+            self._queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = app.config.get('ANALYTICS_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('ANALYTICS_FLUSH_INTERVAL', self.flush_interval)
+        self.writer = writer or self.writer or sqlalchemy_writer(app)
+        atexit.register(self.stop)
+
+    def record(self, page, ip_address=None, user_agent=None, referrer=None, user_id=None):
+        """Queue a visit without blocking; returns False if it was dropped"""
+        visit = {
+            'page': page,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'referrer': referrer,
+            'user_id': user_id,
+            'visit_date': datetime.now()
+        }
+        for field, limit in FIELD_LIMITS.items():
+            if visit[field] and len(visit[field]) > limit:
+                visit[field] = visit[field][:limit]
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(visit)
+        except queue.Full:
+            dropped = self._bump('dropped')
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Analytics queue full, {dropped} visits dropped so far")
+            return False
+
+        self._bump('recorded')
+        return True
+
+    def flush(self):
+        """Write everything currently queued; returns the number written"""
+        written = 0
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stats(self):
+        """Ingestion counters plus the current queue depth"""
+        with self._counts_lock:
+            stats = dict(self._counts)
+        stats['queued'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        return stats
+
+    def stop(self):
+        """Stop the writer thread and write whatever is still queued"""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def _bump(self, counter, amount=1):
+        with self._counts_lock:
+            self._counts[counter] += amount
+            return self._counts[counter]
+
+    def _take(self, block=True):
+        """Collect up to batch_size visits, waiting briefly for the first"""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        if self.writer is None:
+            return 0
+        try:
+            self.writer(batch)
+        except Exception as e:
+            self._bump('failed', len(batch))
+            logger.error(f"Failed to write {len(batch)} site visits: {e}")
+            return 0
+        self._bump('written', len(batch))
+        return len(batch)
+
+    def _ensure_thread(self):
+        """Start the writer thread lazily, once per (forked) process"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._counts_lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take()
+            if batch:
+                self._write(batch)
+
+
+# Shared recorder, configured per app with visit_recorder.init_app(app)
+visit_recorder = VisitRecorder()
@@ -3,14 +3,28 @@ import json
 import sqlite3
 from datetime import datetime
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from pagination import build_page, decode_cursor, get_page_args, page_url
+from view_counter import view_counter
+from locations import TRIGRAM_MIN_LENGTH, clean_location, location_tokens, parse_location_query
+import compression
+from fragment_cache import fragment_cache
 
 # Initialize the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "remote_work_dev_key")
 
+# Compress HTML/JSON responses
+compression.init_app(app)
+
+# {% cache %} blocks in the job templates (see fragment_cache.py)
+fragment_cache.init_app(app)
+
 # Database configuration
 DB_PATH = "jobs.db"
 
+# Whether the FTS5 trigram location index exists (needs SQLite 3.34+)
+LOCATION_TRIGRAMS = False
+
 # Helper functions for database
 def get_db():
     """Get database connection"""
@@ -44,6 +58,9 @@ def init_db():
     )
     ''')
     
+    # Location search: structured tokens plus a trigram index for substrings
+    init_location_index(cursor)
+    
     # Create users table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS users (
@@ -68,9 +85,117 @@ def init_db():
     conn.commit()
     conn.close()
 
+def write_location_tokens(cursor, job_id, location):
+    """Replace the stored location tokens of one job"""
+    cursor.execute("DELETE FROM job_location_tokens WHERE job_id = ?", (job_id,))
+    cursor.executemany(
+        "INSERT INTO job_location_tokens (job_id, token) VALUES (?, ?)",
+        [(job_id, token) for token in location_tokens(location)]
+    )
+
+def init_location_index(cursor):
+    """Create the location token table and FTS5 trigram index"""
+    global LOCATION_TRIGRAMS
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE name = 'job_location_tokens'")
+    new_tokens = cursor.fetchone() is None
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_location_tokens (
+        job_id INTEGER NOT NULL,
+        token TEXT NOT NULL,
+        PRIMARY KEY (job_id, token)
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_job_location_tokens_token ON job_location_tokens (token, job_id)")
+    if new_tokens:
+        cursor.execute("SELECT id, location FROM jobs")
+        for row in cursor.fetchall():
+            write_location_tokens(cursor, row['id'], row['location'])
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE name = 'jobs_location_fts'")
+    new_index = cursor.fetchone() is None
+    try:
+        cursor.executescript('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_location_fts USING fts5(
+            location, content='jobs', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS jobs_location_fts_ai AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_location_fts(rowid, location) VALUES (new.id, new.location);
+        END;
+        CREATE TRIGGER IF NOT EXISTS jobs_location_fts_ad AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_location_fts(jobs_location_fts, rowid, location)
+            VALUES ('delete', old.id, old.location);
+        END;
+        CREATE TRIGGER IF NOT EXISTS jobs_location_fts_au AFTER UPDATE OF location ON jobs BEGIN
+            INSERT INTO jobs_location_fts(jobs_location_fts, rowid, location)
+            VALUES ('delete', old.id, old.location);
+            INSERT INTO jobs_location_fts(rowid, location) VALUES (new.id, new.location);
+        END;
+        ''')
+        if new_index:
+            cursor.execute("INSERT INTO jobs_location_fts(jobs_location_fts) VALUES ('rebuild')")
+        LOCATION_TRIGRAMS = True
+    except sqlite3.OperationalError as e:
+        # Older SQLite without the trigram tokenizer: substring part uses LIKE
+        print(f"Trigram location index unavailable: {e}")
+
+def filter_location(query, params, location):
+    """Add a location search to a jobs query as token and trigram lookups"""
+    tokens, remainder = parse_location_query(location)
+    for token in tokens:
+        query += " AND id IN (SELECT job_id FROM job_location_tokens WHERE token = ?)"
+        params = params + [token]
+    
+    if remainder and LOCATION_TRIGRAMS and len(remainder) >= TRIGRAM_MIN_LENGTH:
+        query += " AND id IN (SELECT rowid FROM jobs_location_fts WHERE jobs_location_fts MATCH ?)"
+        params = params + ['"' + remainder.replace('"', '""') + '"']
+    elif remainder:
+        query += " AND location LIKE ?"
+        params = params + [f"%{remainder}%"]
+    return query, params
+
+def paginate_jobs(cursor, query, params):
+    """Run a jobs query one keyset page at a time on (posted_date, id)"""
+    token, per_page = get_page_args()
+    direction, values = decode_cursor(token)
+    if values is not None and len(values) != 2:
+        direction, values = 'next', None
+    
+    if values is None:
+        query += " ORDER BY posted_date DESC, id DESC"
+    elif direction == 'prev':
+        query += " AND (posted_date, id) > (?, ?) ORDER BY posted_date ASC, id ASC"
+        params = params + list(values)
+    else:
+        query += " AND (posted_date, id) < (?, ?) ORDER BY posted_date DESC, id DESC"
+        params = params + list(values)
+    
+    query += " LIMIT ?"
+    cursor.execute(query, params + [per_page + 1])
+    rows = cursor.fetchall()
+    
+    return build_page(rows, per_page, direction, values is not None,
+                      key=lambda row: (row['posted_date'], row['id']))
+
+def write_view_counts(table, increments):
+    """Apply buffered view increments in one batched UPDATE"""
+    conn = get_db()
+    conn.executemany(
+        f"UPDATE {table} SET views = views + ? WHERE id = ?",
+        [(amount, row_id) for row_id, amount in increments]
+    )
+    conn.commit()
+    conn.close()
+
 # Initialize database on startup
 init_db()
 
+# Buffered view counters
+view_counter.init_app(app, writer=write_view_counts)
+
+# Template helpers
+app.jinja_env.globals.update(page_url=page_url)
+
 # Routes
 @app.route('/')
 def index():
@@ -104,16 +229,12 @@ def jobs():
         query += " AND job_type = ?"
         params.append(job_type)
     if location:
-        query += " AND location LIKE ?"
-        params.append(f"%{location}%")
-    
-    query += " ORDER BY posted_date DESC"
+        query, params = filter_location(query, params, location)
     
-    cursor.execute(query, params)
-    all_jobs = cursor.fetchall()
+    page = paginate_jobs(cursor, query, params)
     conn.close()
     
-    return render_template('jobs.html', jobs=all_jobs, category=category, job_type=job_type, location=location)
+    return render_template('jobs.html', jobs=page.items, page=page, category=category, job_type=job_type, location=location)
 
 @app.route('/job/<int:job_id>')
 def job_detail(job_id):
@@ -121,10 +242,6 @@ def job_detail(job_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    # Increment view count
-    cursor.execute("UPDATE jobs SET views = views + 1 WHERE id = ?", (job_id,))
-    conn.commit()
-    
     # Get job details
     cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
     job = cursor.fetchone()
@@ -134,6 +251,9 @@ def job_detail(job_id):
         flash('Job not found', 'error')
         return redirect(url_for('jobs'))
     
+    # Count the view (buffered, written in the background)
+    view_counter.increment('jobs', job_id)
+    
     return render_template('job_detail.html', job=job)
 
 @app.route('/post-job', methods=['GET', 'POST'])
@@ -142,7 +262,7 @@ def post_job():
     if request.method == 'POST':
         title = request.form.get('title')
         company = request.form.get('company')
-        location = request.form.get('location')
+        location = clean_location(request.form.get('location'))
         job_type = request.form.get('job_type')
         category = request.form.get('category')
         salary = request.form.get('salary')
@@ -164,6 +284,7 @@ def post_job():
             (title, company, location, job_type, category, salary, description,
              requirements, contact_email, application_url, source_url)
         )
+        write_location_tokens(cursor, cursor.lastrowid, location)
         conn.commit()
         conn.close()
         
@@ -241,11 +362,10 @@ def admin_jobs():
     
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM jobs ORDER BY posted_date DESC")
-    all_jobs = cursor.fetchall()
+    page = paginate_jobs(cursor, "SELECT * FROM jobs WHERE 1 = 1", [])
     conn.close()
     
-    return render_template('admin/jobs.html', jobs=all_jobs)
+    return render_template('admin/jobs.html', jobs=page.items, page=page)
 
 @app.route('/admin/delete-job/<int:job_id>')
 def admin_delete_job(job_id):
@@ -257,6 +377,7 @@ def admin_delete_job(job_id):
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    cursor.execute("DELETE FROM job_location_tokens WHERE job_id = ?", (job_id,))
     conn.commit()
     conn.close()
     
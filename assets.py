@@ -0,0 +1,239 @@
+"""
+Static asset pipeline: fingerprinting, minification, precompression.
+
+``flask build-assets`` minifies every CSS and JS file under ``static/``
+and writes it to ``static/dist/`` under a content-hashed name
+(``css/style.3f9a1c0b2d.css``). It also writes ``.gz`` and, when the
+optional ``brotli`` package is installed, ``.br`` siblings, plus a
+``manifest.json`` that maps source names to built names.
+
+At startup ``assets.init_app(app)`` loads the manifest once and hooks
+``url_for('static', filename='css/style.css')`` to return the
+fingerprinted URL. Fingerprinted files are served with
+``Cache-Control: public, max-age=31536000, immutable`` and, if the client
+accepts it, the precompressed variant with the matching
+``Content-Encoding``. Files not in the manifest (or all files when no
+build has been run) are served as before.
+
+Config:
+    ASSET_MANIFEST: Manifest path (default static/dist/manifest.json)
+    ASSET_MAX_AGE: Cache lifetime of fingerprinted files in seconds
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BUILD_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js')
+HASH_LENGTH = 10
+DEFAULT_MAX_AGE = 31536000  # One year
+
+# Precompressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ==== Minifiers ====
+
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_STRING_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace; strings are left untouched"""
+    parts = _CSS_STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        text = _CSS_COMMENT_RE.sub('', parts[i])
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        # Only after the colon: "a :hover" must keep its space
+        text = re.sub(r':\s+', ':', text)
+        text = text.replace(';}', '}')
+        parts[i] = text
+    return ''.join(parts).strip()
+
+
+# A "/" after one of these (or at the start) begins a regex literal, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_js(js):
+    """
+    Conservative JS minifier: drops comments, indentation and blank lines.
+
+    Line breaks are kept so automatic semicolon insertion still behaves the
+    same; strings, template literals and regex literals are copied as-is.
+    """
+    out = []
+    i, length = 0, len(js)
+    last_significant = ''
+    while i < length:
+        char = js[i]
+        nxt = js[i + 1] if i + 1 < length else ''
+
+        if char in '"\'`':
+            end = i + 1
+            while end < length and js[end] != char:
+                end += 2 if js[end] == '\\' else 1
+            out.append(js[i:end + 1])
+            last_significant = char
+            i = end + 1
+        elif char == '/' and nxt == '/':
+            while i < length and js[i] != '\n':
+                i += 1
+        elif char == '/' and nxt == '*':
+            end = js.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            out.append(' ')
+        elif char == '/' and (last_significant in _REGEX_PRECEDERS or not last_significant):
+            end, in_class = i + 1, False
+            while end < length and (js[end] != '/' or in_class) and js[end] != '\n':
+                if js[end] == '\\':
+                    end += 1
+                elif js[end] == '[':
+                    in_class = True
+                elif js[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(js[i:end + 1])
+            last_significant = '/'
+            i = end + 1
+        else:
+            out.append(char)
+            if not char.isspace():
+                last_significant = char
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+# ==== Build ====
+
+def fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def build_assets(static_folder, minify=True):
+    """
+    Build fingerprinted, minified and precompressed copies of every asset.
+
+    Returns:
+        The manifest, mapping source names to built names (relative to
+        the static folder)
+    """
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    if os.path.isdir(build_root):
+        shutil.rmtree(build_root)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_root)
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            if ext not in ASSET_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+
+            with open(source, encoding='utf-8') as f:
+                text = f.read()
+            content = (MINIFIERS[ext](text) if minify else text).encode('utf-8')
+
+            built = f'{BUILD_DIR}/{os.path.dirname(logical)}/{stem}.{fingerprint(content)}{ext}'.replace('//', '/')
+            target = os.path.join(static_folder, built)
+            _write(target, content)
+            _write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(target + '.br', brotli.compress(content, quality=11))
+
+            manifest[logical] = built
+            logger.info(f"{logical}: {len(text.encode('utf-8'))} -> {len(content)} bytes as {built}")
+
+    if brotli is None:
+        logger.warning("brotli is not installed, only .gz variants were written")
+    _write(os.path.join(build_root, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+# ==== Serving ====
+
+class AssetPipeline:
+    """Resolves url_for('static') through the manifest and serves built files"""
+
+    def __init__(self):
+        self.manifest = {}
+        self.built = set()
+        self.max_age = DEFAULT_MAX_AGE
+
+    def init_app(self, app):
+        self.max_age = app.config.get('ASSET_MAX_AGE', DEFAULT_MAX_AGE)
+        self.load_manifest(app.config.get('ASSET_MANIFEST') or os.path.join(
+            app.static_folder, BUILD_DIR, MANIFEST_NAME
+        ))
+
+        @app.url_defaults
+        def _fingerprinted_static_url(endpoint, values):
+            if endpoint == 'static' and values.get('filename') in self.manifest:
+                values['filename'] = self.manifest[values['filename']]
+
+        if 'static' in app.view_functions:
+            app.view_functions['static'] = lambda filename: self.send_static(app, filename)
+
+    def load_manifest(self, path):
+        """Read the build manifest; without one, assets are served unbuilt"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            logger.info("No asset manifest, serving unbuilt static files (run flask build-assets)")
+            self.manifest = {}
+        self.built = set(self.manifest.values())
+        return self.manifest
+
+    def send_static(self, app, filename):
+        """Static view: precompressed, immutable responses for built files"""
+        if filename not in self.built:
+            return app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        encoding, served = None, filename
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+                encoding, served = name, filename + suffix
+                break
+
+        response = send_from_directory(app.static_folder, served, mimetype=mimetype, max_age=self.max_age)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+# Shared pipeline, installed per app with assets.init_app(app)
+assets = AssetPipeline()
@@ -0,0 +1,109 @@
+"""
+Benchmark response compression on a large job listing page.
+
+Renders the real ``jobs.html`` with synthetic job cards, then sends it
+through CompressionMiddleware once per available encoding and level.
+Reports compressed size, bytes saved and median CPU time per request
+(process time, so it is the compression cost only, not wall-clock noise).
+
+Usage:
+    python benchmarks/compression_benchmark.py [jobs]
+
+    python benchmarks/compression_benchmark.py             # 500 job cards
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template
+from werkzeug.test import Client
+
+from compression import CompressionMiddleware, available_encodings
+from fragment_cache import fragment_cache
+from pagination import Page
+from models import make_snippet
+
+DEFAULT_JOBS = 500
+REPEATS = 15
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+WORDS = (
+    'remote software engineer python javascript cloud designer marketing writer '
+    'customer support specialist healthcare nurse tutor teacher curriculum data '
+    'analyst devops kubernetes security accounting legal sales consultant team'
+).split()
+
+
+def fake_jobs(count):
+    now = datetime.now()
+    for i in range(count):
+        yield {
+            'id': i + 1,
+            'title': ' '.join(random.choices(WORDS, k=3)).title(),
+            'company': random.choice(('TechCorp', 'SupportNow', 'DesignHub', 'HealthLine')),
+            'location': random.choice(('Remote (Worldwide)', 'Remote US', 'Europe', 'Remote UK')),
+            'job_type': random.choice(('Full-time', 'Part-time', 'Contract')),
+            'category': 'technology',
+            'subcategory': 'Software Development',
+            'salary': '$90,000 - $120,000',
+            'snippet': make_snippet(' '.join(random.choices(WORDS, k=60))),
+            'posted_date': now - timedelta(minutes=i),
+        }
+
+
+def make_app(cards):
+    """Bare app rendering jobs.html, with stub endpoints for its links"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = Flask(__name__, template_folder=os.path.join(root, 'templates'), static_folder=os.path.join(root, 'static'))
+    app.secret_key = 'benchmark'
+    for endpoint in ('index', 'post_job', 'admin_login', 'admin_dashboard', 'admin_logout'):
+        app.add_url_rule(f'/{endpoint}', endpoint, lambda: '')
+    app.add_url_rule('/jobs/<int:job_id>', 'job_detail', lambda job_id: '')
+    app.jinja_env.globals.update(page_url=lambda cursor: '', format_date=str)
+    fragment_cache.init_app(app)
+
+    @app.route('/jobs')
+    def jobs():
+        return render_template('jobs.html', jobs=cards, page=Page(cards), facets=None, job_categories={})
+
+    return app
+
+
+def measure(app, encoding, level):
+    """(compressed bytes, median CPU ms) for one listing request"""
+    wrapped = CompressionMiddleware(app.wsgi_app, levels={encoding: level}, encodings=[encoding])
+    client = Client(wrapped)
+    samples = []
+    size = 0
+    for _ in range(REPEATS):
+        started = time.process_time()
+        response = client.get('/jobs', headers={'Accept-Encoding': encoding})
+        size = len(response.get_data())
+        samples.append((time.process_time() - started) * 1000)
+    return size, statistics.median(samples)
+
+
+def run(count):
+    app = make_app(list(fake_jobs(count)))
+    baseline_size, baseline_ms = measure(app, 'identity', 0)
+
+    print(f'{count} job cards, {baseline_size:,} bytes uncompressed, {baseline_ms:.2f} ms CPU to render')
+    print(f"{'encoding':<10}{'level':>6}{'bytes':>10}{'saved':>8}{'ratio':>8}{'+CPU ms':>10}")
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            size, ms = measure(app, encoding, level)
+            print(f'{encoding:<10}{level:>6}{size:>10,}{1 - size / baseline_size:>8.0%}'
+                  f'{baseline_size / size:>7.1f}x{ms - baseline_ms:>10.2f}')
+    missing = {'br', 'zstd'} - set(available_encodings())
+    if missing:
+        print(f"Not installed: {', '.join(sorted(missing))} (pip install brotli zstandard)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_JOBS)
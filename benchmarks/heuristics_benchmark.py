@@ -0,0 +1,438 @@
+"""
+Benchmark the job field heuristics: per-pattern re calls vs. heuristics.py.
+
+Builds a fixed corpus of synthetic job postings (seeded, so every run sees
+the same pages) covering the shapes the heuristics look for: labelled
+fields, "$min - $max" salaries, remote regions, collar keywords, section
+headings in different orders, overlapping headings and non-ASCII text.
+Each page goes through the previous implementation (kept below, verbatim)
+and the current one; the extracted fields must be identical, then the
+median CPU time per page is reported for both.
+
+Usage:
+    python benchmarks/heuristics_benchmark.py [pages]
+
+    python benchmarks/heuristics_benchmark.py             # 300 pages
+"""
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from locations import clean_location
+from scraper import apply_heuristics
+from web_scraper import apply_content_heuristics
+
+DEFAULT_PAGES = 300
+REPEATS = 7
+SEED = 20240501
+
+WORDS = (
+    'remote software engineer python javascript cloud designer marketing writer '
+    'customer support specialist healthcare nurse tutor teacher curriculum data '
+    'analyst devops kubernetes security accounting legal sales consultant team '
+    'collaborate communicate deliver build maintain scale product users growth '
+    'technician warehouse repair installation chef retail hospitality content'
+).split()
+TITLES = ['Senior Python Engineer', 'Remote Customer Support Specialist', 'Online Tutor',
+          'Field Service Technician', 'Marketing Content Writer', 'Telehealth Nurse']
+COMPANIES = ['Acme Corp', 'TechCorp', 'SupportNow', 'DesignHub', 'LearnOnline', 'MediData']
+REGIONS = ['US Only', 'EU', 'Worldwide', 'UK, Ireland', 'Americas']
+DESCRIPTION_HEADINGS = ['Job Description', 'About the Role', 'Responsibilities', 'About the position', 'JOB DESCRIPTION']
+REQUIREMENT_HEADINGS = ['Requirements', 'Qualifications', "What you'll need", "What we're looking for", 'Who you are']
+CLOSING_HEADINGS = ['Benefits', 'Perks', 'Why join us', 'How to apply now', 'Apply now', 'Apply today']
+
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize() + '.'
+
+
+def paragraph(rng, sentences=4):
+    return ' '.join(sentence(rng, rng.randint(6, 16)) for _ in range(sentences))
+
+
+def fake_page(rng):
+    """Main text of one synthetic posting"""
+    lines = []
+    title, company = rng.choice(TITLES), rng.choice(COMPANIES)
+    lines.append(rng.choice([title, f'Position: {title}', f'Job Title: {title}', f'{title} at {company}']))
+    lines.append(rng.choice([f'Company: {company}', f'Join {company} today', f'We are hiring at {company}', '']))
+    lines.append(rng.choice([f'Location: Remote ({rng.choice(REGIONS)})', f'Remote - {rng.choice(REGIONS)}',
+                             'Location: remote', 'Location: Berlin, Germany', 'Work from anywhere']))
+    lines.append(rng.choice(['Salary: $90,000 - $120,000 per year', 'Compensation: competitive',
+                             'Pay: $25/hour', '$85,000 – $110,000', '']))
+    lines.append(rng.choice(['Job type: Full-time', 'Employment type: Contract', 'Part time',
+                             'This is a freelance role', '']))
+    lines.append(f'Contact: jobs@{company.split()[0].lower()}.com' if rng.random() < 0.5 else '')
+    lines.append('')
+
+    sections = [paragraph(rng, rng.randint(2, 6))]
+    if rng.random() < 0.8:
+        sections.append(f'{rng.choice(DESCRIPTION_HEADINGS)}\n\n{paragraph(rng, rng.randint(3, 10))}')
+    if rng.random() < 0.8:
+        sections.append(f'{rng.choice(REQUIREMENT_HEADINGS)}:\n\n{paragraph(rng, rng.randint(3, 8))}')
+    if rng.random() < 0.7:
+        sections.append(f'{rng.choice(CLOSING_HEADINGS)}\n\n{paragraph(rng, rng.randint(1, 4))}')
+    if rng.random() < 0.3:
+        rng.shuffle(sections)
+    if rng.random() < 0.1:
+        # Non-ASCII text, including characters that take the plain regex path
+        sections.append(rng.choice(['Café “Zürich” – €50k', 'İstanbul office', 'Teſting Security, ıT team']))
+    return '\n'.join(lines) + '\n\n'.join(sections)
+
+
+def corpus(pages):
+    rng = random.Random(SEED)
+    return [(f'https://jobs.{rng.choice(COMPANIES).split()[0].lower()}.com/{i}', fake_page(rng)) for i in range(pages)]
+
+
+def scraper_job():
+    return {"title": "", "company": "", "location": "Remote", "description": "", "requirements": "",
+            "salary_range": "", "application_url": "", "job_type": "Full-time", "job_category": "White-collar"}
+
+
+def web_job():
+    return {'title': '', 'company': '', 'location': 'Remote', 'job_type': '', 'category': '', 'subcategory': '',
+            'salary': '', 'description': '', 'requirements': '', 'contact_email': ''}
+
+
+def extract_all(pages, scraper_fn, web_fn):
+    results = []
+    for url, text in pages:
+        job = scraper_job()
+        scraper_fn(job, text)
+        web = web_job()
+        web_fn(web, text, url)
+        results.append((job, web))
+    return results
+
+
+def time_per_page(pages, scraper_fn, web_fn):
+    """Median CPU microseconds per page for (scraper heuristics, web_scraper heuristics)"""
+    scraper_samples, web_samples = [], []
+    for _ in range(REPEATS):
+        started = time.process_time()
+        for _, text in pages:
+            scraper_fn(scraper_job(), text)
+        scraper_samples.append((time.process_time() - started) / len(pages) * 1e6)
+        started = time.process_time()
+        for url, text in pages:
+            web_fn(web_job(), text, url)
+        web_samples.append((time.process_time() - started) / len(pages) * 1e6)
+    return statistics.median(scraper_samples), statistics.median(web_samples)
+
+
+def run(count):
+    pages = corpus(count)
+    size = sum(len(text) for _, text in pages) / len(pages)
+
+    before = extract_all(pages, legacy_scraper_heuristics, legacy_web_heuristics)
+    after = extract_all(pages, apply_heuristics, apply_content_heuristics)
+    mismatches = [i for i, (old, new) in enumerate(zip(before, after)) if old != new]
+    if mismatches:
+        i = mismatches[0]
+        print(f'{len(mismatches)} of {count} pages extract differently, e.g. page {i}:')
+        print(f'  before: {before[i]}\n  after:  {after[i]}')
+        sys.exit(1)
+    print(f'{count} pages, {size:,.0f} characters on average: extracted fields identical')
+
+    old = time_per_page(pages, legacy_scraper_heuristics, legacy_web_heuristics)
+    new = time_per_page(pages, apply_heuristics, apply_content_heuristics)
+    print(f"{'heuristics':<22}{'before µs':>12}{'after µs':>12}{'speedup':>10}")
+    for name, before_us, after_us in (('scraper.py', old[0], new[0]), ('web_scraper.py', old[1], new[1])):
+        print(f'{name:<22}{before_us:>12.1f}{after_us:>12.1f}{before_us / after_us:>9.1f}x')
+
+
+# ==== Previous implementations ====
+
+def legacy_scraper_heuristics(job_data, text):
+    """scraper.apply_heuristics before the rule engine"""
+    # Parse the content and try to identify job details
+    
+    # Extract job title (usually at the beginning)
+    title_patterns = [
+        r"(?i)position:?\s*([^\n\.]+)",
+        r"(?i)job title:?\s*([^\n\.]+)",
+        r"(?i)role:?\s*([^\n\.]+)",
+        r"(?i)^([^\n\.]{5,50})\s*\n"  # First line if it's reasonable length for a title
+    ]
+    
+    for pattern in title_patterns:
+        match = re.search(pattern, text)
+        if match:
+            job_data["title"] = match.group(1).strip()
+            break
+            
+    # Extract company name
+    company_patterns = [
+        r"(?i)company:?\s*([^\n\.]+)",
+        r"(?i)at\s+([A-Z][^\n\.]{2,30})",
+        r"(?i)with\s+([A-Z][^\n\.]{2,30})\s+is"
+    ]
+    
+    for pattern in company_patterns:
+        match = re.search(pattern, text)
+        if match:
+            job_data["company"] = match.group(1).strip()
+            break
+            
+    # Extract location (focusing on remote work)
+    if re.search(r"(?i)remote", text):
+        # Try to determine if there are location restrictions
+        remote_patterns = [
+            r"(?i)remote\s*\(([^\)]+)\)",
+            r"(?i)remote[\s\-]+([A-Za-z0-9\s,]+)",
+            r"(?i)location:?\s*remote\s*([A-Za-z0-9\s,]+)"
+        ]
+        
+        for pattern in remote_patterns:
+            match = re.search(pattern, text)
+            if match:
+                job_data["location"] = f"Remote ({match.group(1).strip()})"
+                break
+        else:
+            job_data["location"] = "Remote (Worldwide)"
+            
+    # Extract salary information if available
+    salary_patterns = [
+        r"(?i)salary:?\s*([^\n\.]+)",
+        r"(?i)compensation:?\s*([^\n\.]+)",
+        r"(?i)pay:?\s*([^\n\.]+)",
+        r"(?i)\$\s*(\d{2,3}[,\.]?\d{3})\s*[-–]\s*\$?\s*(\d{2,3}[,\.]?\d{3})"
+    ]
+    
+    for pattern in salary_patterns:
+        match = re.search(pattern, text)
+        if match:
+            if pattern.endswith(")"):
+                job_data["salary_range"] = match.group(1).strip()
+            else:
+                try:
+                    # If it's the pattern with actual numbers, format it nicely
+                    min_salary = match.group(1)
+                    max_salary = match.group(2)
+                    job_data["salary_range"] = f"${min_salary} - ${max_salary}"
+                except:
+                    job_data["salary_range"] = match.group(1).strip()
+            break
+    
+    # Extract job type
+    job_type_patterns = [
+        r"(?i)job type:?\s*([^\n\.]+)",
+        r"(?i)employment type:?\s*([^\n\.]+)",
+        r"(?i)(full[\s-]*time|part[\s-]*time|contract|freelance|temporary)"
+    ]
+    
+    for pattern in job_type_patterns:
+        match = re.search(pattern, text)
+        if match:
+            job_data["job_type"] = match.group(1).strip().title()
+            break
+            
+    # Try to determine job category (blue/white/grey-collar)
+    blue_collar_keywords = [
+        r"(?i)(manufacturing|factory|construction|maintenance|technician|mechanic|electrician|plumber|driver|operator|laborer|warehouse|assembly)",
+        r"(?i)(physical labor|trades|craft|repair|hands-on|mechanical|technical|installation|field service)"
+    ]
+    
+    grey_collar_keywords = [
+        r"(?i)(healthcare|nurse|medical|teacher|education|culinary|chef|hospitality|retail|service industry)",
+        r"(?i)(firefighter|police|security|childcare|elder care|salon|cosmetology|customer service)"
+    ]
+    
+    # First check for blue-collar
+    for pattern in blue_collar_keywords:
+        if re.search(pattern, text):
+            job_data["job_category"] = "Blue-collar"
+            break
+            
+    # Then check for grey-collar if not already categorized as blue-collar
+    if job_data["job_category"] == "White-collar":  # default value
+        for pattern in grey_collar_keywords:
+            if re.search(pattern, text):
+                job_data["job_category"] = "Grey-collar"
+                break
+    
+    # If neither blue nor grey collar patterns are found, stick with the default white-collar
+    
+    # For description, extract a relevant portion of text
+    # Look for sections that might contain job descriptions
+    description_sections = re.findall(r"(?i)(job description|about the role|responsibilities|about the position)(.+?)(requirements|qualifications|about you|who you are|apply now|apply today)", text, re.DOTALL)
+    if description_sections:
+        job_data["description"] = description_sections[0][1].strip()
+    else:
+        # If no clear sections, take the first few paragraphs
+        paragraphs = text.split('\n\n')
+        job_data["description"] = '\n\n'.join(paragraphs[1:min(4, len(paragraphs))])
+    
+    # Extract requirements section
+    requirements_sections = re.findall(r"(?i)(requirements|qualifications|what you'll need|what we're looking for|who you are)(.+?)(benefits|perks|why join|how to apply|apply now)", text, re.DOTALL)
+    if requirements_sections:
+        job_data["requirements"] = requirements_sections[0][1].strip()
+    
+    # Same location form as posted jobs, so location search indexes it alike
+    job_data["location"] = clean_location(job_data["location"]) or "Remote"
+    
+    # Clean up and limit long text fields
+    for field in ["description", "requirements"]:
+        if len(job_data[field]) > 2000:
+            job_data[field] = job_data[field][:2000] + "..."
+
+
+def legacy_web_heuristics(job, content, url):
+    """web_scraper.apply_content_heuristics before the rule engine"""
+    # Try to extract company name
+    company_pattern = r'Company:?\s*([A-Za-z0-9\s&\.,]+?)(?:\n|\.|$)|at\s+([A-Za-z0-9\s&\.,]+?)(?:\n|\.|$)'
+    company_match = re.search(company_pattern, content)
+    if company_match:
+        job['company'] = (company_match.group(1) or company_match.group(2)).strip()
+    else:
+        # Try to get company from domain
+        domain = urlparse(url).netloc
+        domain_parts = domain.split('.')
+        if len(domain_parts) > 1:
+            job['company'] = domain_parts[-2].capitalize()
+
+    # Try to extract location
+    location_pattern = r'Location:?\s*([A-Za-z0-9\s\.,]+?)(?:\n|\.|$)|in\s+([A-Za-z0-9\s\.,]+?)(?:\n|\.|$)'
+    location_match = re.search(location_pattern, content)
+    if location_match:
+        job['location'] = clean_location(location_match.group(1) or location_match.group(2))
+
+    # Try to extract job type
+    job_type_pattern = r'(Full[ -]Time|Part[ -]Time|Contract|Temporary|Freelance)'
+    job_type_match = re.search(job_type_pattern, content, re.IGNORECASE)
+    if job_type_match:
+        job['job_type'] = job_type_match.group(1).strip()
+
+    # Try to extract salary
+    salary_pattern = r'Salary:?\s*([$€£]?[\d,.]+\s*[-–]\s*[$€£]?[\d,.]+\s*(?:per|\/|\s)?(?:year|yr|month|annum|hour|hr))'
+    salary_match = re.search(salary_pattern, content, re.IGNORECASE)
+    if salary_match:
+        job['salary'] = salary_match.group(1).strip()
+
+    # Try to extract email
+    email_pattern = r'([\w\.-]+@[\w\.-]+\.\w+)'
+    email_match = re.search(email_pattern, content)
+    if email_match:
+        job['contact_email'] = email_match.group(1).strip()
+
+    # Guess job category and subcategory based on keywords
+    categories = {
+        'technology': ['developer', 'engineer', 'software', 'data', 'IT', 'web', 'cloud', 'devops', 'security', 'cyber'],
+        'creative': ['designer', 'writer', 'marketing', 'content', 'media', 'graphic', 'video', 'photography', 'social'],
+        'professional': ['manager', 'executive', 'director', 'analyst', 'consultant', 'sales', 'legal', 'accounting'],
+        'healthcare': ['health', 'medical', 'nurse', 'doctor', 'therapist', 'clinical', 'patient'],
+        'education': ['teacher', 'professor', 'instructor', 'tutor', 'curriculum', 'education'],
+        'skilled-trades': ['technician', 'mechanic', 'electrician', 'plumber', 'carpenter', 'maintenance']
+    }
+
+    # Subcategories mapping
+    subcategories = {
+        'technology': {
+            'software': 'Software Development',
+            'data': 'Data Science',
+            'web': 'Software Development',
+            'network': 'IT & Networking',
+            'cloud': 'DevOps',
+            'security': 'Cybersecurity',
+            'cyber': 'Cybersecurity',
+            'product': 'Product Management',
+            'devops': 'DevOps'
+        },
+        'creative': {
+            'design': 'Design',
+            'graphic': 'Design',
+            'ui': 'Design',
+            'ux': 'Design',
+            'content': 'Writing',
+            'write': 'Writing',
+            'market': 'Marketing',
+            'video': 'Video Production',
+            'anim': 'Animation',
+            'social': 'Social Media'
+        },
+        'professional': {
+            'account': 'Accounting',
+            'finance': 'Accounting',
+            'legal': 'Legal',
+            'hr': 'HR',
+            'human resource': 'HR',
+            'service': 'Customer Service',
+            'sales': 'Sales',
+            'consult': 'Consulting'
+        },
+        'healthcare': {
+            'tele': 'Telemedicine',
+            'code': 'Medical Coding',
+            'coach': 'Health Coaching',
+            'mental': 'Mental Health',
+            'psych': 'Mental Health',
+            'write': 'Medical Writing'
+        },
+        'education': {
+            'teach': 'Online Teaching',
+            'curriculum': 'Curriculum Development',
+            'consult': 'Educational Consulting',
+            'tutor': 'Tutoring',
+            'course': 'Course Creation'
+        },
+        'skilled-trades': {
+            'tech': 'Remote Technician',
+            'project': 'Project Management',
+            'quality': 'Quality Assurance',
+            'qa': 'Quality Assurance',
+            'install': 'Virtual Installation Support'
+        }
+    }
+
+    # Find best matching category
+    best_category = None
+    max_matches = 0
+
+    for category, keywords in categories.items():
+        matches = sum(1 for keyword in keywords if keyword.lower() in content.lower())
+        if matches > max_matches:
+            max_matches = matches
+            best_category = category
+
+    if best_category:
+        job['category'] = best_category
+
+        # Find best matching subcategory
+        best_subcategory = None
+        max_sub_matches = 0
+
+        for keyword, subcategory in subcategories[best_category].items():
+            if keyword.lower() in content.lower():
+                matches = content.lower().count(keyword.lower())
+                if matches > max_sub_matches:
+                    max_sub_matches = matches
+                    best_subcategory = subcategory
+
+        if best_subcategory:
+            job['subcategory'] = best_subcategory
+
+    # Extract requirements if found
+    req_section = re.search(r'Requirements:?\s*([\s\S]+?)(?:Responsibilities|Benefits|About Us|Apply Now|$)', 
+                          content, re.IGNORECASE)
+    if req_section:
+        job['requirements'] = req_section.group(1).strip()
+        # Use the content before requirements as description
+        req_start = content.find(req_section.group(0))
+        if req_start > 100:
+            job['description'] = content[:req_start].strip()
+        else:
+            job['description'] = content
+    else:
+        # No clear requirements section found
+        job['description'] = content
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAGES)
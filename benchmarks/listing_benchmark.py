@@ -0,0 +1,122 @@
+"""
+Benchmark a 500-row job listing page: full rows vs. card columns.
+
+"full" is the old listing path: every column including description and
+requirements, then ``to_dict()`` per row. "cards" is the current path:
+description/requirements stay deferred and templates use the stored
+snippet. Reports median latency and peak Python memory (tracemalloc) per
+page.
+
+Usage:
+    python benchmarks/listing_benchmark.py [rows] [page_size]
+
+    python benchmarks/listing_benchmark.py             # 5000 rows, 500 per page
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from db import db
+from models import Job, make_snippet
+
+DEFAULT_ROWS = 5000
+DEFAULT_PAGE_SIZE = 500
+REPEATS = 7
+
+WORDS = (
+    'remote software engineer python javascript cloud designer marketing writer '
+    'customer support specialist healthcare nurse tutor teacher curriculum data '
+    'analyst devops kubernetes security accounting legal sales consultant team '
+    'collaborate communicate deliver build maintain scale product users growth'
+).split()
+
+
+def make_app(path):
+    """Create a bare app bound to a SQLite file"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def fake_rows(count):
+    """Synthetic jobs with realistic description (~4 KB) and requirements (~1.5 KB)"""
+    now = datetime.now()
+    for i in range(count):
+        description = ' '.join(random.choices(WORDS, k=600))
+        yield {
+            'title': ' '.join(random.choices(WORDS, k=3)).title(),
+            'company': 'TechCorp',
+            'location': 'Remote (Worldwide)',
+            'category': 'technology',
+            'description': description,
+            'snippet': make_snippet(description),
+            'requirements': ' '.join(random.choices(WORDS, k=220)),
+            'posted_date': now - timedelta(minutes=i),
+            'is_active': True,
+            'views': 0,
+        }
+
+
+def full_page(page_size):
+    rows = Job.query.options(db.undefer_group('full_text')).filter_by(is_active=True).order_by(
+        Job.posted_date.desc(), Job.id.desc()
+    ).limit(page_size).all()
+    return [row.to_dict() for row in rows]
+
+
+def card_page(page_size):
+    rows = Job.query.filter_by(is_active=True).order_by(
+        Job.posted_date.desc(), Job.id.desc()
+    ).limit(page_size).all()
+    return [(row.title, row.company, row.snippet) for row in rows]
+
+
+def measure(build, page_size):
+    """(median ms, peak KiB) for building one page"""
+    samples = []
+    peaks = []
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        page = build(page_size)
+        samples.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        del page
+    return statistics.median(samples), statistics.median(peaks)
+
+
+def run(rows, page_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            db.session.execute(db.insert(Job), list(fake_rows(rows)))
+            db.session.commit()
+
+            print(f'{rows:,} jobs, {page_size} per page')
+            print(f"{'path':<8}{'median ms':>12}{'peak KiB':>12}")
+            results = {}
+            for name, build in (('full', full_page), ('cards', card_page)):
+                results[name] = measure(build, page_size)
+                print(f'{name:<8}{results[name][0]:>12.2f}{results[name][1]:>12.0f}')
+
+            (full_ms, full_kib), (card_ms, card_kib) = results['full'], results['cards']
+            print(f'cards use {card_kib / full_kib:.0%} of the memory and {card_ms / full_ms:.0%} of the time')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(args[0] if args else DEFAULT_ROWS, args[1] if len(args) > 1 else DEFAULT_PAGE_SIZE)
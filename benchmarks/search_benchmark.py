@@ -0,0 +1,108 @@
+"""
+Benchmark /jobs search: legacy ILIKE scan vs. the full-text index.
+
+Builds a throwaway SQLite database per size, fills it with synthetic job
+postings and times the same queries through both paths.
+
+Usage:
+    python benchmarks/search_benchmark.py [sizes...]
+
+    python benchmarks/search_benchmark.py              # 10000 100000 1000000
+    python benchmarks/search_benchmark.py 10000 50000
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from db import db
+from models import Job
+import search
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = ['python', 'remote designer', 'customer support', 'kubernetes engineer', 'nonexistentterm']
+REPEATS = 5
+BATCH_SIZE = 10_000
+
+WORDS = (
+    'remote software engineer python javascript cloud designer marketing writer '
+    'customer support specialist healthcare nurse tutor teacher curriculum data '
+    'analyst devops kubernetes security accounting legal sales consultant team '
+    'collaborate communicate deliver build maintain scale product users growth'
+).split()
+COMPANIES = ['TechCorp', 'SupportNow', 'DesignHub', 'LearnOnline', 'CoolAir Systems', 'MediData']
+LOCATIONS = ['Remote (Worldwide)', 'Remote (US Only)', 'Remote (EU)', 'Remote with occasional travel']
+
+
+def make_app(path):
+    """Create a bare app bound to a SQLite file"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def fake_rows(count, start):
+    """Generate synthetic job rows"""
+    now = datetime.now()
+    for i in range(start, start + count):
+        yield {
+            'title': ' '.join(random.choices(WORDS, k=3)).title(),
+            'company': random.choice(COMPANIES),
+            'location': random.choice(LOCATIONS),
+            'description': ' '.join(random.choices(WORDS, k=120)),
+            'posted_date': now - timedelta(minutes=i),
+            'is_active': True,
+            'views': 0,
+        }
+
+
+def populate(size):
+    """Insert ``size`` jobs in batches, then build the index in one pass"""
+    for start in range(0, size, BATCH_SIZE):
+        db.session.execute(db.insert(Job), list(fake_rows(min(BATCH_SIZE, size - start), start)))
+        db.session.commit()
+    search.init_search_index()
+    search.rebuild_search_index()
+
+
+def time_query(build):
+    """Median wall time in milliseconds for a query builder"""
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        build().order_by(Job.posted_date.desc()).limit(50).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            populate(size)
+            print(f'\n{size:,} rows (load + index: {time.perf_counter() - started:.1f}s)')
+            print(f"{'query':<24}{'ilike ms':>12}{'fts ms':>12}{'fts ranked ms':>16}")
+
+            for query in QUERIES:
+                base = lambda: Job.query.filter_by(is_active=True)
+                ilike_ms = time_query(lambda: search.ilike_filter(base(), query))
+                fts_ms = time_query(lambda: search.search_jobs(base(), query))
+                ranked_ms = time_query(lambda: search.search_jobs(base(), query, ranked=True))
+                print(f'{query:<24}{ilike_ms:>12.2f}{fts_ms:>12.2f}{ranked_ms:>16.2f}')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
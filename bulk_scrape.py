@@ -0,0 +1,288 @@
+"""
+Concurrent scraping of many job posting URLs.
+
+``bulk_scraper.run(urls)`` extracts the URLs with web_scraper's
+extract_job_details on a thread pool and yields a result for each URL as
+soon as it is done, so the admin page can show progress while the rest
+are still being fetched:
+
+* Global cap: at most ``SCRAPE_BULK_WORKERS`` extractions run at once in
+  this process, however many bulk runs are going on.
+* Per-host limit: at most ``SCRAPE_BULK_PER_HOST`` URLs of one host are in
+  flight at a time. The others wait in that host's queue while URLs of
+  other hosts go ahead, so one slow job board does not hold up the rest
+  and is not sent hundreds of requests at once.
+* Invalid URLs, repeats within the list and URLs that are already the
+  source of a job are reported straight away, without fetching.
+
+``bulk_scraper.scrape(urls)`` is a whole run as the admin page starts it:
+a ``bulk_scrape`` task on the task queue (see task_queue.py), so the web
+request returns straight away and the page polls the task's progress.
+Successful results are saved with ``save_jobs`` every
+``SCRAPE_BULK_SAVE_BATCH`` jobs: one flush and commit per batch, so
+SQLAlchemy batches the INSERTs while the Job events (rollups, facets,
+location tokens) still run, and a run that dies part way keeps what it had
+saved. Running it again skips those URLs as already scraped.
+
+Config:
+    SCRAPE_BULK_WORKERS: Extractions at once per process (default 8)
+    SCRAPE_BULK_PER_HOST: Extractions at once per host in a run (default 2)
+    SCRAPE_BULK_MAX_URLS: Most URLs accepted in one run (default 500)
+    SCRAPE_BULK_SAVE_BATCH: Successful jobs saved per commit (default 20)
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SCRAPE_BULK_WORKERS': 8,
+    'SCRAPE_BULK_PER_HOST': 2,
+    'SCRAPE_BULK_MAX_URLS': 500,
+    'SCRAPE_BULK_SAVE_BATCH': 20,
+}
+# source_url values per IN (...) query when looking for already scraped URLs
+LOOKUP_CHUNK = 500
+# Least seconds between progress reports during a run
+REPORT_INTERVAL = 1.0
+
+# Per-URL statuses
+OK = 'ok'
+FAILED = 'failed'
+INVALID = 'invalid'
+DUPLICATE = 'duplicate'
+EXISTS = 'exists'
+
+
+def parse_urls(text):
+    """URLs from pasted text or an uploaded .txt/.csv: one per line or comma separated"""
+    return [token.strip('"\'<>') for token in re.split(r'[\s,;]+', text or '') if token.strip('"\'<>')]
+
+
+def request_urls(form, files):
+    """URLs from the bulk form: the 'urls' text plus an optional 'url_file' upload"""
+    text = form.get('urls', '')
+    upload = files.get('url_file')
+    if upload and upload.filename:
+        text += '\n' + upload.read().decode('utf-8', errors='replace')
+    return parse_urls(text)
+
+
+def _result(url, status, started=None, error=None, job=None):
+    return {
+        'url': url,
+        'status': status,
+        'ms': round((time.perf_counter() - started) * 1000) if started is not None else 0,
+        'error': error,
+        'job': job,
+    }
+
+
+def _extract(url):
+    """Scrape one URL; runs on a pool thread, without an app context"""
+    from web_scraper import extract_job_details
+
+    started = time.perf_counter()
+    try:
+        scraped = extract_job_details(url)
+    except Exception as e:
+        logger.warning(f"Bulk scrape of {url} failed: {e}")
+        return _result(url, FAILED, started, error=str(e))
+    if not scraped.get('success'):
+        return _result(url, FAILED, started, error=scraped.get('error') or 'No title or description found')
+    return _result(url, OK, started, job=scraped['job'])
+
+
+def already_scraped(urls):
+    """The URLs among ``urls`` that some job already has as its source_url"""
+    from models import Job
+
+    urls = list(urls)
+    found = set()
+    for start in range(0, len(urls), LOOKUP_CHUNK):
+        chunk = urls[start:start + LOOKUP_CHUNK]
+        found.update(url for (url,) in Job.query.with_entities(Job.source_url).filter(Job.source_url.in_(chunk)))
+    return found
+
+
+def job_from_scraped(job_data, url):
+    """An unsaved Job from web_scraper's extracted fields"""
+    from models import Job
+
+    return Job(
+        title=(job_data.get('title') or 'Untitled Job')[:255],
+        company=(job_data.get('company') or 'Unknown Company')[:100],
+        location=(job_data.get('location') or 'Remote')[:100],
+        job_type=job_data.get('job_type') or 'Full-time',
+        category=job_data.get('category') or None,
+        subcategory=job_data.get('subcategory') or None,
+        salary=job_data.get('salary') or '',
+        description=job_data.get('description') or '',
+        requirements=job_data.get('requirements') or '',
+        contact_email=job_data.get('contact_email') or None,
+        application_url=url,
+        source_url=url,
+        is_active=True
+    )
+
+
+def save_jobs(results):
+    """Add a Job for every successful result in one commit; returns the Jobs"""
+    from db import db
+
+    jobs = [job_from_scraped(result['job'], result['url']) for result in results if result['status'] == OK]
+    if jobs:
+        db.session.add_all(jobs)
+        db.session.commit()
+    return jobs
+
+
+class BulkScraper:
+    """Thread pool plus per-host scheduling for scraping lists of URLs"""
+
+    def __init__(self):
+        self.config = dict(DEFAULTS)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        for key, default in DEFAULTS.items():
+            self.config[key] = app.config.get(key, default)
+        self._executor = None
+
+    @property
+    def max_urls(self):
+        return self.config['SCRAPE_BULK_MAX_URLS']
+
+    @property
+    def executor(self):
+        """The process's pool, created on first use (and again after a fork)"""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config['SCRAPE_BULK_WORKERS'], thread_name_prefix='bulk-scrape'
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, urls, skip=()):
+        """
+        Scrape ``urls`` concurrently, yielding a result dict per URL as it finishes.
+
+        Each result has 'url', 'status' (ok, failed, invalid, duplicate or
+        exists), 'ms', 'error' and, for 'ok', the extracted 'job' fields.
+        URLs in ``skip`` are reported as 'exists' without being fetched.
+        """
+        workers = self.config['SCRAPE_BULK_WORKERS']
+        per_host = self.config['SCRAPE_BULK_PER_HOST']
+
+        # Host -> URLs waiting for a slot, in the order they were given
+        waiting = {}
+        seen = set()
+        for url in urls:
+            if url in seen:
+                yield _result(url, DUPLICATE)
+                continue
+            seen.add(url)
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+                yield _result(url, INVALID, error='Not an http(s) URL')
+            elif url in skip:
+                yield _result(url, EXISTS, error='A job with this source URL already exists')
+            else:
+                waiting.setdefault(parsed.netloc.lower(), deque()).append(url)
+
+        in_flight = {}
+        running = Counter()
+
+        def submit_ready():
+            # One URL per host per round, so hosts share the free slots evenly
+            submitted = True
+            while submitted and len(in_flight) < workers:
+                submitted = False
+                for host, queue in waiting.items():
+                    if queue and running[host] < per_host and len(in_flight) < workers:
+                        url = queue.popleft()
+                        in_flight[self.executor.submit(_extract, url)] = host
+                        running[host] += 1
+                        submitted = True
+
+        try:
+            submit_ready()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running[in_flight.pop(future)] -= 1
+                submit_ready()
+                for future in done:
+                    yield future.result()
+        finally:
+            # The client went away: drop what has not started yet
+            for future in in_flight:
+                future.cancel()
+
+    def scrape(self, urls, save=True, report=None):
+        """
+        A whole run, saving successful jobs in batches as it goes.
+
+        Returns a summary: 'total', the counts per 'statuses', 'ms', one
+        'results' line per URL (without the extracted fields) and, when
+        ``save`` is set, the 'job_ids' inserted. ``report`` is called with
+        the summary so far at most every REPORT_INTERVAL seconds and after
+        each saved batch.
+        """
+        from db import db
+
+        started = time.perf_counter()
+        batch_size = self.config['SCRAPE_BULK_SAVE_BATCH']
+        summary = {'total': len(urls), 'done': 0, 'statuses': Counter(), 'results': []}
+        if save:
+            summary['job_ids'] = []
+        pending = []
+        reported = started
+
+        def flush():
+            try:
+                summary['job_ids'].extend(job.id for job in save_jobs(pending))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Saving bulk scraped jobs failed: {e}")
+                summary['error'] = f"Saving jobs failed: {e}"
+            pending.clear()
+
+        for result in self.run(urls, skip=already_scraped(urls)):
+            line = {key: result[key] for key in ('url', 'status', 'ms', 'error')}
+            if result['job']:
+                line['title'] = result['job'].get('title')
+                line['company'] = result['job'].get('company')
+            summary['results'].append(line)
+            summary['statuses'][result['status']] += 1
+            summary['done'] += 1
+
+            saved = False
+            if save and result['status'] == OK:
+                pending.append(result)
+                if len(pending) >= batch_size:
+                    flush()
+                    saved = True
+            if report and (saved or time.perf_counter() - reported >= REPORT_INTERVAL):
+                report(summary)
+                reported = time.perf_counter()
+
+        if save and pending:
+            flush()
+        summary['ms'] = round((time.perf_counter() - started) * 1000)
+        logger.info(f"Bulk scraped {summary['done']} URLs in {summary['ms']} ms: {dict(summary['statuses'])}")
+        return summary
+
+
+# Shared scraper, configured per app with bulk_scraper.init_app(app)
+bulk_scraper = BulkScraper()
@@ -0,0 +1,277 @@
+"""
+Keyword classifier for job categories and subcategories.
+
+``classify(text)`` lowercases the text once and counts every keyword of
+every category in a single Aho-Corasick pass, so the cost depends on the
+length of the text, not on how many keywords the taxonomy has. Categories
+and subcategories are those of JOB_CATEGORIES:
+
+* category: the one with the most distinct keywords present (ties go to
+  the earlier category)
+* subcategory: within that category, the subcategory whose keyword occurs
+  most often
+
+Keywords are matched as substrings and counted like ``str.count`` (matches
+of the same keyword do not overlap), which is what the scraper did before.
+
+``reclassify_jobs()`` applies the classifier to stored jobs in batches
+(``flask reclassify-jobs``).
+"""
+import logging
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+# Job categories and subcategories
+JOB_CATEGORIES = {
+    "technology": ["Software Development", "IT & Networking", "Data Science", "DevOps", "Cybersecurity", "Product Management"],
+    "creative": ["Design", "Writing", "Marketing", "Video Production", "Animation", "Social Media"],
+    "professional": ["Accounting", "Legal", "HR", "Customer Service", "Sales", "Consulting"],
+    "healthcare": ["Telemedicine", "Medical Coding", "Health Coaching", "Mental Health", "Medical Writing"],
+    "education": ["Online Teaching", "Curriculum Development", "Educational Consulting", "Tutoring", "Course Creation"],
+    "skilled-trades": ["Remote Technician", "Project Management", "Quality Assurance", "Virtual Installation Support"]
+}
+
+# Keywords whose presence counts towards a category
+CATEGORY_KEYWORDS = {
+    'technology': ['developer', 'engineer', 'software', 'data', 'it', 'web', 'cloud', 'devops', 'security', 'cyber'],
+    'creative': ['designer', 'writer', 'marketing', 'content', 'media', 'graphic', 'video', 'photography', 'social'],
+    'professional': ['manager', 'executive', 'director', 'analyst', 'consultant', 'sales', 'legal', 'accounting'],
+    'healthcare': ['health', 'medical', 'nurse', 'doctor', 'therapist', 'clinical', 'patient'],
+    'education': ['teacher', 'professor', 'instructor', 'tutor', 'curriculum', 'education'],
+    'skilled-trades': ['technician', 'mechanic', 'electrician', 'plumber', 'carpenter', 'maintenance']
+}
+
+# Keyword -> subcategory, per category; the most frequent keyword picks the subcategory
+SUBCATEGORY_KEYWORDS = {
+    'technology': {
+        'software': 'Software Development',
+        'data': 'Data Science',
+        'web': 'Software Development',
+        'network': 'IT & Networking',
+        'cloud': 'DevOps',
+        'security': 'Cybersecurity',
+        'cyber': 'Cybersecurity',
+        'product': 'Product Management',
+        'devops': 'DevOps'
+    },
+    'creative': {
+        'design': 'Design',
+        'graphic': 'Design',
+        'ui': 'Design',
+        'ux': 'Design',
+        'content': 'Writing',
+        'write': 'Writing',
+        'market': 'Marketing',
+        'video': 'Video Production',
+        'anim': 'Animation',
+        'social': 'Social Media'
+    },
+    'professional': {
+        'account': 'Accounting',
+        'finance': 'Accounting',
+        'legal': 'Legal',
+        'hr': 'HR',
+        'human resource': 'HR',
+        'service': 'Customer Service',
+        'sales': 'Sales',
+        'consult': 'Consulting'
+    },
+    'healthcare': {
+        'tele': 'Telemedicine',
+        'code': 'Medical Coding',
+        'coach': 'Health Coaching',
+        'mental': 'Mental Health',
+        'psych': 'Mental Health',
+        'write': 'Medical Writing'
+    },
+    'education': {
+        'teach': 'Online Teaching',
+        'curriculum': 'Curriculum Development',
+        'consult': 'Educational Consulting',
+        'tutor': 'Tutoring',
+        'course': 'Course Creation'
+    },
+    'skilled-trades': {
+        'tech': 'Remote Technician',
+        'project': 'Project Management',
+        'quality': 'Quality Assurance',
+        'qa': 'Quality Assurance',
+        'install': 'Virtual Installation Support'
+    }
+}
+
+DEFAULT_BATCH_SIZE = 500
+
+
+# ==== Aho-Corasick ====
+
+class KeywordCounter:
+    """
+    Aho-Corasick automaton over lowercase ASCII keywords.
+
+    Runs over the UTF-8 bytes of the lowercased text: ASCII keywords can
+    only match ASCII characters there, and a dense 256-entry transition row
+    per state keeps the inner loop to two list lookups per byte.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted(set(keywords))
+        for keyword in self.keywords:
+            if not keyword or not keyword.isascii() or keyword != keyword.lower():
+                raise ValueError(f"Keywords must be non-empty lowercase ASCII: {keyword!r}")
+
+        goto, outputs = [{}], [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for byte in keyword.encode('ascii'):
+                if byte not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][byte] = len(goto) - 1
+                state = goto[state][byte]
+            outputs[state].append(index)
+
+        # Breadth-first: fill failure links and the dense transition table
+        fail = [0] * len(goto)
+        self._next = [[0] * 256 for _ in goto]
+        self._next[0] = [goto[0].get(byte, 0) for byte in range(256)]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            row = list(self._next[fail[state]])
+            for byte, child in goto[state].items():
+                fail[child] = self._next[fail[state]][byte]
+                row[byte] = child
+                queue.append(child)
+            self._next[state] = row
+
+        self._outputs = [tuple(output) for output in outputs]
+        # Matches of one keyword can only overlap when its prefix is also its
+        # suffix ("health"); those are recounted with bytes.count, which skips
+        # overlaps like str.count does
+        self._bordered = [
+            index for index, keyword in enumerate(self.keywords)
+            if any(keyword[:size] == keyword[-size:] for size in range(1, len(keyword)))
+        ]
+
+    def count(self, text):
+        """Occurrences of each keyword in text (case-insensitive, like str.count)"""
+        data = text.lower().encode('utf-8')
+
+        # Only note the states where some keyword ends; expand them afterwards
+        table, outputs = self._next, self._outputs
+        ends = []
+        state = 0
+        for byte in data:
+            state = table[state][byte]
+            if outputs[state]:
+                ends.append(state)
+
+        counts = [0] * len(self.keywords)
+        for state, n in Counter(ends).items():
+            for index in outputs[state]:
+                counts[index] += n
+        for index in self._bordered:
+            if counts[index]:
+                counts[index] = data.count(self.keywords[index].encode('ascii'))
+        return {keyword: n for keyword, n in zip(self.keywords, counts) if n}
+
+
+# ==== Classifier ====
+
+class Classifier:
+    """Category and subcategory scoring from keyword counts"""
+
+    def __init__(self, categories, category_keywords, subcategory_keywords):
+        for category, mapping in subcategory_keywords.items():
+            unknown = set(mapping.values()) - set(categories.get(category, ()))
+            if unknown:
+                raise ValueError(f"Subcategories not in the {category!r} taxonomy: {sorted(unknown)}")
+        self.categories = categories
+        self.category_keywords = category_keywords
+        self.subcategory_keywords = subcategory_keywords
+        self.counter = KeywordCounter(
+            [keyword for keywords in category_keywords.values() for keyword in keywords] +
+            [keyword for mapping in subcategory_keywords.values() for keyword in mapping]
+        )
+
+    def classify(self, text):
+        """(category, subcategory); either may be None when no keyword matches"""
+        counts = self.counter.count(text or '')
+
+        best_category, max_matches = None, 0
+        for category, keywords in self.category_keywords.items():
+            matches = sum(1 for keyword in keywords if keyword in counts)
+            if matches > max_matches:
+                best_category, max_matches = category, matches
+        if best_category is None:
+            return None, None
+
+        best_subcategory, max_sub_matches = None, 0
+        for keyword, subcategory in self.subcategory_keywords.get(best_category, {}).items():
+            matches = counts.get(keyword, 0)
+            if matches > max_sub_matches:
+                best_subcategory, max_sub_matches = subcategory, matches
+        return best_category, best_subcategory
+
+
+# Shared classifier for JOB_CATEGORIES, built once at import
+classifier = Classifier(JOB_CATEGORIES, CATEGORY_KEYWORDS, SUBCATEGORY_KEYWORDS)
+
+
+def classify(text):
+    """(category, subcategory) for a job's text, from JOB_CATEGORIES"""
+    return classifier.classify(text)
+
+
+# ==== Batch reclassification ====
+
+def reclassify_jobs(batch_size=DEFAULT_BATCH_SIZE, only_missing=True, dry_run=False):
+    """
+    Classify stored jobs from their title, description and requirements.
+
+    Jobs are loaded in primary-key batches and updated through the ORM, so
+    the usual Job events (rollups, facet and response caches, updated_at)
+    follow the new categories. Jobs with no matching keywords keep theirs.
+
+    Returns:
+        Dictionary with 'scanned' and 'changed' counts and the new
+        category of each changed job counted under 'categories'
+    """
+    from sqlalchemy.orm import undefer_group
+
+    from db import db
+    from models import Job
+
+    report = {'scanned': 0, 'changed': 0, 'categories': {}}
+    last_id = 0
+    while True:
+        query = Job.query.options(undefer_group('full_text')).filter(Job.id > last_id)
+        if only_missing:
+            query = query.filter(db.or_(Job.category.is_(None), Job.category == ''))
+        jobs = query.order_by(Job.id).limit(batch_size).all()
+        if not jobs:
+            break
+
+        for job in jobs:
+            category, subcategory = classify('\n'.join(filter(None, (job.title, job.description, job.requirements))))
+            if category is None:
+                continue
+            if subcategory is None and job.subcategory in JOB_CATEGORIES.get(category, ()):
+                subcategory = job.subcategory
+            if (job.category, job.subcategory) != (category, subcategory):
+                job.category, job.subcategory = category, subcategory
+                report['changed'] += 1
+                report['categories'][category] = report['categories'].get(category, 0) + 1
+
+        report['scanned'] += len(jobs)
+        last_id = jobs[-1].id
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        db.session.expunge_all()
+        logger.info(f"Reclassified up to job {last_id}: {report['changed']} of {report['scanned']} changed")
+    return report
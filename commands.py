@@ -0,0 +1,138 @@
+import sys
+import time
+
+import click
+
+from assets import build_assets
+from classifier import DEFAULT_BATCH_SIZE as RECLASSIFY_BATCH_SIZE, reclassify_jobs
+from db import db
+from migrations import backfill_salaries, migration_status, upgrade_database
+from location_search import rebuild_location_index
+from query_plans import check_query_plans
+from retention import (DEFAULT_BATCH_PAUSE, DEFAULT_BATCH_SIZE, DEFAULT_RETENTION_DAYS,
+                       compact_site_visits)
+from rollups import backfill_rollups
+from search import rebuild_search_index
+from task_queue import task_queue
+from template_cache import compile_templates
+
+
+def register_commands(app):
+    """Register maintenance CLI commands with the Flask app"""
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the full-text search index for jobs"""
+        if rebuild_search_index():
+            click.echo('Search index rebuilt')
+        else:
+            click.echo('Full-text search is not available on this database; /jobs uses ILIKE')
+
+    @app.cli.command('rebuild-location-index')
+    def rebuild_location_index_command():
+        """Recompute location tokens and rebuild the trigram location index"""
+        written = rebuild_location_index()
+        click.echo(f'Location index rebuilt ({written} tokens)')
+
+    @app.cli.command('backfill-salaries')
+    @click.option('--all', 'all_rows', is_flag=True, help='Re-parse every job, not only unparsed ones')
+    @click.option('--batch-size', type=int, default=1000, help='Rows updated per batch')
+    def backfill_salaries_command(all_rows, batch_size):
+        """Parse free-text salaries into the indexed salary columns"""
+        with db.engine.begin() as conn:
+            updated = backfill_salaries(conn, batch_size=batch_size, only_missing=not all_rows)
+        click.echo(f'Parsed salaries for {updated} jobs')
+
+    @app.cli.command('backfill-rollups')
+    def backfill_rollups_command():
+        """Recompute dashboard analytics rollups from raw visits and jobs"""
+        written = backfill_rollups()
+        for table, rows in written.items():
+            click.echo(f'{table}: {rows} rows')
+
+    @app.cli.command('reclassify-jobs')
+    @click.option('--all', 'all_rows', is_flag=True, help='Reclassify every job, not only uncategorized ones')
+    @click.option('--batch-size', type=int, default=RECLASSIFY_BATCH_SIZE, help='Jobs loaded per batch')
+    @click.option('--dry-run', is_flag=True, help='Report what would change without saving')
+    def reclassify_jobs_command(all_rows, batch_size, dry_run):
+        """Infer job categories and subcategories from their text"""
+        report = reclassify_jobs(batch_size=batch_size, only_missing=not all_rows, dry_run=dry_run)
+        verb = 'Would change' if dry_run else 'Changed'
+        click.echo(f"{verb} {report['changed']} of {report['scanned']} jobs")
+        for category, count in sorted(report['categories'].items()):
+            click.echo(f'  {category}: {count}')
+
+    @app.cli.command('compact-visits')
+    @click.option('--days', type=int, default=None,
+                  help=f'Keep raw visits for this many days (default VISIT_RETENTION_DAYS or {DEFAULT_RETENTION_DAYS})')
+    @click.option('--batch-size', type=int, default=None, help='Rows deleted per transaction')
+    @click.option('--pause', type=float, default=None, help='Seconds to sleep between batches')
+    @click.option('--vacuum', is_flag=True, help='Run VACUUM afterwards to return space to the OS')
+    def compact_visits_command(days, batch_size, pause, vacuum):
+        """Downsample old site visits into rollups and delete the raw rows"""
+        report = compact_site_visits(
+            max_age_days=days or app.config.get('VISIT_RETENTION_DAYS', DEFAULT_RETENTION_DAYS),
+            batch_size=batch_size or app.config.get('VISIT_RETENTION_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+            pause=pause if pause is not None else app.config.get('VISIT_RETENTION_PAUSE', DEFAULT_BATCH_PAUSE),
+            vacuum=vacuum
+        )
+        click.echo(f"Compacted visits before {report['cutoff']}")
+        click.echo(f"  rows deleted:         {report['rows_deleted']} in {report['batches']} batches")
+        click.echo(f"  bytes reclaimed (est): {report['bytes_reclaimed']}")
+        click.echo(f"  visits downsampled:   {report['downsampled_visits']}")
+        click.echo(f"  hour rollups dropped: {report['hour_rollups_deleted']}")
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Apply pending schema migrations"""
+        applied = upgrade_database()
+        if applied:
+            click.echo(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+        else:
+            click.echo('Database is up to date')
+
+    @app.cli.command('db-status')
+    def db_status_command():
+        """List schema migrations and whether they are applied"""
+        for version, description, applied in migration_status():
+            click.echo(f"{version:>4}  {'applied' if applied else 'pending':<8} {description}")
+
+    @app.cli.command('check-query-plans')
+    @click.option('--verbose', is_flag=True, help='Print the plan of every query, not only failures')
+    def check_query_plans_command(verbose):
+        """EXPLAIN the listing queries and fail if any needs a full table scan"""
+        failures = 0
+        for name, ok, steps in check_query_plans():
+            click.echo(f"{'ok  ' if ok else 'FAIL'}  {name}")
+            if verbose or not ok:
+                for step in steps:
+                    click.echo(f"        {step}")
+            failures += not ok
+        if failures:
+            click.echo(f'{failures} listing queries need a full table scan')
+            sys.exit(1)
+
+    @app.cli.command('build-assets')
+    @click.option('--no-minify', is_flag=True, help='Fingerprint and compress without minifying')
+    def build_assets_command(no_minify):
+        """Write fingerprinted, minified, precompressed static files and their manifest"""
+        manifest = build_assets(app.static_folder, minify=not no_minify)
+        for source, built in sorted(manifest.items()):
+            click.echo(f"{source} -> {built}")
+
+    @app.cli.command('warm-templates')
+    def warm_templates_command():
+        """Compile every template into the shared bytecode cache"""
+        started = time.perf_counter()
+        count = compile_templates(app)
+        click.echo(f'{count} templates compiled in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+    @app.cli.command('task-worker')
+    @click.option('--threads', type=int, default=None,
+                  help='Worker threads (default TASK_QUEUE_WORKERS, at least 1)')
+    def task_worker_command(threads):
+        """Run queued scrape and extraction tasks until interrupted"""
+        click.echo(f'Running tasks from {task_queue.path}')
+        task_queue.work(threads)
+
+    return app
@@ -0,0 +1,220 @@
+"""
+WSGI response compression (gzip, brotli, zstd).
+
+``compression.init_app(app)`` wraps ``app.wsgi_app`` so HTML and JSON
+responses are compressed with the best encoding the client accepts
+(``Accept-Encoding`` q-values; ties prefer br, then zstd, then gzip).
+brotli and zstd are used only when the optional ``brotli`` / ``zstandard``
+packages are installed; gzip is always available.
+
+Responses are passed through untouched when they are small
+(``Content-Length`` under the minimum), already encoded (e.g. the
+precompressed static files from assets.py), not a compressible type,
+marked ``Cache-Control: no-transform``, or have no body (HEAD, 204, 304).
+
+Bodies are compressed chunk by chunk with a flush after each chunk, so
+streamed responses go out as they are produced instead of being buffered.
+
+Config:
+    COMPRESSION_LEVEL: Level per encoding, e.g. {'gzip': 6, 'br': 4, 'zstd': 3}
+    COMPRESSION_MIN_SIZE: Smallest body in bytes worth compressing (default 500)
+    COMPRESSION_ENCODINGS: Encodings to offer, in preference order
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+DEFAULT_MIN_SIZE = 500
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/xhtml+xml', 'image/svg+xml',
+)
+
+
+# ==== Compressors ====
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_encodings():
+    """Encodings this process can produce, in default preference order"""
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+COMPRESSORS = {'gzip': GzipCompressor, 'br': BrotliCompressor, 'zstd': ZstdCompressor}
+
+
+def negotiate(accept_encoding, offered):
+    """
+    Pick an encoding from an Accept-Encoding header.
+
+    Highest q-value wins; ties go to the earlier entry in ``offered``.
+    Returns None when nothing offered is acceptable.
+    """
+    qualities = {}
+    for part in (accept_encoding or '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+# ==== Middleware ====
+
+class CompressionMiddleware:
+    """WSGI middleware compressing eligible responses on the fly"""
+
+    def __init__(self, app, levels=None, min_size=DEFAULT_MIN_SIZE, encodings=None):
+        self.app = app
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self.min_size = min_size
+        offered = encodings or available_encodings()
+        self.encodings = [encoding for encoding in offered if encoding in available_encodings()]
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'), self.encodings)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return captured.setdefault('written', []).append
+
+        body = self.app(environ, capture)
+        return _CompressedResponse(self, body, captured, encoding, start_response)
+
+    def should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 304):
+            return False
+        values = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in values or 'no-transform' in values.get('cache-control', ''):
+            return False
+        if not values.get('content-type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = values.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+
+class _CompressedResponse:
+    """Response iterable that starts the response and compresses each chunk"""
+
+    def __init__(self, middleware, body, captured, encoding, start_response):
+        self.middleware = middleware
+        self.body = body
+        self.captured = captured
+        self.encoding = encoding
+        self.start_response = start_response
+
+    def __iter__(self):
+        chunks = iter(self.body)
+        # start_response is usually called by the time the first chunk exists
+        first = next(chunks, None)
+        written = self.captured.get('written', [])
+        status, headers = self.captured['status'], self.captured['headers']
+
+        if not self.middleware.should_compress(status, headers):
+            self.start_response(status, headers, self.captured.get('exc_info'))
+            yield from written
+            if first is not None:
+                yield first
+            yield from chunks
+            return
+
+        headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+        vary = [value for name, value in headers if name.lower() == 'vary']
+        headers = [(name, value) for name, value in headers if name.lower() != 'vary']
+        headers.append(('Vary', ', '.join(vary + ['Accept-Encoding']) if vary else 'Accept-Encoding'))
+        headers.append(('Content-Encoding', self.encoding))
+        # A compressed body is a different representation of the same resource
+        headers = [
+            (name, 'W/' + value if name.lower() == 'etag' and not value.startswith('W/') else value)
+            for name, value in headers
+        ]
+        self.start_response(status, headers, self.captured.get('exc_info'))
+
+        compressor = COMPRESSORS[self.encoding](self.middleware.levels[self.encoding])
+        for chunk in written + ([first] if first is not None else []):
+            if chunk:
+                yield compressor.compress(chunk)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+
+
+def init_app(app):
+    """Wrap the app's WSGI callable with compression configured from app.config"""
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        levels=app.config.get('COMPRESSION_LEVEL'),
+        min_size=app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE),
+        encodings=app.config.get('COMPRESSION_ENCODINGS'),
+    )
+    return app.wsgi_app
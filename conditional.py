@@ -0,0 +1,139 @@
+"""
+Conditional GET (ETag / Last-Modified / 304) for job pages and JSON APIs.
+
+``@conditional(validators)`` computes a page's validators from a cheap
+query before the view runs. When the request's ``If-None-Match`` (or,
+without it, ``If-Modified-Since``) still matches, a bodyless 304 is
+returned without loading rows or rendering a template. Otherwise the view
+runs and its response gets ``ETag``, ``Last-Modified`` and
+``Cache-Control: no-cache`` so browsers and the CDN revalidate instead of
+re-downloading.
+
+Validators come from ``jobs.updated_at``, which the ORM bumps on every
+change (see models.py):
+
+* ``job_validators(job_id)``: one job's ``updated_at``. The view count
+  is left out: every visit bumps it, so the ETag would never match again.
+  A revalidated page shows the count from when it was rendered.
+* ``listing_validators()``: newest ``updated_at`` and row count over all
+  jobs (the count catches deletes)
+* ``export_validators()``: the listing validators plus total views, since
+  exports include view counts (written without touching ``updated_at``)
+
+ETags are weak (the body may be re-encoded, e.g. compressed) and also
+cover the query string, the endpoint and whether the visitor is logged in.
+"""
+import hashlib
+import json
+import logging
+from datetime import timezone
+from functools import wraps
+
+from flask import make_response, request
+
+from db import db
+from models import Job
+from response_cache import is_authenticated, normalised_args
+
+logger = logging.getLogger(__name__)
+
+
+class Validators:
+    """Version parts for an ETag plus an optional last-modified time"""
+
+    def __init__(self, *parts, last_modified=None):
+        self.parts = list(parts)
+        self.last_modified = last_modified
+
+    def etag(self):
+        signature = json.dumps([
+            request.endpoint,
+            sorted((request.view_args or {}).items()),
+            normalised_args(),
+            'auth' if is_authenticated() else 'anon',
+            self.parts,
+        ], separators=(',', ':'), default=str)
+        return hashlib.md5(signature.encode('utf-8')).hexdigest()
+
+    def last_modified_utc(self):
+        if self.last_modified is None:
+            return None
+        # Stored as naive local time (datetime.now); HTTP dates are UTC
+        return self.last_modified.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def job_validators(job_id):
+    """Validators for one job page, or None if the job doesn't exist"""
+    row = db.session.execute(db.select(Job.updated_at).where(Job.id == job_id)).first()
+    if row is None:
+        return None
+    return Validators(row.updated_at, last_modified=row.updated_at)
+
+
+def listing_validators(*parts):
+    """Validators for pages listing jobs; ``parts`` add other versions (e.g. content)"""
+    # Separate subqueries so max() is a single ix_jobs_updated lookup
+    newest, count = db.session.execute(db.select(
+        db.select(db.func.max(Job.updated_at)).scalar_subquery(),
+        db.select(db.func.count()).select_from(Job).scalar_subquery(),
+    )).one()
+    return Validators(newest, count, *parts, last_modified=newest)
+
+
+def export_validators():
+    """Validators for job exports, which also show view counts"""
+    return listing_validators(db.session.execute(db.select(db.func.sum(Job.views))).scalar())
+
+
+def not_modified(etag, last_modified):
+    """Whether the request's conditional headers match the current validators"""
+    if request.if_none_match:
+        # If-None-Match takes precedence; If-Modified-Since is then ignored
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(validators, on_not_modified=None):
+    """
+    Answer conditional GETs with 304 before the view runs.
+
+    Args:
+        validators: Called with the view arguments; returns Validators, or
+            None to run the view without validators (e.g. a 404 or fallback)
+        on_not_modified: Called with the view arguments when a 304 is sent,
+            for side effects the view would have had (analytics, view counts)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            try:
+                current = validators(*args, **kwargs)
+            except Exception as e:
+                # Let the view run (and use its own error fallback)
+                logger.warning(f"Computing validators for {request.endpoint} failed: {e}")
+                current = None
+            if current is None:
+                return view(*args, **kwargs)
+
+            etag, last_modified = current.etag(), current.last_modified_utc()
+            if not_modified(etag, last_modified):
+                if on_not_modified is not None:
+                    on_not_modified(*args, **kwargs)
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,261 @@
+"""
+Versioned, cached CMS content behind ``g.content_store``.
+
+Each content section (homepage, footer, carousel, categories) is its own
+row in ``content_sections`` with a version counter that every write bumps.
+Each worker keeps the parsed sections in memory; on the first access in a
+request it runs one small query for the ``(name, version)`` pairs and
+re-reads and parses only sections whose version changed. In steady state a
+page render does no JSON parsing at all.
+
+Writes touch only the edited section. Carousel edits are read-modify-write
+on the carousel section with an optimistic version check, retried if
+another admin wrote in between. Successful writes also invalidate cached
+pages that show content (response_cache ``content`` namespace).
+
+Config:
+    CONTENT_REVALIDATE_INTERVAL: Seconds between version checks per worker
+        (default 0, i.e. once per request)
+"""
+import copy
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from flask import g
+from sqlalchemy.exc import IntegrityError
+
+from db import db
+from models import ContentSection
+from response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_WRITE_ATTEMPTS = 3
+
+# Served for sections that have never been saved
+DEFAULT_CONTENT = {
+    'homepage': {
+        'hero_title': 'Find Remote Work Opportunities',
+        'hero_subtitle': 'Discover remote job opportunities across blue-collar, white-collar, '
+                         'and grey-collar sectors from around the world.',
+        'featured_section_title': 'Featured Jobs',
+        'featured_section_description': 'The latest remote positions from our employers.',
+        'about_section_title': 'About Remote Work Jobs',
+        'about_section_content': 'We connect employers with remote talent worldwide.',
+    },
+    'footer': {
+        'company_description': 'Remote Work Jobs connects employers with remote talent worldwide.',
+        'contact_email': 'admin@remoteworkjobs.com',
+        'social_links': {'twitter': '', 'linkedin': '', 'facebook': ''},
+    },
+    'carousel': [],
+    'categories': {
+        'technology': ['Software Development', 'IT & Networking', 'Data Science', 'DevOps',
+                       'Cybersecurity', 'Product Management'],
+        'creative': ['Design', 'Writing', 'Marketing', 'Video Production', 'Animation', 'Social Media'],
+        'professional': ['Accounting', 'Legal', 'HR', 'Customer Service', 'Sales', 'Consulting'],
+        'healthcare': ['Telemedicine', 'Medical Coding', 'Health Coaching', 'Mental Health', 'Medical Writing'],
+        'education': ['Online Teaching', 'Curriculum Development', 'Educational Consulting', 'Tutoring',
+                      'Course Creation'],
+        'skilled-trades': ['Remote Technician', 'Project Management', 'Quality Assurance',
+                           'Virtual Installation Support'],
+    },
+}
+
+
+def _merge(target, changes):
+    """Recursively merge ``changes`` into ``target`` (dicts only)"""
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+class SectionCache:
+    """Per-worker cache of parsed sections keyed by name, with their versions"""
+
+    def __init__(self, revalidate_interval=0.0):
+        self.revalidate_interval = revalidate_interval
+        self._sections = {}
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._parses = 0
+
+    def revalidate(self):
+        """Reload sections whose version changed; returns how many were parsed"""
+        now = time.monotonic()
+        if self.revalidate_interval and now - self._checked_at < self.revalidate_interval:
+            return 0
+
+        versions = dict(db.session.execute(db.select(ContentSection.name, ContentSection.version)).all())
+        with self._lock:
+            stale = [name for name, version in versions.items()
+                     if self._sections.get(name, (None, None))[0] != version]
+            for name in set(self._sections) - set(versions):
+                del self._sections[name]
+
+        if stale:
+            rows = db.session.execute(db.select(
+                ContentSection.name, ContentSection.version, ContentSection.data
+            ).where(ContentSection.name.in_(stale))).all()
+            parsed = {name: (version, json.loads(data)) for name, version, data in rows}
+            with self._lock:
+                self._sections.update(parsed)
+                self._parses += len(parsed)
+
+        self._checked_at = now
+        return len(stale)
+
+    def get(self, name):
+        with self._lock:
+            entry = self._sections.get(name)
+        return entry[1] if entry else None
+
+    def snapshot(self):
+        with self._lock:
+            return {name: data for name, (_, data) in self._sections.items()}
+
+    def invalidate(self, name):
+        with self._lock:
+            self._sections.pop(name, None)
+        self._checked_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sections': {name: version for name, (version, _) in self._sections.items()},
+                'parses': self._parses
+            }
+
+
+def _read(name):
+    """(version, parsed data) straight from the database, or (None, None)"""
+    row = db.session.execute(
+        db.select(ContentSection.version, ContentSection.data).where(ContentSection.name == name)
+    ).first()
+    if row is None:
+        return None, None
+    return row.version, json.loads(row.data)
+
+
+def _write(name, data, expected_version):
+    """
+    Store a section if its version is still ``expected_version`` (None for
+    a section that does not exist yet). Returns False on a conflict.
+    """
+    text = json.dumps(data)
+    if expected_version is None:
+        try:
+            db.session.add(ContentSection(name=name, data=text, version=1))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    written = db.session.execute(
+        db.update(ContentSection).where(
+            ContentSection.name == name,
+            ContentSection.version == expected_version
+        ).values(data=text, version=ContentSection.version + 1, updated_at=datetime.now())
+    ).rowcount == 1
+    db.session.commit()
+    return written
+
+
+class ContentStore:
+    """Request-scoped view of the cached content sections (``g.content_store``)"""
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._fresh = False
+
+    def _ensure_fresh(self):
+        if not self._fresh:
+            self._cache.revalidate()
+            self._fresh = True
+
+    def get_section(self, name):
+        """Parsed section (shared; treat as read-only), or its default"""
+        self._ensure_fresh()
+        data = self._cache.get(name)
+        return data if data is not None else DEFAULT_CONTENT.get(name)
+
+    @property
+    def content(self):
+        """Every section by name, defaults included"""
+        self._ensure_fresh()
+        content = dict(DEFAULT_CONTENT)
+        content.update(self._cache.snapshot())
+        return content
+
+    def versions(self):
+        """Stored version of every section, for cache validators"""
+        self._ensure_fresh()
+        return self._cache.stats()['sections']
+    
+    def update_section(self, name, data, merge=False):
+        """Replace a section, or with ``merge=True`` merge keys into it"""
+        return self._modify(name, lambda current: _merge(current, data) if merge else data)
+
+    def add_carousel_item(self, item):
+        def add(items):
+            items.append(item)
+            return items
+        return self._modify('carousel', add)
+
+    def update_carousel_item(self, index, item):
+        def update(items):
+            if not 0 <= index < len(items):
+                return None
+            items[index] = item
+            return items
+        return self._modify('carousel', update)
+
+    def remove_carousel_item(self, index):
+        def remove(items):
+            if not 0 <= index < len(items):
+                return None
+            del items[index]
+            return items
+        return self._modify('carousel', remove)
+
+    def _modify(self, name, change):
+        """Optimistic read-modify-write of one section; False if ``change`` returns None"""
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            version, current = _read(name)
+            if current is None:
+                current = copy.deepcopy(DEFAULT_CONTENT.get(name, {}))
+            data = change(current)
+            if data is None:
+                return False
+            if _write(name, data, version):
+                self._cache.invalidate(name)
+                self._fresh = False
+                response_cache.invalidate('content')
+                return True
+        logger.warning(f"Content section {name!r} kept changing, update abandoned")
+        return False
+
+
+class ContentStoreExtension:
+    """Installs ``g.content_store`` for every request"""
+
+    def __init__(self):
+        self.cache = SectionCache()
+
+    def init_app(self, app):
+        self.cache.revalidate_interval = app.config.get('CONTENT_REVALIDATE_INTERVAL', 0.0)
+
+        @app.before_request
+        def _install_content_store():
+            g.content_store = ContentStore(self.cache)
+
+
+# Shared per-worker cache, installed per app with content_store.init_app(app)
+content_store = ContentStoreExtension()
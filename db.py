@@ -13,9 +13,63 @@ def init_app(app):
     db.init_app(app)
     login_manager.init_app(app)
     
+    # Statement timeouts and circuit breaker on the engine, last-good data for views
+    from db_guard import db_guard
+    db_guard.init_app(app)
+    
+    # Buffered view counters and analytics flush through this app's database
+    from view_counter import view_counter
+    from analytics import visit_recorder
+    view_counter.init_app(app)
+    visit_recorder.init_app(app)
+    
+    # Scheduled site_visits retention (only if VISIT_RETENTION_SCHEDULE is set)
+    from retention import retention_scheduler
+    retention_scheduler.init_app(app)
+    
+    # Cached CMS sections, installed as g.content_store for each request
+    from content_store import content_store
+    content_store.init_app(app)
+    
+    # Rendered-page cache, invalidated by Job/BlogPost commits and content writes
+    from response_cache import response_cache
+    response_cache.init_app(app)
+    
+    # Job filter counts, cleared by Job write events registered on import
+    from facets import facet_cache
+    facet_cache.init_app(app)
+    
+    # Compiled templates shared by all workers through an on-disk bytecode cache
+    import template_cache
+    template_cache.init_app(app)
+    
+    # Rendered job cards and other {% cache %} blocks, keyed by their data
+    from fragment_cache import fragment_cache
+    fragment_cache.init_app(app)
+    
+    # Pooled, retrying HTTP session shared by the scrapers
+    from http_fetch import fetcher
+    fetcher.init_app(app)
+    
+    # Thread pool and per-host limits for scraping lists of job URLs
+    from bulk_scrape import bulk_scraper
+    bulk_scraper.init_app(app)
+    
+    # SQLite-backed queue that runs scrapes and extractions off the request path
+    from task_queue import task_queue
+    task_queue.init_app(app)
+    
+    # Fingerprinted, precompressed static files (manifest from flask build-assets)
+    from assets import assets
+    assets.init_app(app)
+    
     # Import models to ensure they are registered with SQLAlchemy
     from models import UserAccount
     
+    # Register the Job events that keep dashboard rollups and location tokens current
+    import rollups  # noqa: F401
+    import location_search  # noqa: F401
+    
     @login_manager.user_loader
     def load_user(user_id):
         return UserAccount.query.get(int(user_id))
\ No newline at end of file
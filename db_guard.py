@@ -0,0 +1,369 @@
+"""
+Degradation layer for database brownouts.
+
+Three pieces keep workers free and pages useful when the database is slow
+or down:
+
+* Statement timeouts: statements run while handling a request (or a
+  background refresh) get ``DB_STATEMENT_TIMEOUT`` seconds
+  (``SET LOCAL statement_timeout`` on PostgreSQL, a progress-handler
+  deadline on SQLite). ``with statement_timeout(seconds):`` changes it for
+  one block of queries. Migrations, CLI commands and other background
+  work are not limited.
+* A circuit breaker on the engine: after ``DB_BREAKER_THRESHOLD``
+  consecutive connection/timeout errors every statement fails immediately
+  with DatabaseUnavailable for ``DB_BREAKER_RESET`` seconds, then one
+  trial statement is let through (half-open) to see if it recovered.
+* Stale-while-revalidate: ``db_guard.load(key, loader)`` remembers the
+  last good result of each loader. When the database fails, the last good
+  value is returned marked stale and one background thread per worker
+  retries the loader until the data is fresh again.
+
+Loaders run both in requests and in the refresh thread, so they must only
+use their arguments and return plain data (dicts, lists), not ORM objects.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from flask import has_request_context
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATEMENT_TIMEOUT = 5.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30.0
+DEFAULT_STALE_ENTRIES = 500
+DEFAULT_REFRESH_ATTEMPTS = 10
+
+# OperationalError/InterfaceError covers bad SQL too (SQLite's "no such
+# column"), so those only count as the database being unavailable when the
+# connection was lost, the SQLSTATE class says so (PostgreSQL: 08 connection
+# exception, 53 insufficient resources, 57 operator intervention, which
+# includes statement_timeout) or the message does (SQLite has no codes;
+# "interrupted" is the progress-handler timeout)
+UNAVAILABLE_SQLSTATE_CLASSES = ('08', '53', '57')
+UNAVAILABLE_MESSAGES = (
+    'database is locked', 'database is busy', 'interrupted', 'timeout', 'timed out', 'unable to open database',
+    'could not connect', 'connection', 'server closed', 'terminating', 'too many clients',
+)
+
+# SQLite progress handler granularity, in virtual machine instructions
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class DatabaseUnavailable(Exception):
+    """The circuit breaker is open, or the database failed with nothing cached"""
+
+
+def is_unavailable(error):
+    """Whether ``error`` means the database is unreachable or too slow (not bad SQL)"""
+    if isinstance(error, (DatabaseUnavailable, PoolTimeoutError)):
+        return True
+    if not isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    if error.connection_invalidated:
+        return True
+    sqlstate = getattr(error.orig, 'pgcode', None) or getattr(error.orig, 'sqlstate', None)
+    if sqlstate:
+        return sqlstate[:2] in UNAVAILABLE_SQLSTATE_CLASSES
+    message = str(error.orig).lower()
+    return any(fragment in message for fragment in UNAVAILABLE_MESSAGES)
+
+
+# ==== Circuit Breaker ====
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed"""
+
+    def __init__(self, threshold=DEFAULT_BREAKER_THRESHOLD, reset_timeout=DEFAULT_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_thread = None
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'rejected': 0}
+
+    def allow(self):
+        """Whether a statement may run now; claims the half-open trial if due"""
+        if self.state == 'closed':
+            return True
+        with self._lock:
+            # Open long enough, or a trial that never reported back
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                self._opened_at = time.monotonic()
+                self._trial_thread = threading.get_ident()
+            if self.state == 'half-open' and self._trial_thread == threading.get_ident():
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        if self.state == 'closed' and not self._failures:
+            return
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Database recovered, circuit breaker closed")
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or (self.state == 'closed' and self._failures >= self.threshold):
+                if self.state == 'closed':
+                    logger.error(f"Database failed {self._failures} times in a row, circuit breaker open")
+                    self._stats['opened'] += 1
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._trial_thread = None
+
+    def retry_in(self):
+        """Seconds until the next trial is allowed (0 if allowed now)"""
+        if self.state == 'closed':
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, state=self.state, consecutive_failures=self._failures)
+
+
+# ==== Statement Timeouts ====
+
+_local = threading.local()
+
+
+@contextmanager
+def statement_timeout(seconds):
+    """Use a different statement timeout (None for none) for queries in this block"""
+    previous = getattr(_local, 'timeout', False)
+    _local.timeout = seconds
+    try:
+        yield
+    finally:
+        _local.timeout = previous
+
+
+def _effective_timeout(default):
+    timeout = getattr(_local, 'timeout', False)
+    if timeout is not False:
+        return timeout
+    return default if has_request_context() else None
+
+
+def _install_sqlite_timeouts(engine, guard):
+    @db.event.listens_for(engine, 'connect')
+    def _set_progress_handler(dbapi_connection, connection_record):
+        deadline = connection_record.info['statement_deadline'] = [0.0]
+        dbapi_connection.set_progress_handler(
+            lambda: 1 if deadline[0] and time.monotonic() > deadline[0] else 0,
+            SQLITE_PROGRESS_STEPS
+        )
+
+    @db.event.listens_for(engine, 'before_cursor_execute')
+    def _start_deadline(conn, cursor, statement, parameters, context, executemany):
+        deadline = conn.info.get('statement_deadline')
+        if deadline is not None:
+            timeout = _effective_timeout(guard.statement_timeout)
+            deadline[0] = time.monotonic() + timeout if timeout else 0.0
+
+    @db.event.listens_for(engine, 'after_cursor_execute')
+    def _clear_deadline(conn, cursor, statement, parameters, context, executemany):
+        deadline = conn.info.get('statement_deadline')
+        if deadline is not None:
+            deadline[0] = 0.0
+
+
+def _install_postgres_timeouts(engine, guard):
+    @db.event.listens_for(engine, 'before_cursor_execute')
+    def _set_timeout(conn, cursor, statement, parameters, context, executemany):
+        # SET LOCAL lasts until the end of the transaction, so this is one
+        # extra statement per transaction, only when the timeout changes
+        milliseconds = int((_effective_timeout(guard.statement_timeout) or 0) * 1000)
+        if conn.info.get('statement_timeout', 0) != milliseconds:
+            cursor.execute(f"SET LOCAL statement_timeout = {milliseconds}")
+            conn.info['statement_timeout'] = milliseconds
+
+    @db.event.listens_for(engine, 'commit')
+    @db.event.listens_for(engine, 'rollback')
+    def _transaction_ended(conn):
+        conn.info.pop('statement_timeout', None)
+
+
+# ==== Guard ====
+
+class StaleCache:
+    """Last good value per key, bounded LRU"""
+
+    def __init__(self, max_entries=DEFAULT_STALE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabaseGuard:
+    """Statement timeouts, circuit breaker and stale fallback for one app"""
+
+    def __init__(self):
+        self.app = None
+        self.statement_timeout = DEFAULT_STATEMENT_TIMEOUT
+        self.refresh_attempts = DEFAULT_REFRESH_ATTEMPTS
+        self.breaker = CircuitBreaker()
+        self.stale = StaleCache()
+        self._refreshing = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'fresh': 0, 'stale': 0, 'unavailable': 0, 'refreshed': 0, 'refresh_failures': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.statement_timeout = app.config.get('DB_STATEMENT_TIMEOUT', DEFAULT_STATEMENT_TIMEOUT)
+        self.refresh_attempts = app.config.get('DB_REFRESH_ATTEMPTS', DEFAULT_REFRESH_ATTEMPTS)
+        self.breaker.threshold = app.config.get('DB_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD)
+        self.breaker.reset_timeout = app.config.get('DB_BREAKER_RESET', DEFAULT_BREAKER_RESET)
+        self.stale.max_entries = app.config.get('DB_STALE_CACHE_SIZE', DEFAULT_STALE_ENTRIES)
+
+        with app.app_context():
+            engine = db.engine
+        self._install_breaker(engine)
+        if engine.dialect.name == 'sqlite':
+            _install_sqlite_timeouts(engine, self)
+        elif engine.dialect.name == 'postgresql':
+            _install_postgres_timeouts(engine, self)
+        else:
+            logger.info(f"Statement timeouts not supported on {engine.dialect.name}")
+
+    def _install_breaker(self, engine):
+        breaker = self.breaker
+
+        @db.event.listens_for(engine, 'do_connect')
+        def _reject_connect(dialect, conn_rec, cargs, cparams):
+            if not breaker.allow():
+                raise DatabaseUnavailable('Database circuit breaker is open')
+
+        @db.event.listens_for(engine, 'before_cursor_execute')
+        def _reject_statement(conn, cursor, statement, parameters, context, executemany):
+            if not breaker.allow():
+                raise DatabaseUnavailable('Database circuit breaker is open')
+
+        @db.event.listens_for(engine, 'after_cursor_execute')
+        def _statement_succeeded(conn, cursor, statement, parameters, context, executemany):
+            breaker.record_success()
+
+        @db.event.listens_for(engine, 'handle_error')
+        def _statement_failed(context):
+            if context.is_disconnect or is_unavailable(context.sqlalchemy_exception):
+                breaker.record_failure()
+
+    def _bump(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def load(self, key, loader):
+        """
+        Run ``loader`` and remember its result under ``key``.
+
+        Returns:
+            (value, stale): the fresh value, or after a database failure
+            the last good value with ``stale=True``
+
+        Raises:
+            DatabaseUnavailable: The database failed and nothing is cached;
+                other errors (bad SQL, bugs in the loader) propagate
+        """
+        try:
+            value = loader()
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            db.session.rollback()
+            self._schedule_refresh(key, loader)
+            entry = self.stale.get(key)
+            if entry is None:
+                self._bump('unavailable')
+                raise DatabaseUnavailable(str(e)) from e
+            self._bump('stale')
+            logger.warning(f"Serving stale {key!r} from {time.ctime(entry[1])}: {e}")
+            return entry[0], True
+
+        self.stale.put(key, value)
+        self._bump('fresh')
+        return value, False
+
+    def _schedule_refresh(self, key, loader):
+        with self._lock:
+            if key not in self._refreshing:
+                self._refreshing[key] = (loader, 0)
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        """Start the refresh thread if it is not running in this process"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='db-guard-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._refreshing:
+                    self._thread = None
+                    return
+                key, (loader, attempts) = self._refreshing.popitem(last=False)
+
+            # Sleep until the breaker lets a trial through
+            time.sleep(max(self.breaker.retry_in(), 0.5))
+            with self.app.app_context(), statement_timeout(self.statement_timeout):
+                try:
+                    self.stale.put(key, loader())
+                    self._bump('refreshed')
+                    continue
+                except Exception as e:
+                    db.session.rollback()
+                    self._bump('refresh_failures')
+                    logger.warning(f"Background refresh of {key!r} failed (attempt {attempts + 1}): {e}")
+
+            with self._lock:
+                if attempts + 1 < self.refresh_attempts and key not in self._refreshing:
+                    self._refreshing[key] = (loader, attempts + 1)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, refreshing=len(self._refreshing), stale_entries=len(self.stale))
+        stats['breaker'] = self.breaker.stats()
+        return stats
+
+
+# Shared guard, installed per app with db_guard.init_app(app)
+db_guard = DatabaseGuard()
@@ -0,0 +1,144 @@
+"""
+Facet counts for the job filters (category, subcategory, job type).
+
+All counts for a filtered result set come from one grouped query:
+
+    SELECT category, subcategory, job_type, count(*) ... GROUP BY 1, 2, 3
+
+over the jobs matching the non-facet filters (active, keywords, location).
+Each facet's counts are then summed in Python from those few rows,
+applying the *other* selected facets, so picking a category still shows
+how many jobs every other category has.
+
+Grouped rows are cached in-process per normalised filter combination
+(``FACET_CACHE_SIZE`` entries, least recently used evicted) and the cache
+is cleared by ORM events on any Job insert, update or delete. Entries also
+expire after ``FACET_CACHE_TTL`` seconds, which bounds how stale counts can
+be in other worker processes.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from db import db
+from models import Job
+
+FACETS = ('category', 'subcategory', 'job_type')
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 60.0
+
+
+def selected_facets(args):
+    """Facet selections from request args, e.g. {'category': 'technology'}"""
+    return {facet: args.get(facet, '') for facet in FACETS if args.get(facet)}
+
+
+def apply_facets(query, selected):
+    """Filter a Job query by the selected facet values"""
+    for facet, value in selected.items():
+        query = query.filter(getattr(Job, facet) == value)
+    return query
+
+
+def _normalise(filters):
+    """Cache key for non-facet filters; case and spacing do not matter"""
+    return tuple(sorted(
+        (name, ' '.join(str(value).lower().split()))
+        for name, value in filters.items() if value
+    ))
+
+
+class FacetCache:
+    """LRU cache of grouped facet rows with TTL and write invalidation"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def init_app(self, app):
+        self.max_size = app.config.get('FACET_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('FACET_CACHE_TTL', self.ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key, rows):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self._hits, 'misses': self._misses}
+
+
+# Shared cache, configured per app with facet_cache.init_app(app)
+facet_cache = FacetCache()
+
+
+def _grouped_rows(query):
+    rows = query.with_entities(
+        Job.category, Job.subcategory, Job.job_type, db.func.count(Job.id)
+    ).group_by(Job.category, Job.subcategory, Job.job_type).order_by(None).all()
+    return [tuple(row) for row in rows]
+
+
+def facet_counts(query, filters, selected):
+    """
+    Count jobs per facet value.
+
+    Args:
+        query: Job query with the non-facet filters already applied
+        filters: Those non-facet filters by name, used as the cache key
+        selected: Selected facet values, see ``selected_facets``
+
+    Returns:
+        ``{'total': n, 'category': {value: count}, 'subcategory': {...},
+        'job_type': {...}}`` where ``total`` matches every selection
+    """
+    key = _normalise(filters)
+    rows = facet_cache.get(key)
+    if rows is None:
+        rows = _grouped_rows(query)
+        facet_cache.set(key, rows)
+
+    counts = {facet: Counter() for facet in FACETS}
+    total = 0
+    for *values, count in rows:
+        row = dict(zip(FACETS, values))
+        misses = [facet for facet, value in selected.items() if row[facet] != value]
+        if not misses:
+            total += count
+        for facet in FACETS:
+            # A facet's counts ignore its own selection but honour the others
+            if row[facet] and (not misses or misses == [facet]):
+                counts[facet][row[facet]] += count
+
+    result = {facet: dict(counts[facet]) for facet in FACETS}
+    result['total'] = total
+    return result
+
+
+@db.event.listens_for(Job, 'after_insert')
+@db.event.listens_for(Job, 'after_update')
+@db.event.listens_for(Job, 'after_delete')
+def _job_changed(mapper, connection, target):
+    facet_cache.clear()
@@ -0,0 +1,125 @@
+"""
+Cache of rendered template fragments.
+
+Templates wrap markup that only changes with its data in a ``cache`` tag
+whose arguments form the key::
+
+    {% cache job.id, job.updated_at %}
+        <div class="card">...</div>
+    {% endcache %}
+
+The template name and line are added to the key, so the same job rendered
+by ``index.html`` and ``jobs.html`` gets two entries. Fragments are never
+invalidated explicitly: when a job changes its ``updated_at`` changes, the
+old entry stops being used and is evicted once the cache is over its size
+limit (least recently used first). If any key part is missing (None or
+undefined, e.g. the sample jobs) the block is rendered without caching.
+
+Fragments must not depend on the user or request, only on the key.
+
+Config:
+    FRAGMENT_CACHE_MAX_BYTES: Total size of cached HTML (default 4 MB, 0 disables)
+"""
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+
+class FragmentCache:
+    """LRU of rendered HTML bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key, html):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (html, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._stats['evictions'] += 1
+
+    def render(self, key, render):
+        """Cached HTML for ``key``, or the output of ``render()`` (then cached)"""
+        if not self.max_bytes:
+            return render()
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.set(key, html)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                bytes=self._size,
+                max_bytes=self.max_bytes,
+                hit_ratio=round(self._stats['hits'] / total, 3) if total else None,
+            )
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key, ... %}...{% endcache %}`` backed by environment.fragment_cache"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(f'{parser.name}:{lineno}')]
+        while parser.stream.current.type != 'block_end':
+            if len(parts) > 1:
+                parser.stream.expect('comma')
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_fragment', [nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_fragment(self, parts, caller):
+        cache = getattr(self.environment, 'fragment_cache', None)
+        if cache is None or any(part is None or isinstance(part, self.environment.undefined) for part in parts):
+            return caller()
+        return Markup(cache.render(tuple(str(part) for part in parts), lambda: str(caller())))
+
+
+# Shared cache, installed per app with fragment_cache.init_app(app)
+fragment_cache = FragmentCache()
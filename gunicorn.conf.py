@@ -0,0 +1,25 @@
+"""
+gunicorn settings used by workflow_start.sh.
+
+Each worker precompiles templates and requests the main routes once
+(template_cache.warm_up) before it accepts connections, so the first
+visitors after a restart do not pay for template compilation and cold
+caches. Set TEMPLATE_WARMUP=0 to skip it.
+"""
+import logging
+import time
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def post_worker_init(worker):
+    started = time.perf_counter()
+    app = worker.wsgi  # main:app, the Flask app itself
+    if app.config.get('TEMPLATE_WARMUP', True):
+        import template_cache
+        timings = template_cache.warm_up(app)
+        logger.info(
+            f"Worker {worker.pid} warmed up in {timings['total']:.0f} ms "
+            f"(templates {timings['templates']:.0f} ms)"
+        )
+    logger.info(f"Worker {worker.pid} ready {(time.perf_counter() - started) * 1000:.0f} ms after app load")
@@ -0,0 +1,209 @@
+"""
+Precompiled rules for extracting job fields from page text.
+
+The field heuristics used by scraper.py and web_scraper.py are declared
+here as tables and compiled once at import. Each pattern also names the
+literal(s) a match has to start with (its anchors). The page text is
+lowercased once, and ``str.find`` on the anchors tells which patterns can
+match at all and where the first possible match starts; the regex only
+runs from there. Most patterns never occur in a given page, so most rules
+cost a substring search instead of a regex scan of the whole text.
+
+* ``PatternRule``: ordered patterns, the first one (in list order) that
+  matches anywhere wins, exactly like looping over ``re.search`` calls.
+* ``KeywordRule``: whether any of a set of literal keywords occurs.
+* ``split_sections``: finds the section headings once and cuts the
+  description and requirements sections out of the text.
+
+Results are the same as running the original regexes; text containing the
+few characters that match an ASCII letter case-insensitively without
+lowercasing to it (İ, ı, ſ) goes through the plain regexes instead.
+"""
+import re
+
+FLAGS = re.IGNORECASE
+
+# Characters re.IGNORECASE matches to i or s that str.lower() does not map to them
+_UNALIGNED = re.compile('[\u0130\u0131\u017f]')
+
+
+class PageText:
+    """Text plus its lowercase form, shared by every rule applied to it"""
+
+    def __init__(self, text):
+        self.text = text
+        # None: prefiltering on the lowercase text would not be exact
+        self.lowered = None if _UNALIGNED.search(text) else text.lower()
+
+
+class Pattern:
+    """A compiled regex and the lowercase literals its matches start with"""
+
+    def __init__(self, pattern, *anchors, flags=FLAGS):
+        self.regex = re.compile(pattern, flags)
+        self.anchors = anchors
+        # Patterns anchored with ^ can only match at the start of the text
+        self.at_start = pattern.startswith('^')
+
+    def search(self, page):
+        """Same result as ``self.regex.search(page.text)``"""
+        if self.at_start:
+            return self.regex.match(page.text)
+        if page.lowered is None or not self.anchors:
+            return self.regex.search(page.text)
+        positions = [pos for pos in (page.lowered.find(anchor) for anchor in self.anchors) if pos != -1]
+        if not positions:
+            return None
+        return self.regex.search(page.text, min(positions))
+
+
+class PatternRule:
+    """First-matching-pattern-wins rule over an ordered list of Patterns"""
+
+    def __init__(self, *patterns):
+        self.patterns = patterns
+
+    def search(self, page):
+        """Match of the first pattern (in list order) found anywhere, or None"""
+        for pattern in self.patterns:
+            match = pattern.search(page)
+            if match:
+                return match
+        return None
+
+    def first_group(self, page):
+        """Group 1 of the winning match, or None"""
+        match = self.search(page)
+        return match.group(1) if match else None
+
+
+class KeywordRule:
+    """Whether any of a set of literal keywords occurs (case-insensitively)"""
+
+    def __init__(self, *keywords):
+        self.keywords = keywords
+        self.regex = re.compile('|'.join(re.escape(keyword) for keyword in keywords), FLAGS)
+
+    def matches(self, page):
+        if page.lowered is None:
+            return self.regex.search(page.text) is not None
+        return any(keyword in page.lowered for keyword in self.keywords)
+
+
+# ==== scraper.py rules ====
+
+TITLE = PatternRule(
+    Pattern(r"position:?\s*([^\n\.]+)", 'position'),
+    Pattern(r"job title:?\s*([^\n\.]+)", 'job title'),
+    Pattern(r"role:?\s*([^\n\.]+)", 'role'),
+    Pattern(r"^([^\n\.]{5,50})\s*\n"),  # First line if it's reasonable length for a title
+)
+
+COMPANY = PatternRule(
+    Pattern(r"company:?\s*([^\n\.]+)", 'company'),
+    Pattern(r"at\s+([A-Z][^\n\.]{2,30})", 'at'),
+    Pattern(r"with\s+([A-Z][^\n\.]{2,30})\s+is", 'with'),
+)
+
+REMOTE = KeywordRule('remote')
+
+REMOTE_REGION = PatternRule(
+    Pattern(r"remote\s*\(([^\)]+)\)", 'remote'),
+    Pattern(r"remote[\s\-]+([A-Za-z0-9\s,]+)", 'remote'),
+    Pattern(r"location:?\s*remote\s*([A-Za-z0-9\s,]+)", 'location'),
+)
+
+SALARY = PatternRule(
+    Pattern(r"salary:?\s*([^\n\.]+)", 'salary'),
+    Pattern(r"compensation:?\s*([^\n\.]+)", 'compensation'),
+    Pattern(r"pay:?\s*([^\n\.]+)", 'pay'),
+    Pattern(r"\$\s*(\d{2,3}[,\.]?\d{3})\s*[-–]\s*\$?\s*(\d{2,3}[,\.]?\d{3})", '$'),
+)
+
+JOB_TYPE = PatternRule(
+    Pattern(r"job type:?\s*([^\n\.]+)", 'job type'),
+    Pattern(r"employment type:?\s*([^\n\.]+)", 'employment type'),
+    Pattern(r"(full[\s-]*time|part[\s-]*time|contract|freelance|temporary)",
+            'full', 'part', 'contract', 'freelance', 'temporary'),
+)
+
+BLUE_COLLAR = KeywordRule(
+    'manufacturing', 'factory', 'construction', 'maintenance', 'technician', 'mechanic', 'electrician',
+    'plumber', 'driver', 'operator', 'laborer', 'warehouse', 'assembly',
+    'physical labor', 'trades', 'craft', 'repair', 'hands-on', 'mechanical', 'technical', 'installation',
+    'field service',
+)
+
+GREY_COLLAR = KeywordRule(
+    'healthcare', 'nurse', 'medical', 'teacher', 'education', 'culinary', 'chef', 'hospitality', 'retail',
+    'service industry',
+    'firefighter', 'police', 'security', 'childcare', 'elder care', 'salon', 'cosmetology', 'customer service',
+)
+
+# Section headings: (start headings, end headings)
+SECTIONS = {
+    'description': (
+        ('job description', 'about the role', 'responsibilities', 'about the position'),
+        ('requirements', 'qualifications', 'about you', 'who you are', 'apply now', 'apply today'),
+    ),
+    'requirements': (
+        ('requirements', 'qualifications', "what you'll need", "what we're looking for", 'who you are'),
+        ('benefits', 'perks', 'why join', 'how to apply', 'apply now'),
+    ),
+}
+
+# The same sections as regexes, for text that cannot be prefiltered
+_SECTION_RES = {
+    name: re.compile(
+        '(' + '|'.join(map(re.escape, starts)) + ')(.+?)(' + '|'.join(map(re.escape, ends)) + ')',
+        FLAGS | re.DOTALL
+    )
+    for name, (starts, ends) in SECTIONS.items()
+}
+
+
+def _first(lowered, headings, start=0):
+    """(position, heading) of the earliest of ``headings`` at or after start"""
+    found = [(pos, heading) for pos, heading in ((lowered.find(heading, start), heading) for heading in headings) if pos != -1]
+    return min(found) if found else (None, None)
+
+
+def split_sections(page):
+    """
+    Body of each section in SECTIONS, or None when it has no start and end.
+
+    Same result as ``re.findall(r"(?i)(start|...)(.+?)(end|...)", text,
+    re.DOTALL)[0][1]``: the body runs from the first start heading to the
+    first end heading at least one character after it.
+    """
+    sections = {}
+    for name, (starts, ends) in SECTIONS.items():
+        if page.lowered is None:
+            match = _SECTION_RES[name].search(page.text)
+            sections[name] = match.group(2) if match else None
+            continue
+        start, heading = _first(page.lowered, starts)
+        stop = None
+        if start is not None:
+            body_start = start + len(heading)
+            stop, _ = _first(page.lowered, ends, body_start + 1)
+        sections[name] = page.text[body_start:stop] if stop is not None else None
+    return sections
+
+
+# ==== web_scraper.py rules ====
+
+WEB_COMPANY = Pattern(
+    r'Company:?\s*([A-Za-z0-9\s&\.,]+?)(?:\n|\.|$)|at\s+([A-Za-z0-9\s&\.,]+?)(?:\n|\.|$)', 'company', 'at', flags=0
+)
+WEB_LOCATION = Pattern(
+    r'Location:?\s*([A-Za-z0-9\s\.,]+?)(?:\n|\.|$)|in\s+([A-Za-z0-9\s\.,]+?)(?:\n|\.|$)', 'location', 'in', flags=0
+)
+WEB_JOB_TYPE = Pattern(r'(Full[ -]Time|Part[ -]Time|Contract|Temporary|Freelance)',
+                       'full', 'part', 'contract', 'temporary', 'freelance')
+WEB_SALARY = Pattern(
+    r'Salary:?\s*([$€£]?[\d,.]+\s*[-–]\s*[$€£]?[\d,.]+\s*(?:per|\/|\s)?(?:year|yr|month|annum|hour|hr))', 'salary'
+)
+# Starts before the @, so no anchor
+WEB_EMAIL = Pattern(r'([\w\.-]+@[\w\.-]+\.\w+)', flags=0)
+WEB_REQUIREMENTS = Pattern(r'Requirements:?\s*([\s\S]+?)(?:Responsibilities|Benefits|About Us|Apply Now|$)', 'requirements')
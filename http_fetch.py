@@ -0,0 +1,266 @@
+"""
+Shared HTTP client for the scrapers.
+
+Every scraper fetch goes through ``fetcher.fetch(url)``, which uses one
+pooled ``requests.Session`` per worker process:
+
+* Keep-alive: connections to a job board are reused across scrapes, so
+  only the first fetch pays for DNS, TCP and TLS.
+* Per-host limits: at most ``SCRAPER_POOL_PER_HOST`` connections to one
+  host; further fetches wait for a free connection instead of opening more.
+* Retries: connection errors and 429/5xx answers are retried with
+  exponential backoff. ``Retry-After`` is honoured, but never waited for
+  past the fetch's total deadline.
+* Timeouts: separate connect and read timeouts, plus a total deadline for
+  the whole fetch, retries included.
+* Body limit: responses larger than ``SCRAPER_MAX_BYTES`` are rejected
+  with ResponseTooLarge instead of being read into memory.
+
+``fetcher.stats()`` reports request counters and, per host, how many
+connections were opened versus requests sent over them.
+
+Config:
+    SCRAPER_CONNECT_TIMEOUT / SCRAPER_READ_TIMEOUT: Seconds (default 5 / 10)
+    SCRAPER_TOTAL_TIMEOUT: Deadline for the whole fetch in seconds (default 30)
+    SCRAPER_MAX_BYTES: Largest body accepted (default 5 MB)
+    SCRAPER_RETRIES: Retries per fetch (default 3)
+    SCRAPER_BACKOFF: Backoff factor in seconds (default 0.5)
+    SCRAPER_POOL_HOSTS: Hosts kept in the pool (default 20)
+    SCRAPER_POOL_PER_HOST: Connections per host (default 4)
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+DEFAULTS = {
+    'SCRAPER_CONNECT_TIMEOUT': 5.0,
+    'SCRAPER_READ_TIMEOUT': 10.0,
+    'SCRAPER_TOTAL_TIMEOUT': 30.0,
+    'SCRAPER_MAX_BYTES': 5 * 1024 * 1024,
+    'SCRAPER_RETRIES': 3,
+    'SCRAPER_BACKOFF': 0.5,
+    'SCRAPER_POOL_HOSTS': 20,
+    'SCRAPER_POOL_PER_HOST': 4,
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CHUNK_SIZE = 64 * 1024
+
+
+class FetchError(Exception):
+    """The page could not be fetched (connection, timeout, retries exhausted)"""
+
+
+class ResponseTooLarge(FetchError):
+    """The body is larger than SCRAPER_MAX_BYTES"""
+
+
+class DeadlineRetry(Retry):
+    """
+    Retry whose Retry-After waits end at the current fetch's deadline.
+
+    urllib3 before 2.4 has no ``retry_after_max`` and sleeps for whatever
+    the server asks, so "Retry-After: 3600" would hold a worker for an hour.
+    """
+
+    def __init__(self, *args, remaining=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Callable giving the seconds left for the fetch on this thread
+        self.remaining = remaining
+
+    def new(self, **kw):
+        # Retry.new only copies the arguments it knows about
+        retry = super().new(**kw)
+        retry.remaining = self.remaining
+        return retry
+
+    def get_retry_after(self, response):
+        seconds = super().get_retry_after(response)
+        if seconds is not None and self.remaining is not None:
+            seconds = max(0.0, min(seconds, self.remaining()))
+        return seconds
+
+
+class FetchedPage:
+    """A fully read response"""
+
+    def __init__(self, url, status_code, headers, content, encoding, elapsed, retries):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.elapsed = elapsed
+        self.retries = retries
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class Fetcher:
+    """Pooled, retrying, size- and time-limited GET requests"""
+
+    def __init__(self):
+        self.config = dict(DEFAULTS)
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._statuses = Counter()
+        # Deadline of the fetch running on each thread
+        self._local = threading.local()
+
+    def init_app(self, app):
+        for key, default in DEFAULTS.items():
+            self.config[key] = app.config.get(key, default)
+        self._session = None
+
+    @property
+    def session(self):
+        """The process's session, created on first use (and again after a fork)"""
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._make_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _remaining(self):
+        """Seconds until this thread's fetch deadline (the total timeout outside a fetch)"""
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return self.config['SCRAPER_TOTAL_TIMEOUT']
+        return deadline - time.monotonic()
+
+    def _make_session(self):
+        retry = DeadlineRetry(
+            total=self.config['SCRAPER_RETRIES'],
+            backoff_factor=self.config['SCRAPER_BACKOFF'],
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=('GET', 'HEAD'),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            remaining=self._remaining,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.config['SCRAPER_POOL_HOSTS'],
+            pool_maxsize=self.config['SCRAPER_POOL_PER_HOST'],
+            pool_block=True,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = DEFAULT_USER_AGENT
+        return session
+
+    def _bump(self, counter, amount=1):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def fetch(self, url, headers=None):
+        """
+        GET ``url`` and read the whole body.
+
+        Returns:
+            FetchedPage, for any status code once retries are used up
+
+        Raises:
+            FetchError: Connection failure or timeout after retries
+            ResponseTooLarge: Body over SCRAPER_MAX_BYTES
+        """
+        max_bytes = self.config['SCRAPER_MAX_BYTES']
+        started = time.monotonic()
+        deadline = started + self.config['SCRAPER_TOTAL_TIMEOUT']
+        self._bump('fetches')
+        self._local.deadline = deadline
+        try:
+            response = self.session.get(
+                url, headers=headers, stream=True,
+                timeout=(self.config['SCRAPER_CONNECT_TIMEOUT'], self.config['SCRAPER_READ_TIMEOUT']),
+            )
+        except requests.RequestException as e:
+            self._bump('errors')
+            raise FetchError(f"Failed to fetch {url}: {e}") from e
+        finally:
+            self._local.deadline = None
+
+        with response:
+            retries = len(response.raw.retries.history) if response.raw.retries else 0
+            self._bump('retries', retries)
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and int(length) > max_bytes:
+                self._bump('too_large')
+                raise ResponseTooLarge(f"{url} is {length} bytes, limit is {max_bytes}")
+
+            chunks, size = [], 0
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        self._bump('too_large')
+                        raise ResponseTooLarge(f"{url} is over the {max_bytes} byte limit")
+                    if time.monotonic() > deadline:
+                        self._bump('errors')
+                        raise FetchError(f"{url} took longer than {self.config['SCRAPER_TOTAL_TIMEOUT']}s")
+                    chunks.append(chunk)
+            except requests.RequestException as e:
+                self._bump('errors')
+                raise FetchError(f"Failed to read {url}: {e}") from e
+
+        content = b''.join(chunks)
+        elapsed = time.monotonic() - started
+        charset = 'charset=' in response.headers.get('Content-Type', '').lower()
+        with self._lock:
+            self._stats['bytes'] += size
+            self._stats['seconds'] += elapsed
+            self._statuses[response.status_code] += 1
+        logger.info(f"Fetched {url}: {response.status_code}, {size} bytes in {elapsed * 1000:.0f} ms ({retries} retries)")
+        return FetchedPage(
+            response.url, response.status_code, response.headers, content,
+            response.encoding if charset else None, elapsed, retries,
+        )
+
+    def pool_stats(self):
+        """Connections opened and requests sent per host in this process's pool"""
+        if self._session is None:
+            return {}
+        hosts = {}
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                    'connections_opened': pool.num_connections,
+                    'requests': pool.num_requests,
+                }
+        return hosts
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, statuses={str(code): n for code, n in self._statuses.items()})
+        stats['seconds'] = round(stats.get('seconds', 0.0), 3)
+        stats['pool'] = self.pool_stats()
+        return stats
+
+
+# Shared fetcher, configured per app with fetcher.init_app(app)
+fetcher = Fetcher()
@@ -0,0 +1,187 @@
+"""
+Location search index for job postings.
+
+Two indexes serve the ``location`` filter:
+
+* ``job_location_tokens``: structured tokens from locations.normalize_location
+  (``remote``, ``region:us``), one row per job and token, kept current by
+  ORM events on Job. "Remote US" becomes two token lookups.
+* A trigram index for the rest of the search text: an external-content
+  FTS5 table with the trigram tokenizer on SQLite (``jobs_location_fts``,
+  synced by triggers), or a pg_trgm GIN index on ``jobs.location`` on
+  PostgreSQL, which serves ``ILIKE '%...%'`` directly.
+
+Without a trigram index (other backends, SQLite older than 3.34) the
+substring part falls back to ILIKE.
+"""
+import logging
+
+from db import db
+from locations import TRIGRAM_MIN_LENGTH, location_tokens, parse_location_query
+from models import Job, JobLocationToken
+
+logger = logging.getLogger(__name__)
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_location_fts USING fts5(
+        location, content='jobs', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_location_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_location_fts(rowid, location) VALUES (new.id, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_location_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_location_fts(jobs_location_fts, rowid, location)
+        VALUES ('delete', old.id, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_location_fts_au AFTER UPDATE OF location ON jobs BEGIN
+        INSERT INTO jobs_location_fts(jobs_location_fts, rowid, location)
+        VALUES ('delete', old.id, old.location);
+        INSERT INTO jobs_location_fts(rowid, location) VALUES (new.id, new.location);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_location_trgm ON jobs USING GIN (location gin_trgm_ops)",
+]
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Dialect of the engine the trigram index was created on, or None
+_index_dialect = None
+
+
+def _fts5_phrase(text):
+    """Quote text as one FTS5 phrase; with trigrams this is a substring match"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def init_location_index():
+    """Create the trigram index for the current database if supported"""
+    global _index_dialect
+
+    dialect = db.engine.dialect.name
+    statements = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(dialect)
+
+    if statements is None:
+        logger.info(f"Trigram location index not supported on {dialect}, using ILIKE")
+        _index_dialect = None
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            created = dialect == 'sqlite' and not db.inspect(conn).has_table('jobs_location_fts')
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            if created:
+                # External-content table starts empty; index existing rows
+                conn.exec_driver_sql("INSERT INTO jobs_location_fts(jobs_location_fts) VALUES ('rebuild')")
+        _index_dialect = dialect
+        return True
+    except Exception as e:
+        logger.warning(f"Could not create trigram location index, using ILIKE: {e}")
+        _index_dialect = None
+        return False
+
+
+def write_location_tokens(connection, job_id, location):
+    """Replace the stored location tokens of one job"""
+    connection.execute(db.delete(JobLocationToken).where(JobLocationToken.job_id == job_id))
+    tokens = location_tokens(location)
+    if tokens:
+        connection.execute(db.insert(JobLocationToken), [
+            {'job_id': job_id, 'token': token} for token in tokens
+        ])
+
+
+def backfill_location_tokens(connection, batch_size=BACKFILL_BATCH_SIZE):
+    """Recompute tokens for every job, a batch of ids at a time"""
+    jobs = db.metadata.tables['jobs']
+    tokens = JobLocationToken.__table__
+    last_id = 0
+    written = 0
+
+    while True:
+        rows = connection.execute(
+            db.select(jobs.c.id, jobs.c.location).where(jobs.c.id > last_id).order_by(jobs.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return written
+
+        ids = [row.id for row in rows]
+        connection.execute(db.delete(tokens).where(tokens.c.job_id.in_(ids)))
+        batch = [
+            {'job_id': row.id, 'token': token}
+            for row in rows for token in location_tokens(row.location)
+        ]
+        if batch:
+            connection.execute(db.insert(tokens), batch)
+        written += len(batch)
+        last_id = ids[-1]
+
+
+def rebuild_location_index():
+    """Recompute all location tokens and rebuild the trigram index"""
+    with db.engine.begin() as conn:
+        written = backfill_location_tokens(conn)
+
+    if _index_dialect is None:
+        init_location_index()
+    if _index_dialect is not None:
+        with db.engine.begin() as conn:
+            if _index_dialect == 'sqlite':
+                conn.exec_driver_sql("INSERT INTO jobs_location_fts(jobs_location_fts) VALUES ('rebuild')")
+            else:
+                conn.exec_driver_sql("REINDEX INDEX ix_jobs_location_trgm")
+    return written
+
+
+def filter_location(job_query, location):
+    """
+    Restrict a Job query to postings matching a location search.
+
+    Region and remote keywords become token lookups; any other text is a
+    case-insensitive substring match served by the trigram index.
+    """
+    tokens, remainder = parse_location_query(location)
+
+    for token in tokens:
+        job_query = job_query.filter(Job.id.in_(
+            db.select(JobLocationToken.job_id).where(JobLocationToken.token == token)
+        ))
+
+    if not remainder:
+        return job_query
+
+    if _index_dialect == 'sqlite' and len(remainder) >= TRIGRAM_MIN_LENGTH:
+        matches = db.select(db.literal_column('rowid')).select_from(db.table('jobs_location_fts')).where(
+            db.text('jobs_location_fts MATCH :location_query').bindparams(location_query=_fts5_phrase(remainder))
+        )
+        return job_query.filter(Job.id.in_(matches))
+
+    # On Postgres the pg_trgm index serves this for 3+ characters
+    return job_query.filter(Job.location.ilike(f'%{remainder}%'))
+
+
+@db.event.listens_for(Job, 'after_insert')
+def _job_inserted(mapper, connection, target):
+    write_location_tokens(connection, target.id, target.location)
+
+
+@db.event.listens_for(Job, 'after_update')
+def _job_updated(mapper, connection, target):
+    if db.inspect(target).attrs.location.history.has_changes():
+        write_location_tokens(connection, target.id, target.location)
+
+
+@db.event.listens_for(Job, 'before_delete')
+def _job_deleted(mapper, connection, target):
+    connection.execute(db.delete(JobLocationToken).where(JobLocationToken.job_id == target.id))
@@ -0,0 +1,158 @@
+"""
+Location normaliser and in-memory location index.
+
+``normalize_location`` turns free-text job locations such as
+"Remote (US Only)" into a cleaned display string plus structured tokens
+(``remote``, ``region:us``). The tokens are stored per job (see
+location_search.py) so a search for "US" or "remote Europe" is an index
+lookup instead of a substring scan that would also match "Australia".
+Anything in a search that is not a known region or remote keyword is
+matched as a substring through a trigram index.
+
+This module has no database dependency so the sqlite3 and in-memory apps
+can use it too.
+"""
+import re
+from collections import defaultdict
+
+REMOTE_TOKEN = 'remote'
+
+# Phrases that mean the job can be done remotely
+REMOTE_PHRASES = ('remote', 'work from home', 'wfh', 'telecommute', 'telework', 'distributed', 'anywhere')
+
+# Region aliases -> region code; longest phrases are matched first
+REGION_ALIASES = {
+    'us': 'us', 'usa': 'us', 'united states': 'us', 'united states of america': 'us',
+    'uk': 'uk', 'united kingdom': 'uk', 'great britain': 'uk', 'england': 'uk',
+    'eu': 'eu', 'europe': 'eu', 'european union': 'eu',
+    'emea': 'emea',
+    'canada': 'ca',
+    'north america': 'na',
+    'latam': 'latam', 'latin america': 'latam', 'south america': 'latam',
+    'apac': 'apac', 'asia': 'apac', 'asia pacific': 'apac',
+    'australia': 'au',
+    'india': 'in',
+    'germany': 'de',
+    'worldwide': 'worldwide', 'global': 'worldwide', 'international': 'worldwide',
+    'anywhere': 'worldwide',
+}
+
+# Minimum substring length the trigram indexes can serve
+TRIGRAM_MIN_LENGTH = 3
+
+# Phrase -> tokens; a phrase in both lists ("anywhere") gives both tokens
+_PHRASE_TOKENS = defaultdict(set)
+for _phrase, _code in REGION_ALIASES.items():
+    _PHRASE_TOKENS[_phrase].add(f'region:{_code}')
+for _phrase in REMOTE_PHRASES:
+    _PHRASE_TOKENS[_phrase].add(REMOTE_TOKEN)
+_PHRASE_TOKENS = {phrase: tuple(sorted(tokens)) for phrase, tokens in _PHRASE_TOKENS.items()}
+del _phrase, _code
+
+# Longest phrases first, so "united states of america" wins over "united states"
+_PHRASE_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(phrase) for phrase in sorted(_PHRASE_TOKENS, key=len, reverse=True)) + r')\b'
+)
+
+
+def _phrase_tokens(folded):
+    """Structured tokens of every known phrase in folded text"""
+    return {token for match in _PHRASE_RE.findall(folded) for token in _PHRASE_TOKENS[match]}
+
+
+def _fold(text):
+    """Lowercase, drop dots in abbreviations (U.S.A.), collapse punctuation"""
+    text = (text or '').lower().replace('.', '')
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
+
+def clean_location(text):
+    """Display form of a location: trimmed with whitespace collapsed"""
+    return ' '.join((text or '').split()).strip(' ,;-')
+
+
+def normalize_location(text):
+    """
+    Normalise a job location.
+
+    Returns:
+        Dictionary with the cleaned ``location``, its lowercased ``search``
+        text for substring matching, and sorted structured ``tokens``
+    """
+    location = clean_location(text)
+    folded = _fold(location)
+    tokens = _phrase_tokens(folded)
+    return {'location': location, 'search': location.lower(), 'tokens': sorted(tokens)}
+
+
+def location_tokens(text):
+    """Structured tokens for a location, e.g. ['region:us', 'remote']"""
+    return normalize_location(text)['tokens']
+
+
+def parse_location_query(text):
+    """
+    Split a location search into structured tokens and leftover text.
+
+    "Remote US" -> (['region:us', 'remote'], ''); "London" -> ([], 'london').
+    Leftover text is matched as a substring of the location.
+    """
+    folded = _fold(text)
+    tokens = sorted(_phrase_tokens(folded))
+    remainder = ' '.join(_PHRASE_RE.sub(' ', folded).split())
+    if not tokens:
+        # Nothing structured: keep the user's punctuation for the substring match
+        remainder = ' '.join((text or '').lower().split())
+    return tokens, remainder
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class LocationIndex:
+    """In-memory token and trigram index over job locations"""
+
+    def __init__(self):
+        self._locations = {}
+        self._tokens = defaultdict(set)
+        self._trigrams = defaultdict(set)
+
+    def add(self, job_id, location):
+        self.remove(job_id)
+        normalized = normalize_location(location)
+        self._locations[job_id] = normalized
+        for token in normalized['tokens']:
+            self._tokens[token].add(job_id)
+        for trigram in _trigrams(normalized['search']):
+            self._trigrams[trigram].add(job_id)
+
+    def remove(self, job_id):
+        normalized = self._locations.pop(job_id, None)
+        if normalized is None:
+            return
+        for token in normalized['tokens']:
+            self._tokens[token].discard(job_id)
+        for trigram in _trigrams(normalized['search']):
+            self._trigrams[trigram].discard(job_id)
+
+    def search(self, query):
+        """Ids of jobs whose location matches a location search"""
+        tokens, remainder = parse_location_query(query)
+
+        candidates = None
+        for token in tokens:
+            matches = self._tokens.get(token, set())
+            candidates = set(matches) if candidates is None else candidates & matches
+
+        if remainder:
+            if len(remainder) >= TRIGRAM_MIN_LENGTH:
+                for trigram in _trigrams(remainder):
+                    matches = self._trigrams.get(trigram, set())
+                    candidates = set(matches) if candidates is None else candidates & matches
+            if candidates is None:
+                candidates = set(self._locations)
+            # Trigrams narrow the candidates; confirm the exact substring
+            candidates = {job_id for job_id in candidates if remainder in self._locations[job_id]['search']}
+
+        return candidates if candidates is not None else set(self._locations)
@@ -1,5 +1,5 @@
 import os
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, make_response
 from dotenv import load_dotenv
 import datetime
 import json
@@ -26,18 +26,74 @@ app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
 
 # Configure database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"]pip install flask werkzeug python-dotenv = {
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
+    "pool_timeout": 10,
 }
+
+# Fail slow queries fast and serve the last good data during outages (see db_guard.py)
+app.config["DB_STATEMENT_TIMEOUT"] = float(os.environ.get("DB_STATEMENT_TIMEOUT", 5))
+app.config["DB_BREAKER_THRESHOLD"] = int(os.environ.get("DB_BREAKER_THRESHOLD", 5))
+app.config["DB_BREAKER_RESET"] = float(os.environ.get("DB_BREAKER_RESET", 30))
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Compiled templates shared by workers, warmed before each worker serves (see template_cache.py)
+app.config["TEMPLATE_CACHE_DIR"] = os.environ.get("TEMPLATE_CACHE_DIR")
+app.config["TEMPLATE_WARMUP"] = os.environ.get("TEMPLATE_WARMUP", "1") == "1"
+
+# Background queue for scraping requests (see task_queue.py); TASK_QUEUE_WORKERS=0
+# leaves the tasks to a separate `flask task-worker` process
+app.config["TASK_QUEUE_PATH"] = os.environ.get("TASK_QUEUE_PATH")
+app.config["TASK_QUEUE_WORKERS"] = int(os.environ.get("TASK_QUEUE_WORKERS", "2"))
+
 # Initialize database
 from db import db, init_app
 
 # Initialize app with database and login manager
 init_app(app)
 
+# Compress HTML/JSON responses (gzip, plus br/zstd when installed)
+import compression
+compression.init_app(app)
+
+# Register maintenance CLI commands (flask rebuild-search-index, ...)
+from commands import register_commands
+register_commands(app)
+
+# Keyset pagination for listing pages
+from pagination import Page, get_page_args, keyset_paginate, page_url
+
+# Location search (token and trigram indexes) and normaliser
+from locations import clean_location
+from location_search import filter_location
+
+# Keyword search over the full-text index (ILIKE where unavailable)
+from search import search_jobs
+
+# Filter counts for the jobs sidebar
+from facets import apply_facets, facet_counts, selected_facets
+
+# Write-behind view counters (configured by init_app above)
+from view_counter import view_counter
+
+# Rendered-page cache (configured by init_app above)
+from fragment_cache import fragment_cache
+from http_fetch import fetcher
+
+# Concurrent scraping of URL lists for the admin bulk scrape
+from bulk_scrape import bulk_scraper, request_urls
+
+# Background queue for page fetches requested by visitors
+from task_queue import TaskConflict, accepted, result_response, status_response, task_queue
+from response_cache import normalised_args, response_cache
+
+# Statement timeouts, circuit breaker and last-good data (configured by init_app above)
+from db_guard import DatabaseUnavailable, db_guard
+
+# ETag / Last-Modified validators and 304 responses
+from conditional import conditional, export_validators, job_validators, listing_validators
+
 # Admin credentials - change in production
 ADMIN_USER = "admin"
 ADMIN_PASSWORD = generate_password_hash("remotework_admin2025")
@@ -48,8 +104,17 @@ with app.app_context():
         # Import models here to ensure they're registered before creating tables
         from models import UserAccount, Job, BlogPost, WebsiteContent, SiteVisit, JobApplication, NewsletterSubscriber
         
-        # Create all tables
-        db.create_all()
+        # Create tables and apply pending schema migrations
+        from migrations import upgrade_database
+        upgrade_database()
+        
+        # Create the full-text search index (FTS5 / tsvector) if supported
+        from search import init_search_index
+        init_search_index()
+        
+        # Create the trigram location index (FTS5 trigram / pg_trgm) if supported
+        from location_search import init_location_index
+        init_location_index()
         
         # Check if admin user exists, create if not
         admin = UserAccount.query.filter_by(username=ADMIN_USER).first()
@@ -69,15 +134,8 @@ with app.app_context():
     except Exception as e:
         app.logger.error(f"Error creating database tables: {e}")
 
-# Job categories and subcategories
-JOB_CATEGORIES = {
-    "technology": ["Software Development", "IT & Networking", "Data Science", "DevOps", "Cybersecurity", "Product Management"],
-    "creative": ["Design", "Writing", "Marketing", "Video Production", "Animation", "Social Media"],
-    "professional": ["Accounting", "Legal", "HR", "Customer Service", "Sales", "Consulting"],
-    "healthcare": ["Telemedicine", "Medical Coding", "Health Coaching", "Mental Health", "Medical Writing"],
-    "education": ["Online Teaching", "Curriculum Development", "Educational Consulting", "Tutoring", "Course Creation"],
-    "skilled-trades": ["Remote Technician", "Project Management", "Quality Assurance", "Virtual Installation Support"]
-}
+# Job categories and subcategories (taxonomy shared with the keyword classifier)
+from classifier import JOB_CATEGORIES
 
 # Sample data for jobs - replace with database in production
 JOBS = [
@@ -163,128 +221,184 @@ JOBS = [
     }
 ]
 
+# Listing cards show the stored snippet rather than the full description;
+# parsed salary fields back the min_salary filter
+from models import make_snippet
+from salaries import parse_salary
+for sample_job in JOBS:
+    sample_job["snippet"] = make_snippet(sample_job["description"])
+    sample_job.update(parse_salary(sample_job["salary"]))
+
 def format_date(date):
     """Format date for display"""
     if isinstance(date, datetime.datetime):
         return date.strftime("%B %d, %Y")
     return date
 
+def job_card(job):
+    """Listing fields of a job as plain data, safe to keep between requests"""
+    return dict(job.to_dict(full=False), posted_date=job.posted_date)
+
+def render_page(template, stale=False, **context):
+    """Render a page; stale pages get a notice and stay out of the response cache"""
+    response = make_response(render_template(template, stale=stale, **context))
+    if stale:
+        response_cache.skip()
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
+
+def render_unavailable(template, **context):
+    """503 page for a database outage with no last good data to show"""
+    response = make_response(render_template(template, stale=True, unavailable=True, **context), 503)
+    response.headers['Retry-After'] = str(int(db_guard.breaker.retry_in()) or 30)
+    return response
+
 @app.route('/')
+@response_cache.cached('jobs')
 def index():
     """Homepage with featured jobs"""
+    def load_featured_jobs():
+        jobs = Job.query.filter_by(is_active=True).order_by(Job.posted_date.desc()).limit(3).all()
+        return [job_card(job) for job in jobs]
+    
     try:
-        # Get featured jobs from database
-        featured_jobs = Job.query.filter_by(is_active=True).order_by(Job.posted_date.desc()).limit(3).all()
-        
-        # Convert SQLAlchemy models to dictionaries
-        featured_jobs = [job.to_dict() for job in featured_jobs]
+        # Get featured jobs from database (the last good list if it is down)
+        featured_jobs, stale = db_guard.load('index', load_featured_jobs)
+    except DatabaseUnavailable:
+        return render_unavailable('index.html', jobs=[])
+    
+    # Use sample data if no jobs exist yet
+    if not featured_jobs and JOBS:
+        featured_jobs = JOBS[:3]
         
-        # Use sample data if no jobs exist yet
-        if not featured_jobs and JOBS:
-            featured_jobs = JOBS[:3]
-            
-        return render_template('index.html', jobs=featured_jobs)
-    except Exception as e:
-        app.logger.error(f"Error in index route: {e}")
-        # Fallback to sample data in case of error
-        return render_template('index.html', jobs=JOBS[:3])
+    return render_page('index.html', stale=stale, jobs=featured_jobs)
 
 @app.route('/jobs')
+@conditional(listing_validators)
+@response_cache.cached('jobs')
 def jobs():
     """Job listings page with filters"""
-    try:
-        # Get filter parameters
-        category = request.args.get('category', '')
-        subcategory = request.args.get('subcategory', '')
-        job_type = request.args.get('job_type', '')
-        location = request.args.get('location', '')
-        
-        # Start with base query
-        query = Job.query.filter_by(is_active=True)
+    # Get filter parameters
+    category = request.args.get('category', '')
+    subcategory = request.args.get('subcategory', '')
+    job_type = request.args.get('job_type', '')
+    location = request.args.get('location', '')
+    min_salary = request.args.get('min_salary', type=int)
+    search_query = request.args.get('q', '')
+    sort = request.args.get('sort', '')
+    selected = selected_facets(request.args)
+    cursor, per_page = get_page_args()
+    
+    def load_listing():
+        # Counts for every category/subcategory/job type, from one grouped query
+        facets = facet_counts(filtered_jobs_query(location, min_salary, search_query),
+                              {'q': search_query, 'location': location, 'min_salary': min_salary}, selected)
         
-        # Apply filters
+        # Apply category/subcategory/job type filters, one page at a time
+        ranked = bool(search_query) and sort == 'relevance'
+        query = apply_facets(filtered_jobs_query(location, min_salary, search_query, ranked=ranked), selected)
+        if ranked:
+            # Relevance order has no stable keyset, so only the best page is shown
+            page = Page(query.order_by(Job.posted_date.desc()).limit(per_page).all())
+        else:
+            # Most recent first
+            page = keyset_paginate(query, Job.posted_date, Job.id, cursor, per_page)
+        return {
+            'jobs': [job_card(job) for job in page.items],
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'facets': facets
+        }
+    
+    filters = dict(category=category, subcategory=subcategory, job_type=job_type, location=location,
+                   min_salary=min_salary, query=search_query, sort=sort, job_categories=JOB_CATEGORIES)
+    try:
+        listing, stale = db_guard.load('jobs:' + json.dumps(normalised_args()), load_listing)
+    except DatabaseUnavailable:
+        return render_unavailable('jobs.html', jobs=[], page=Page([]), facets=None, **filters)
+    
+    page = Page(listing['jobs'], listing['next_cursor'], listing['prev_cursor'])
+    filtered_jobs = page.items
+    facets = listing['facets']
+    
+    # Use sample data if no jobs exist yet
+    if not filtered_jobs and JOBS and not cursor:
+        filtered_jobs = JOBS
+        facets = None
         if category:
-            query = query.filter(Job.category == category)
-        
+            filtered_jobs = [job for job in filtered_jobs if job.get('category') == category]
         if subcategory:
-            query = query.filter(Job.subcategory == subcategory)
-        
+            filtered_jobs = [job for job in filtered_jobs if job.get('subcategory') == subcategory]
         if job_type:
-            query = query.filter(Job.job_type == job_type)
-        
+            filtered_jobs = [job for job in filtered_jobs if job.get('job_type') == job_type]
         if location:
-            query = query.filter(Job.location.ilike(f'%{location}%'))
-        
-        # Order by most recent
-        filtered_jobs = query.order_by(Job.posted_date.desc()).all()
-        
-        # Convert SQLAlchemy models to dictionaries
-        filtered_jobs = [job.to_dict() for job in filtered_jobs]
-        
-        # Use sample data if no jobs exist yet
-        if not filtered_jobs and JOBS:
-            filtered_jobs = JOBS
-            if category:
-                filtered_jobs = [job for job in filtered_jobs if job.get('category') == category]
-            if subcategory:
-                filtered_jobs = [job for job in filtered_jobs if job.get('subcategory') == subcategory]
-            if job_type:
-                filtered_jobs = [job for job in filtered_jobs if job.get('job_type') == job_type]
-            if location:
-                filtered_jobs = [job for job in filtered_jobs 
-                               if location.lower() in job.get('location', '').lower()]
-        
-        return render_template('jobs.html', 
-                            jobs=filtered_jobs, 
-                            category=category,
-                            subcategory=subcategory,
-                            job_type=job_type,
-                            location=location,
-                            job_categories=JOB_CATEGORIES)
-    except Exception as e:
-        app.logger.error(f"Error in jobs route: {e}")
-        # Fallback to sample data in case of error
-        return render_template('jobs.html', 
-                            jobs=JOBS, 
-                            category=category,
-                            subcategory=subcategory,
-                            job_type=job_type,
-                            location=location,
-                            job_categories=JOB_CATEGORIES)
+            filtered_jobs = [job for job in filtered_jobs 
+                           if location.lower() in job.get('location', '').lower()]
+        if min_salary:
+            filtered_jobs = [job for job in filtered_jobs
+                           if (job.get('salary_annual') or 0) >= min_salary]
+        if search_query:
+            filtered_jobs = [job for job in filtered_jobs
+                           if search_query.lower() in f"{job.get('title', '')} {job.get('company', '')} {job.get('description', '')}".lower()]
+    
+    return render_page('jobs.html', stale=stale, jobs=filtered_jobs, page=page, facets=facets, **filters)
+
+def filtered_jobs_query(location, min_salary=None, search_query='', ranked=False):
+    """Active jobs matching the keyword search, location and pay floor filters, before facet filters"""
+    query = Job.query.filter_by(is_active=True)
+    if search_query:
+        # Full-text index where available, ranked by relevance on request
+        query = search_jobs(query, search_query, ranked=ranked)
+    if location:
+        query = filter_location(query, location)
+    if min_salary:
+        # Range scan on ix_jobs_active_salary_annual
+        query = query.filter(Job.salary_annual >= min_salary)
+    return query
+
+@app.route('/api/jobs/facets')
+@conditional(listing_validators)
+def api_job_facets():
+    """Facet counts for the current job filters as JSON"""
+    location = request.args.get('location', '')
+    min_salary = request.args.get('min_salary', type=int)
+    search_query = request.args.get('q', '')
+    return jsonify(facet_counts(filtered_jobs_query(location, min_salary, search_query),
+                                {'q': search_query, 'location': location, 'min_salary': min_salary},
+                                selected_facets(request.args)))
+
+def count_job_view(job_id):
+    """View count for a job page served from the response cache"""
+    view_counter.increment('jobs', job_id)
 
 @app.route('/jobs/<int:job_id>')
+@conditional(job_validators, on_not_modified=count_job_view)
+@response_cache.cached('jobs', on_hit=count_job_view)
 def job_detail(job_id):
     """Job detail page"""
+    def load_job():
+        # With the full description and requirements, as a dictionary
+        job = Job.query.options(db.undefer_group('full_text')).get(job_id)
+        return job.to_dict() if job else None
+    
     try:
-        # Get job from database
-        job = Job.query.get(job_id)
-        
-        if not job:
-            # Try to find job in sample data if not in database
-            sample_job = next((j for j in JOBS if j['id'] == job_id), None)
-            if sample_job:
-                return render_template('job_detail.html', job=sample_job)
-            
-            flash('Job not found', 'error')
-            return redirect(url_for('jobs'))
-        
-        # Increment view count
-        job.views += 1
-        db.session.commit()
-        
-        # Convert SQLAlchemy model to dictionary
-        job_data = job.to_dict()
-        
-        return render_template('job_detail.html', job=job_data)
-    except Exception as e:
-        app.logger.error(f"Error in job_detail route: {e}")
-        # Try to find job in sample data
+        job_data, stale = db_guard.load(f'job:{job_id}', load_job)
+    except DatabaseUnavailable:
+        return render_unavailable('jobs.html', jobs=[], page=Page([]), facets=None, job_categories=JOB_CATEGORIES)
+    
+    if not job_data:
+        # Try to find job in sample data if not in database
         sample_job = next((j for j in JOBS if j['id'] == job_id), None)
         if sample_job:
             return render_template('job_detail.html', job=sample_job)
         
-        flash('Error loading job details', 'error')
+        flash('Job not found', 'error')
         return redirect(url_for('jobs'))
+    
+    # Count the view (buffered, written in the background)
+    view_counter.increment('jobs', job_id)
+    
+    return render_page('job_detail.html', stale=stale, job=job_data)
 
 @app.route('/post-job', methods=['GET', 'POST'])
 def post_job():
@@ -295,7 +409,7 @@ def post_job():
             new_job = Job(
                 title=request.form.get('title'),
                 company=request.form.get('company'),
-                location=request.form.get('location'),
+                location=clean_location(request.form.get('location')),
                 job_type=request.form.get('job_type'),
                 category=request.form.get('category'),
                 subcategory=request.form.get('subcategory'),
@@ -322,7 +436,7 @@ def post_job():
 
 @app.route('/extract-job', methods=['POST'])
 def extract_job():
-    """Extract job details from URL (API endpoint)"""
+    """Queue extraction of job details from a URL (API endpoint); 202 with the task to poll"""
     data = request.get_json() if request.is_json else None
     
     # Get URL from JSON body or fallback to form data
@@ -332,21 +446,28 @@ def extract_job():
         return jsonify({"success": False, "error": "URL is required"}), 400
     
     # Import web scraping function
-    from web_scraper import extract_job_details, is_valid_url
+    from web_scraper import is_valid_url
     
     if not is_valid_url(url):
         return jsonify({"success": False, "error": "Invalid URL format"}), 400
     
+    # Fetched and parsed by a task worker; GET /tasks/<id>/result returns what
+    # extract_job_details returned
     try:
-        # Extract job details from the URL
-        result = extract_job_details(url)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({
-            "success": False, 
-            "error": f"Error extracting job details: {str(e)}",
-            "job": {}
-        }), 500
+        task = task_queue.enqueue('extract_job', {'url': url}, key=request.headers.get('Idempotency-Key'))
+    except TaskConflict as e:
+        return jsonify({"success": False, "error": str(e)}), 422
+    return accepted(task)
+
+@app.route('/tasks/<task_id>')
+def task_status(task_id):
+    """Status of a queued scrape or extraction"""
+    return status_response(task_id, admin=bool(session.get('admin_logged_in')))
+
+@app.route('/tasks/<task_id>/result')
+def task_result(task_id):
+    """Result of a queued scrape or extraction (202 until it is done)"""
+    return result_response(task_id, admin=bool(session.get('admin_logged_in')))
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -408,31 +529,22 @@ def admin_dashboard():
         flash('Please log in first', 'error')
         return redirect(url_for('admin_login'))
     
-    try:
-        # Get stats from database
-        job_count = Job.query.count()
-        active_job_count = Job.query.filter_by(is_active=True).count()
-        total_views = db.session.query(db.func.sum(Job.views)).scalar() or 0
-        user_count = UserAccount.query.count()
-        
-        stats = {
-            'total_jobs': job_count,
-            'active_jobs': active_job_count,
-            'total_views': total_views,
-            'total_users': user_count
+    def load_stats():
+        return {
+            'total_jobs': Job.query.count(),
+            'active_jobs': Job.query.filter_by(is_active=True).count(),
+            'total_views': db.session.query(db.func.sum(Job.views)).scalar() or 0,
+            'total_users': UserAccount.query.count()
         }
-        
-        # If no data in database, use sample data
-        if job_count == 0 and JOBS:
-            stats = {
-                'total_jobs': len(JOBS),
-                'active_jobs': sum(1 for job in JOBS if job['is_active']),
-                'total_views': sum(job['views'] for job in JOBS),
-                'total_users': 1  # Admin only
-            }
-    except Exception as e:
-        app.logger.error(f"Dashboard stats error: {e}")
-        # Fallback to sample data
+    
+    try:
+        # Get stats from database (the last good figures if it is down)
+        stats, stale = db_guard.load('admin:dashboard', load_stats)
+    except DatabaseUnavailable:
+        stats, stale = dict.fromkeys(('total_jobs', 'active_jobs', 'total_views', 'total_users')), True
+    
+    # If no data in database, use sample data
+    if stats['total_jobs'] == 0 and JOBS:
         stats = {
             'total_jobs': len(JOBS),
             'active_jobs': sum(1 for job in JOBS if job['is_active']),
@@ -440,7 +552,23 @@ def admin_dashboard():
             'total_users': 1  # Admin only
         }
     
-    return render_template('admin/dashboard.html', stats=stats, username=session.get('admin_username', 'Admin'))
+    return render_template('admin/dashboard.html', stats=stats, stale=stale,
+                           username=session.get('admin_username', 'Admin'))
+
+@app.route('/admin/cache/stats')
+def admin_cache_stats():
+    """Response and fragment cache counters and hit ratios for this worker"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(dict(response_cache.stats(), fragments=fragment_cache.stats()))
+
+@app.route('/admin/fetch/stats')
+def admin_fetch_stats():
+    """Scraper HTTP counters, connection reuse per host, extraction stage timings and task queue"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    from scraper import stage_stats
+    return jsonify(dict(fetcher.stats(), extraction=stage_stats(), tasks=task_queue.stats()))
 
 @app.route('/admin/jobs')
 def admin_jobs():
@@ -449,22 +577,22 @@ def admin_jobs():
         flash('Please log in first', 'error')
         return redirect(url_for('admin_login'))
     
+    page = None
     try:
-        # Get jobs from database
-        jobs_list = Job.query.order_by(Job.posted_date.desc()).all()
-        
-        # Convert to list of dictionaries
-        jobs_data = [job.to_dict() for job in jobs_list]
+        # Get one page of jobs from database
+        cursor, per_page = get_page_args()
+        page = keyset_paginate(Job.query, Job.posted_date, Job.id, cursor, per_page)
+        jobs_data = page.items
         
         # Use sample data if no jobs in database
-        if not jobs_data and JOBS:
+        if not jobs_data and JOBS and not cursor:
             jobs_data = JOBS
     except Exception as e:
         app.logger.error(f"Admin jobs list error: {e}")
         # Fallback to sample data
         jobs_data = JOBS
     
-    return render_template('admin/jobs.html', jobs=jobs_data)
+    return render_template('admin/jobs.html', jobs=jobs_data, page=page)
 
 @app.route('/admin/jobs/delete/<int:job_id>')
 def admin_delete_job(job_id):
@@ -510,7 +638,12 @@ def admin_delete_job(job_id):
     
     return redirect(url_for('admin_jobs'))
 
+def admin_export_validators():
+    """Export validators, only for logged-in admins"""
+    return export_validators() if session.get('admin_logged_in') else None
+
 @app.route('/admin/jobs/export')
+@conditional(admin_export_validators)
 def admin_export_jobs():
     """Export jobs as JSON"""
     if not session.get('admin_logged_in'):
@@ -519,7 +652,7 @@ def admin_export_jobs():
     
     try:
         # Get jobs from database
-        jobs_list = Job.query.order_by(Job.posted_date.desc()).all()
+        jobs_list = Job.query.options(db.undefer_group('full_text')).order_by(Job.posted_date.desc()).all()
         
         # Convert to list of dictionaries
         export_jobs = [job.to_dict() for job in jobs_list]
@@ -605,18 +738,54 @@ def admin_scrape_job():
     
     return render_template('admin/scrape_job.html')
 
-@app.route('/text-extractor')
+@app.route('/admin/scrape-jobs/bulk', methods=['POST'])
+def admin_bulk_scrape():
+    """Queue a bulk scrape of a pasted or uploaded list of job URLs; 202 with the task to poll"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    urls = request_urls(request.form, request.files)
+    if not urls:
+        return jsonify({'error': 'Paste or upload at least one URL'}), 400
+    if len(urls) > bulk_scraper.max_urls:
+        return jsonify({'error': f'At most {bulk_scraper.max_urls} URLs per run, got {len(urls)}'}), 400
+    
+    save_to_db = request.form.get('save_to_db', 'yes') == 'yes'
+    # Run by a task worker, saving in batches; the page polls the task's progress
+    task = task_queue.enqueue('bulk_scrape', {'urls': urls, 'save': save_to_db})
+    return accepted(task)
+
+@app.route('/text-extractor', methods=['GET', 'POST'])
 def text_extractor():
-    """Page for extracting text from websites"""
-    return render_template('text_extractor.html')
+    """Page for extracting text from websites; pages are fetched by a task worker"""
+    if request.method == 'POST':
+        url = request.form.get('url')
+        if not url:
+            return render_template('text_extractor.html')
+        # 202 page that polls the task, then reloads as ?task=<id>
+        task = task_queue.enqueue('website_text', {'url': url})
+        return render_template('text_extractor.html', task=task, url=url), 202
+    
+    task_id = request.args.get('task')
+    task = task_queue.get(task_id, with_result=True) if task_id else None
+    if task is None:
+        return render_template('text_extractor.html')
+    url = task['payload'].get('url')
+    if task['status'] == 'done':
+        return render_template('text_extractor.html', extracted_text=task['result'], url=url)
+    if task['status'] == 'failed':
+        return render_template('text_extractor.html', extracted_text=task.get('result') or f"Error extracting content: {task['error']}", url=url)
+    return render_template('text_extractor.html', task=task, url=url), 202
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "ok"})
+    database = db_guard.stats()
+    return jsonify({"status": "ok" if database['breaker']['state'] == 'closed' else "degraded",
+                    "database": database})
 
 # Add jinja2 template filters
-app.jinja_env.globals.update(format_date=format_date)
+app.jinja_env.globals.update(format_date=format_date, page_url=page_url)
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Versioned schema migrations.
+
+Each migration has an integer version and runs once per database; applied
+versions are recorded in ``schema_migrations``. Migrations are idempotent
+(``checkfirst`` / column existence checks) so they are safe on databases
+created by ``db.create_all()`` before migrations existed, and on fresh
+databases where the baseline already created everything from the models.
+
+Run with ``flask db-upgrade``; ``flask db-status`` lists applied versions.
+The app also upgrades on startup (main.py).
+"""
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from db import db
+from models import SNIPPET_LENGTH, SchemaMigration
+from salaries import parse_salary
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+# (version, description, function(connection)), registered by @migration
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a function as schema migration ``version``"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+# ==== Helpers ====
+
+def create_indexes(conn, table_name, index_names):
+    """Create named indexes declared on a model's table if they are missing"""
+    table = db.metadata.tables[table_name]
+    indexes = {index.name: index for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def add_column(conn, table_name, column_name):
+    """Add a column declared on a model to an existing table if missing"""
+    existing = {column['name'] for column in db.inspect(conn).get_columns(table_name)}
+    if column_name in existing:
+        return False
+
+    column = db.metadata.tables[table_name].c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}')
+    return True
+
+
+def backfill_salaries(conn, batch_size=BACKFILL_BATCH_SIZE, only_missing=True):
+    """
+    Parse jobs.salary into the salary_* columns, a batch of ids at a time.
+
+    Args:
+        only_missing: Skip rows that already have a parsed period
+
+    Returns:
+        Number of rows updated
+    """
+    jobs = db.metadata.tables['jobs']
+    # Columns to set come from the keys of each parameter dict
+    statement = db.update(jobs).where(jobs.c.id == db.bindparam('job_id'))
+    last_id = 0
+    updated = 0
+
+    while True:
+        select = db.select(jobs.c.id, jobs.c.salary).where(
+            jobs.c.id > last_id, jobs.c.salary.isnot(None), jobs.c.salary != ''
+        )
+        if only_missing:
+            select = select.where(jobs.c.salary_period.is_(None))
+        rows = conn.execute(select.order_by(jobs.c.id).limit(batch_size)).all()
+        if not rows:
+            return updated
+
+        batch = [dict(parse_salary(row.salary), job_id=row.id) for row in rows]
+        conn.execute(statement, batch)
+        updated += len(batch)
+        last_id = rows[-1].id
+
+
+# ==== Migrations ====
+
+@migration(1, 'Baseline schema')
+def _baseline(conn):
+    db.metadata.create_all(conn, checkfirst=True)
+
+
+@migration(2, 'Listing indexes for jobs, blog posts, users and site visits')
+def _listing_indexes(conn):
+    create_indexes(conn, 'jobs', [
+        'ix_jobs_active_posted',
+        'ix_jobs_active_category_posted',
+        'ix_jobs_active_subcategory_posted',
+        'ix_jobs_active_job_type_posted',
+        'ix_jobs_posted',
+        'ix_jobs_source_url',
+        'ix_jobs_user_id',
+    ])
+    create_indexes(conn, 'blog_posts', ['ix_blog_posts_published_created'])
+    create_indexes(conn, 'user_accounts', ['ix_user_accounts_created'])
+    create_indexes(conn, 'site_visits', ['ix_site_visits_visit_date'])
+
+
+@migration(3, 'Stored description snippet for job listing cards')
+def _job_snippets(conn):
+    add_column(conn, 'jobs', 'snippet')
+
+    # Same result as models.make_snippet, computed in the database
+    jobs = db.metadata.tables['jobs']
+    description = db.func.coalesce(jobs.c.description, '')
+    conn.execute(db.update(jobs).where(jobs.c.snippet.is_(None)).values(
+        snippet=db.case(
+            (db.func.length(description) > SNIPPET_LENGTH,
+             db.func.substr(description, 1, SNIPPET_LENGTH) + '...'),
+            else_=description
+        )
+    ))
+
+
+@migration(4, 'Location tokens for indexed location search')
+def _location_tokens(conn):
+    db.metadata.tables['job_location_tokens'].create(conn, checkfirst=True)
+
+    from location_search import backfill_location_tokens
+    backfill_location_tokens(conn)
+
+
+@migration(5, 'Parsed salary columns for range filters')
+def _salary_columns(conn):
+    for column in ('salary_min', 'salary_max', 'salary_currency', 'salary_period', 'salary_annual'):
+        add_column(conn, 'jobs', column)
+    create_indexes(conn, 'jobs', ['ix_jobs_active_salary_annual'])
+    backfill_salaries(conn)
+
+
+@migration(6, 'Content sections split out of the website_content blob')
+def _content_sections(conn):
+    sections = db.metadata.tables['content_sections']
+    sections.create(conn, checkfirst=True)
+
+    legacy = conn.execute(db.text(
+        "SELECT content FROM website_content WHERE content IS NOT NULL ORDER BY id DESC LIMIT 1"
+    )).scalar()
+    if not legacy:
+        return
+    try:
+        content = json.loads(legacy)
+    except ValueError:
+        logger.warning("website_content is not valid JSON, content sections start from defaults")
+        return
+
+    existing = set(conn.execute(db.select(sections.c.name)).scalars())
+    rows = [
+        {'name': name, 'data': json.dumps(data), 'version': 1, 'updated_at': datetime.now()}
+        for name, data in content.items() if name not in existing
+    ]
+    if rows:
+        conn.execute(db.insert(sections), rows)
+
+
+@migration(7, 'Job updated_at for ETag / Last-Modified')
+def _job_updated_at(conn):
+    add_column(conn, 'jobs', 'updated_at')
+    jobs = db.metadata.tables['jobs']
+    conn.execute(db.update(jobs).where(jobs.c.updated_at.is_(None)).values(
+        updated_at=db.func.coalesce(jobs.c.posted_date, datetime.now())
+    ))
+    create_indexes(conn, 'jobs', ['ix_jobs_updated'])
+
+
+@migration(8, 'Seed dashboard rollups from existing visits and jobs')
+def _seed_rollups(conn):
+    for table_name in ('page_visit_rollups', 'job_count_rollups', 'maintenance_state'):
+        db.metadata.tables[table_name].create(conn, checkfirst=True)
+
+    # Job events only adjust existing counts; without a seed, deleting a
+    # pre-existing job would leave a count of -1
+    from rollups import backfill_rollups
+    backfill_rollups(conn)
+
+
+@migration(9, "Recompute location tokens ('anywhere' is also region:worldwide)")
+def _anywhere_location_tokens(conn):
+    from location_search import backfill_location_tokens
+    backfill_location_tokens(conn)
+
+
+# ==== Runner ====
+
+def applied_versions():
+    """Set of migration versions recorded in schema_migrations"""
+    with db.engine.begin() as conn:
+        SchemaMigration.__table__.create(conn, checkfirst=True)
+        return set(conn.execute(db.select(SchemaMigration.version)).scalars())
+
+
+def upgrade_database():
+    """
+    Apply every pending migration in version order, each in its own
+    transaction.
+
+    Returns:
+        List of versions applied by this call
+    """
+    applied = applied_versions()
+    newly_applied = []
+
+    for version, description, func in sorted(MIGRATIONS, key=lambda item: item[0]):
+        if version in applied:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                func(conn)
+                conn.execute(db.insert(SchemaMigration).values(
+                    version=version, description=description, applied_at=datetime.now()
+                ))
+        except IntegrityError:
+            # Another worker recorded this version first
+            logger.info(f"Migration {version} was applied concurrently")
+            continue
+        logger.info(f"Applied migration {version}: {description}")
+        newly_applied.append(version)
+
+    return newly_applied
+
+
+def migration_status():
+    """(version, description, applied) for every known migration"""
+    applied = applied_versions()
+    return [
+        (version, description, version in applied)
+        for version, description, _ in sorted(MIGRATIONS, key=lambda item: item[0])
+    ]
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from db import db
+from salaries import parse_salary
 
 # ====================================================
 # User Account Model
@@ -22,6 +23,10 @@ class UserAccount(db.Model, UserMixin):
     reset_token = db.Column(db.String(100), nullable=True)
     reset_token_expiry = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_user_accounts_created', 'created_at', 'id'),
+    )
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -43,6 +48,17 @@ class UserAccount(db.Model, UserMixin):
 # ====================================================
 # Job Model
 # ====================================================
+# Length of the stored description snippet shown on listing cards
+SNIPPET_LENGTH = 200
+
+def make_snippet(description):
+    """Card preview of a description: its first SNIPPET_LENGTH characters"""
+    if not description:
+        return ''
+    if len(description) > SNIPPET_LENGTH:
+        return description[:SNIPPET_LENGTH] + '...'
+    return description
+
 class Job(db.Model):
     __tablename__ = 'jobs'
     
@@ -51,14 +67,24 @@ class Job(db.Model):
     company = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(100), nullable=False)
     salary = db.Column(db.String(100))
+    # Parsed from salary on write (salaries.parse_salary)
+    salary_min = db.Column(db.Float)
+    salary_max = db.Column(db.Float)
+    salary_currency = db.Column(db.String(3))
+    salary_period = db.Column(db.String(10))  # hour, day, week, month, year
+    salary_annual = db.Column(db.Integer)  # Annualised maximum, for range filters
     job_type = db.Column(db.String(50))  # Full-time, Part-time, Contract, etc.
     category = db.Column(db.String(50))  # technology, creative, professional, etc.
     subcategory = db.Column(db.String(100))  # Software Development, Design, Accounting, etc.
-    description = db.Column(db.Text, nullable=False)
-    requirements = db.Column(db.Text)
+    # Full text is only loaded by the detail page (undefer_group('full_text'));
+    # listings render the stored snippet instead
+    description = db.deferred(db.Column(db.Text, nullable=False), group='full_text')
+    requirements = db.deferred(db.Column(db.Text), group='full_text')
+    snippet = db.Column(db.String(SNIPPET_LENGTH + 3))  # Maintained from description
     contact_email = db.Column(db.String(100))
     application_url = db.Column(db.String(255))
     posted_date = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now)  # Set on every ORM change, for HTTP validators
     is_active = db.Column(db.Boolean, default=True)
     views = db.Column(db.Integer, default=0)
     source_url = db.Column(db.String(255))  # If scraped from another site
@@ -67,24 +93,79 @@ class Job(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'), nullable=True)
     user = db.relationship('UserAccount', backref=db.backref('jobs', lazy=True))
     
-    def to_dict(self):
-        return {
+    # Listing indexes: every public page filters on is_active and pages on
+    # (posted_date, id). Created on existing databases by migrations.py.
+    __table_args__ = (
+        db.Index('ix_jobs_active_posted', 'is_active', 'posted_date', 'id'),
+        db.Index('ix_jobs_active_category_posted', 'is_active', 'category', 'posted_date', 'id'),
+        db.Index('ix_jobs_active_subcategory_posted', 'is_active', 'subcategory', 'posted_date', 'id'),
+        db.Index('ix_jobs_active_job_type_posted', 'is_active', 'job_type', 'posted_date', 'id'),
+        db.Index('ix_jobs_posted', 'posted_date', 'id'),
+        db.Index('ix_jobs_source_url', 'source_url'),
+        db.Index('ix_jobs_user_id', 'user_id'),
+        db.Index('ix_jobs_active_salary_annual', 'is_active', 'salary_annual'),
+        db.Index('ix_jobs_updated', 'updated_at'),
+    )
+    
+    @db.validates('description')
+    def _update_snippet(self, key, description):
+        self.snippet = make_snippet(description)
+        return description
+    
+    @db.validates('salary')
+    def _update_salary_fields(self, key, salary):
+        for field, value in parse_salary(salary).items():
+            setattr(self, field, value)
+        return salary
+    
+    def to_dict(self, full=True):
+        """Serialize the job; ``full=False`` leaves out the deferred text columns"""
+        data = {
             'id': self.id,
             'title': self.title,
             'company': self.company,
             'location': self.location,
             'salary': self.salary,
+            'salary_min': self.salary_min,
+            'salary_max': self.salary_max,
+            'salary_currency': self.salary_currency,
+            'salary_period': self.salary_period,
+            'salary_annual': self.salary_annual,
             'job_type': self.job_type,
             'category': self.category,
             'subcategory': self.subcategory,
-            'description': self.description,
-            'requirements': self.requirements,
+            'snippet': self.snippet,
             'contact_email': self.contact_email,
             'application_url': self.application_url,
             'posted_date': self.posted_date.strftime('%Y-%m-%d'),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active,
             'views': self.views
         }
+        if full:
+            data['description'] = self.description
+            data['requirements'] = self.requirements
+        return data
+
+@db.event.listens_for(Job, 'before_update')
+def _touch_job(mapper, connection, target):
+    # Not a column onupdate: that would also fire for bulk Core updates in
+    # migrations that run before the column exists. View counts are written
+    # with plain SQL and deliberately leave it alone.
+    if db.object_session(target).is_modified(target, include_collections=False):
+        target.updated_at = datetime.now()
+
+# ====================================================
+# Job Location Token Model (see locations.py / location_search.py)
+# ====================================================
+class JobLocationToken(db.Model):
+    __tablename__ = 'job_location_tokens'
+    __table_args__ = (
+        db.Index('ix_job_location_tokens_token', 'token', 'job_id'),
+    )
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    token = db.Column(db.String(50), primary_key=True)  # 'remote', 'region:us', ...
 
 # ====================================================
 # Blog Post Model
@@ -107,6 +188,10 @@ class BlogPost(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'), nullable=True)
     user = db.relationship('UserAccount', backref=db.backref('blog_posts', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_blog_posts_published_created', 'is_published', 'created_at', 'id'),
+    )
+    
     def get_tags_list(self):
         if self.tags:
             return [tag.strip() for tag in self.tags.split(',')]
@@ -122,6 +207,17 @@ class WebsiteContent(db.Model):
     content = db.Column(db.Text)  # JSON content stored as text
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
+# ====================================================
+# Content Section Model (one row per CMS section, see content_store.py)
+# ====================================================
+class ContentSection(db.Model):
+    __tablename__ = 'content_sections'
+    
+    name = db.Column(db.String(50), primary_key=True)  # homepage, footer, carousel, ...
+    data = db.Column(db.Text, nullable=False)  # JSON for this section only
+    version = db.Column(db.Integer, nullable=False, default=1)  # Bumped on every write
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
 # ====================================================
 # Site Visit Model (for analytics)
 # ====================================================
@@ -138,6 +234,11 @@ class SiteVisit(db.Model):
     # Relationship for authenticated users
     user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'), nullable=True)
     user = db.relationship('UserAccount', backref=db.backref('visits', lazy=True))
+    
+    # Retention deletes by age
+    __table_args__ = (
+        db.Index('ix_site_visits_visit_date', 'visit_date'),
+    )
 
 # ====================================================
 # Job Application Model
@@ -170,4 +271,61 @@ class NewsletterSubscriber(db.Model):
     first_name = db.Column(db.String(50))
     subscribed_at = db.Column(db.DateTime, default=datetime.now)
     is_active = db.Column(db.Boolean, default=True)
-    job_category_preference = db.Column(db.String(50))  # Preferred job category for targeted emails
\ No newline at end of file
+    job_category_preference = db.Column(db.String(50))  # Preferred job category for targeted emails
+
+# ====================================================
+# Analytics Rollup Models (pre-aggregated dashboard data)
+# ====================================================
+class PageVisitRollup(db.Model):
+    __tablename__ = 'page_visit_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'page', name='uq_page_visit_rollup'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day, total
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    page = db.Column(db.String(255), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class JobCountRollup(db.Model):
+    __tablename__ = 'job_count_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('category', 'is_active', name='uq_job_count_rollup'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), nullable=False, default='')  # '' for uncategorized
+    is_active = db.Column(db.Boolean, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# ====================================================
+# Maintenance State Model (watermarks and leases for background jobs)
+# ====================================================
+class MaintenanceState(db.Model):
+    __tablename__ = 'maintenance_state'
+    
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    @classmethod
+    def get_value(cls, key, default=None):
+        state = db.session.get(cls, key)
+        return state.value if state and state.value is not None else default
+    
+    @classmethod
+    def set_value(cls, key, value):
+        state = db.session.get(cls, key) or cls(key=key)
+        state.value = value
+        db.session.add(state)
+
+# ====================================================
+# Schema Migration Model (applied versions, see migrations.py)
+# ====================================================
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(255))
+    applied_at = db.Column(db.DateTime, default=datetime.now)
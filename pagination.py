@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination for listing pages.
+
+Pages are addressed by an opaque cursor holding the sort key of the row at
+the page edge, e.g. ``(posted_date, id)``. Fetching any page is a single
+index range scan of ``per_page + 1`` rows, so the cost stays the same no
+matter how deep the page is or how large the table grows.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page:
+    """One page of results plus the cursors to reach its neighbours"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values, direction='next'):
+    """Encode a sort key and direction as a URL-safe token"""
+    payload = [direction] + [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token.
+
+    Returns:
+        ``(direction, values)``, or ``('next', None)`` for a missing or
+        malformed token so that bad input simply lands on the first page
+    """
+    if not token:
+        return 'next', None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, *values = json.loads(raw)
+    except (ValueError, TypeError):
+        return 'next', None
+    if direction not in ('next', 'prev') or not values:
+        return 'next', None
+    return direction, values
+
+
+def get_page_args():
+    """Read ``cursor`` and ``per_page`` from the current request"""
+    default = current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    per_page = request.args.get('per_page', default, type=int)
+    per_page = max(1, min(per_page, current_app.config.get('MAX_PAGE_SIZE', MAX_PAGE_SIZE)))
+    return request.args.get('cursor'), per_page
+
+
+def page_url(cursor):
+    """URL of the current view with the cursor swapped (for templates)"""
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def build_page(rows, per_page, direction, has_cursor, key):
+    """
+    Turn ``per_page + 1`` fetched rows into a Page.
+
+    Args:
+        rows: Rows in fetch order (descending for 'next', ascending for 'prev')
+        per_page: Page size
+        direction: Direction the rows were fetched in
+        has_cursor: Whether the request carried a cursor
+        key: Callable returning the sort key tuple of a row
+    """
+    has_more = len(rows) > per_page
+    rows = list(rows[:per_page])
+
+    if direction == 'prev':
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = has_cursor, has_more
+
+    if not rows:
+        return Page(rows)
+
+    return Page(
+        rows,
+        next_cursor=encode_cursor(key(rows[-1]), 'next') if has_next else None,
+        prev_cursor=encode_cursor(key(rows[0]), 'prev') if has_prev else None
+    )
+
+
+def keyset_query(query, sort_column, id_column, cursor=None):
+    """
+    Order and bound a query for the page a cursor points at.
+
+    Returns:
+        ``(query, direction, has_cursor)``; the query is not yet limited
+    """
+    direction, values = decode_cursor(cursor)
+
+    if values is not None:
+        try:
+            sort_value, id_value = values
+            if sort_column.type.python_type is datetime:
+                sort_value = datetime.fromisoformat(sort_value)
+        except (ValueError, TypeError, NotImplementedError):
+            direction, values = 'next', None
+
+    keyset = tuple_(sort_column, id_column)
+
+    if values is None:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    elif direction == 'prev':
+        query = query.filter(keyset > tuple_(sort_value, id_value))
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.filter(keyset < tuple_(sort_value, id_value))
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    return query, direction, values is not None
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    Paginate a query newest-first on ``(sort_column, id_column)``.
+
+    The query must not already be ordered; ordering is part of the keyset.
+    """
+    query, direction, has_cursor = keyset_query(query, sort_column, id_column, cursor)
+    rows = query.limit(per_page + 1).all()
+
+    return build_page(
+        rows, per_page, direction, has_cursor,
+        key=lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+    )
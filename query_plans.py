@@ -0,0 +1,117 @@
+"""
+Query-plan check for the listing queries.
+
+Builds the same queries the listing routes issue (routes.py, main.py) and
+runs EXPLAIN on each, failing any that would read a listing table with a
+full scan instead of an index. Run with ``flask check-query-plans``; it
+exits non-zero on failure so it can gate a deploy or CI job.
+
+SQLite: a plan step ``SCAN <table>`` without ``USING ... INDEX`` fails.
+Ordering done in a temporary B-tree is reported but allowed.
+Postgres: sequential scans are disabled for the session and any
+remaining ``Seq Scan`` fails, i.e. no index can serve the query at all.
+"""
+import json
+from datetime import datetime
+
+from db import db
+from models import BlogPost, Job, UserAccount
+from pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_query
+
+LISTING_TABLES = ('jobs', 'blog_posts', 'user_accounts')
+
+
+def _page(query, sort_column, id_column, cursor=None):
+    query, _, _ = keyset_query(query, sort_column, id_column, cursor)
+    return query.limit(DEFAULT_PAGE_SIZE + 1)
+
+
+def listing_queries():
+    """(name, query) for every listing query the app issues"""
+    active = Job.query.filter_by(is_active=True)
+    cursor = encode_cursor((datetime.now(), 1000))
+    prev_cursor = encode_cursor((datetime.now(), 1000), 'prev')
+
+    return [
+        ('index featured jobs', active.order_by(Job.posted_date.desc()).limit(6)),
+        ('jobs first page', _page(active, Job.posted_date, Job.id)),
+        ('jobs next page', _page(active, Job.posted_date, Job.id, cursor)),
+        ('jobs previous page', _page(active, Job.posted_date, Job.id, prev_cursor)),
+        ('jobs by category', _page(active.filter(Job.category == 'technology'), Job.posted_date, Job.id)),
+        ('jobs by category, next page',
+         _page(active.filter(Job.category == 'technology'), Job.posted_date, Job.id, cursor)),
+        ('jobs by subcategory', _page(active.filter(Job.subcategory == 'software'), Job.posted_date, Job.id)),
+        ('jobs by job type', _page(active.filter(Job.job_type == 'Full-time'), Job.posted_date, Job.id)),
+        ('jobs by category, subcategory and type', _page(active.filter(
+            Job.category == 'technology', Job.subcategory == 'software', Job.job_type == 'Full-time'
+        ), Job.posted_date, Job.id)),
+        ('jobs by minimum salary', _page(active.filter(Job.salary_annual >= 80000), Job.posted_date, Job.id)),
+        ('admin jobs', _page(Job.query, Job.posted_date, Job.id)),
+        ('admin jobs next page', _page(Job.query, Job.posted_date, Job.id, cursor)),
+        ('blog', _page(BlogPost.query.filter_by(is_published=True), BlogPost.created_at, BlogPost.id)),
+        ('blog next page', _page(
+            BlogPost.query.filter_by(is_published=True), BlogPost.created_at, BlogPost.id, cursor
+        )),
+        ('admin users', _page(UserAccount.query, UserAccount.created_at, UserAccount.id)),
+    ]
+
+
+def _compile(query, dialect):
+    return str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _check_sqlite(conn, sql):
+    """Return (ok, plan lines) for SQLite's EXPLAIN QUERY PLAN"""
+    steps = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+    ok = True
+    for step in steps:
+        words = step.split()
+        if words[:1] == ['SCAN'] and len(words) > 1 and words[1] in LISTING_TABLES and 'INDEX' not in words:
+            ok = False
+    return ok, steps
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def _check_postgres(conn, sql):
+    """Return (ok, plan lines) for Postgres EXPLAIN with seq scans disabled"""
+    conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    raw = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+
+    ok = True
+    steps = []
+    for node in _plan_nodes(plan):
+        relation = node.get('Relation Name')
+        index = node.get('Index Name')
+        steps.append(' '.join(part for part in (node['Node Type'], relation, index and f'using {index}') if part))
+        if node['Node Type'] == 'Seq Scan' and relation in LISTING_TABLES:
+            ok = False
+    return ok, steps
+
+
+def check_query_plans():
+    """
+    EXPLAIN every listing query.
+
+    Returns:
+        List of ``(name, ok, plan_steps)``
+    """
+    dialect = db.engine.dialect
+    if dialect.name == 'sqlite':
+        check = _check_sqlite
+    elif dialect.name == 'postgresql':
+        check = _check_postgres
+    else:
+        raise RuntimeError(f"Query plan check is not supported on {dialect.name}")
+
+    results = []
+    for name, query in listing_queries():
+        with db.engine.begin() as conn:
+            ok, steps = check(conn, _compile(query, dialect))
+        results.append((name, ok, steps))
+    return results
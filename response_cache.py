@@ -0,0 +1,461 @@
+"""
+Rendered-page response cache.
+
+Views decorated with ``@response_cache.cached('jobs')`` are served from
+cache when possible. The key is the endpoint, its view arguments, the
+normalised query string, whether the visitor is anonymous or logged in,
+and the current generation of every namespace the page depends on.
+
+Write paths invalidate by bumping a namespace generation (``jobs``,
+``blog``, ``content``). Job and blog post ORM writes do this after their
+transaction commits, and content_store does it on section writes. Old
+entries are never looked up again and age out through TTL/LRU.
+
+Responses are only cached for GET requests that end in a 200 and have no
+pending flash messages or session changes, so per-visitor output is never
+shared.
+
+Backends (``RESPONSE_CACHE_BACKEND``):
+    memory: In-process LRU per worker (default)
+    sqlite: Shared SQLite file at ``RESPONSE_CACHE_PATH``, for all workers
+        on one host
+    redis: Any server speaking the Redis protocol at
+        ``RESPONSE_CACHE_REDIS_URL``; eviction is the server's policy
+    none: Disabled
+
+Other config: ``RESPONSE_CACHE_TTL`` (seconds, default 60) and
+``RESPONSE_CACHE_MAX_ENTRIES`` (default 1000, memory/sqlite).
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlparse
+
+from flask import Response, g, make_response, request, session
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 1000
+
+NAMESPACES = ('jobs', 'blog', 'content')
+
+# Query parameters that never change the page
+IGNORED_ARGS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+
+
+# ==== Backends ====
+
+class MemoryBackend:
+    """LRU dict with per-entry expiry; private to one worker process"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counters(self, names):
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Cache in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses (accessed_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def _connect(self):
+        # One connection per thread (and per forked process)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires_at, accessed_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] < now:
+            return None
+        if row[2] < now - 1:
+            # LRU bookkeeping, at most once a second per entry
+            conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now)
+        )
+        count = conn.execute('SELECT count(*) FROM responses').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('DELETE FROM responses WHERE expires_at < ?', (now,))
+            conn.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)',
+                (max(1, count - self.max_entries + self.max_entries // 10),)
+            )
+
+    def counters(self, names):
+        rows = dict(self._connect().execute(
+            f"SELECT name, value FROM counters WHERE name IN ({', '.join('?' for _ in names)})", names
+        ).fetchall())
+        return [rows.get(name, 0) for name in names]
+
+    def incr(self, name):
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,)
+        )
+        return conn.execute('SELECT value FROM counters WHERE name = ?', (name,)).fetchone()[0]
+
+    def clear(self):
+        self._connect().execute('DELETE FROM responses')
+
+
+class RedisBackend:
+    """
+    Minimal Redis-protocol (RESP) client: GET, SET PX, MGET, INCR.
+
+    tests/fake_redis.py is a local stand-in server for testing it.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', timeout=0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or '/0').lstrip('/') or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+        self._pid = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        self._pid = os.getpid()
+        if self.password:
+            self._send('AUTH', self.password)
+        if self.db:
+            self._send('SELECT', self.db)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def _send(self, *args):
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RuntimeError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise RuntimeError(f'Unexpected reply {line!r}')
+
+    def command(self, *args):
+        with self._lock:
+            if self._sock is None or self._pid != os.getpid():
+                self._connect()
+            try:
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self._close()
+                raise
+
+    def get(self, key):
+        return self.command('GET', key)
+
+    def set(self, key, value, ttl):
+        self.command('SET', key, value, 'PX', int(ttl * 1000))
+
+    def counters(self, names):
+        return [int(value or 0) for value in self.command('MGET', *names)]
+
+    def incr(self, name):
+        return self.command('INCR', name)
+
+    def clear(self):
+        # Entries live under a prefix per generation; bumping every
+        # namespace orphans them all without a keyspace scan
+        for namespace in NAMESPACES:
+            self.incr(f'response-cache:generation:{namespace}')
+
+
+def create_backend(app):
+    """Build the backend selected by RESPONSE_CACHE_BACKEND"""
+    kind = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    if kind == 'memory':
+        return MemoryBackend(max_entries)
+    if kind == 'sqlite':
+        path = app.config.get('RESPONSE_CACHE_PATH') or os.path.join(app.instance_path, 'response_cache.db')
+        return SQLiteBackend(path, max_entries)
+    if kind == 'redis':
+        return RedisBackend(app.config.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+    if kind in (None, 'none'):
+        return None
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {kind!r}")
+
+
+# ==== Cache ====
+
+def _encode(response):
+    headers = [(name, value) for name, value in response.headers.items() if name.lower() != 'set-cookie']
+    meta = json.dumps({'status': response.status_code, 'headers': headers}).encode('utf-8')
+    return meta + b'\n' + response.get_data()
+
+
+def _decode(value):
+    meta, _, body = value.partition(b'\n')
+    meta = json.loads(meta)
+    return Response(body, status=meta['status'], headers=meta['headers'])
+
+
+def normalised_args():
+    """Sorted query arguments of the current request, without blanks and tracking params"""
+    return sorted(
+        (name, value) for name, value in request.args.items(multi=True)
+        if value != '' and name not in IGNORED_ARGS
+    )
+
+
+def is_authenticated():
+    """Whether the visitor is logged in (pages differ for them)"""
+    if session.get('admin_logged_in'):
+        return True
+    try:
+        from flask_login import current_user
+        return bool(current_user and current_user.is_authenticated)
+    except Exception:
+        return False
+
+
+class ResponseCache:
+    """Response cache with namespace invalidation and hit/miss counters"""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = DEFAULT_TTL
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'bypassed': 0, 'errors': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app, backend=None):
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+        self.backend = backend or create_backend(app)
+
+    def _bump(self, counter):
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    def stats(self):
+        """Per-worker counters plus the hit ratio"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        stats['backend'] = type(self.backend).__name__ if self.backend else None
+        return stats
+
+    def invalidate(self, *namespaces):
+        """Make every cached page depending on these namespaces stale"""
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            try:
+                self.backend.incr(f'response-cache:generation:{namespace}')
+                self._bump('invalidations')
+            except Exception as e:
+                self._bump('errors')
+                logger.error(f"Response cache invalidation of {namespace} failed: {e}")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def skip(self):
+        """Don't store this request's response (e.g. a fallback after an error)"""
+        g.response_cache_skip = True
+
+    def make_key(self, namespaces):
+        """Cache key for the current request"""
+        generations = self.backend.counters([f'response-cache:generation:{namespace}' for namespace in namespaces])
+        return 'response-cache:' + json.dumps([
+            request.endpoint,
+            sorted((request.view_args or {}).items()),
+            normalised_args(),
+            'auth' if is_authenticated() else 'anon',
+            dict(zip(namespaces, generations)),
+        ], separators=(',', ':'), default=str)
+
+    def cached(self, *namespaces, ttl=None, on_hit=None):
+        """
+        Cache a view's response.
+
+        Args:
+            namespaces: What the page shows ('jobs', 'blog', 'content');
+                writes to any of them invalidate it
+            ttl: Seconds to keep the response (default RESPONSE_CACHE_TTL)
+            on_hit: Called with the view arguments when a cached response
+                is served, for side effects the view would have had
+                (analytics, view counts)
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or request.method != 'GET' or '_flashes' in session:
+                    self._bump('bypassed')
+                    return view(*args, **kwargs)
+
+                try:
+                    key = self.make_key(namespaces)
+                    value = self.backend.get(key)
+                except Exception as e:
+                    self._bump('errors')
+                    logger.error(f"Response cache lookup failed: {e}")
+                    return view(*args, **kwargs)
+
+                if value is not None:
+                    self._bump('hits')
+                    if on_hit is not None:
+                        on_hit(*args, **kwargs)
+                    response = _decode(value)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._bump('misses')
+                response = view(*args, **kwargs)
+                response = make_response(response)
+                if (response.status_code == 200 and not response.direct_passthrough
+                        and not session.modified and not g.get('response_cache_skip')):
+                    try:
+                        self.backend.set(key, _encode(response), ttl or self.ttl)
+                        self._bump('stores')
+                    except Exception as e:
+                        self._bump('errors')
+                        logger.error(f"Response cache store failed: {e}")
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+# Shared cache, configured per app with response_cache.init_app(app)
+response_cache = ResponseCache()
+
+
+# ==== Invalidation from ORM writes ====
+
+_DIRTY_KEY = 'response_cache_dirty'
+
+
+def _mark_dirty(namespace):
+    def listener(mapper, connection, target):
+        session_ = db.inspect(target).session
+        if session_ is not None:
+            session_.info.setdefault(_DIRTY_KEY, set()).add(namespace)
+    return listener
+
+
+def register_model_hooks():
+    """Invalidate jobs/blog pages after commits that wrote those models"""
+    from sqlalchemy.orm import Session
+
+    from models import BlogPost, Job
+
+    for model, namespace in ((Job, 'jobs'), (BlogPost, 'blog')):
+        for event in ('after_insert', 'after_update', 'after_delete'):
+            db.event.listen(model, event, _mark_dirty(namespace))
+
+    @db.event.listens_for(Session, 'after_commit')
+    def _invalidate_after_commit(session_):
+        dirty = session_.info.pop(_DIRTY_KEY, None)
+        if dirty:
+            response_cache.invalidate(*sorted(dirty))
+
+    @db.event.listens_for(Session, 'after_rollback')
+    def _discard_after_rollback(session_):
+        session_.info.pop(_DIRTY_KEY, None)
+
+
+register_model_hooks()
@@ -0,0 +1,249 @@
+"""
+Retention and compaction for the site_visits table.
+
+Raw SiteVisit rows older than ``VISIT_RETENTION_DAYS`` are compacted:
+
+1. Downsample: the day and total rollups (rollups.py) are topped up so they
+   account for every raw visit being removed. Normally they already do,
+   since the analytics writer maintains them; this covers visits recorded
+   before rollups existed.
+2. Hour-level rollups older than the cutoff are dropped; the day rollups
+   remain as the long-term record.
+3. Raw rows are deleted in small batches, each in its own short
+   transaction with a pause in between, so request-path writes are never
+   blocked for long (on SQLite, the whole database is locked per batch).
+
+Runs from ``flask compact-visits`` or, with ``VISIT_RETENTION_SCHEDULE``
+enabled, from a background thread every ``VISIT_RETENTION_INTERVAL`` hours.
+A lease row in ``maintenance_state`` ensures only one worker runs it per
+interval.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from db import db
+from models import MaintenanceState, PageVisitRollup, SiteVisit
+from rollups import (COMPACTED_BEFORE_KEY, TOTAL_BUCKET, add_visit_counts,
+                     compacted_before, visit_bucket_expression)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_PAUSE = 0.05
+DEFAULT_INTERVAL_HOURS = 24
+
+# Rough per-row cost beyond the text columns (ids, timestamp, tuple header)
+ROW_OVERHEAD_BYTES = 40
+
+LEASE_KEY = 'site_visits.retention_last_run'
+
+
+def retention_cutoff(max_age_days, now=None):
+    """Start of the day ``max_age_days`` ago; only whole days are compacted"""
+    now = now or datetime.now()
+    return (now - timedelta(days=max_age_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _downsample(cutoff):
+    """Make day/total rollups cover every raw visit before ``cutoff``"""
+    bucket = visit_bucket_expression(db.engine.dialect.name, 'day').label('bucket')
+    raw_counts = db.session.query(
+        bucket, SiteVisit.page, db.func.count(SiteVisit.id)
+    ).filter(SiteVisit.visit_date < cutoff).group_by(bucket, SiteVisit.page).all()
+    if not raw_counts:
+        return 0
+
+    rolled_up = {
+        (row.bucket_start, row.page): row.count
+        for row in PageVisitRollup.query.filter(
+            PageVisitRollup.granularity == 'day',
+            PageVisitRollup.bucket_start < cutoff
+        )
+    }
+
+    missing = Counter()
+    for start, page, count in raw_counts:
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start)
+        shortfall = count - rolled_up.get((start, page), 0)
+        if shortfall > 0:
+            missing[('day', start, page)] += shortfall
+            missing[('total', TOTAL_BUCKET, page)] += shortfall
+
+    if missing:
+        add_visit_counts(db.session.connection(), missing)
+    db.session.commit()
+    return sum(count for (granularity, _, _), count in missing.items() if granularity == 'day')
+
+
+def _row_bytes(ids):
+    """Approximate storage used by the given SiteVisit rows"""
+    text_bytes = db.session.query(db.func.sum(
+        db.func.coalesce(db.func.length(SiteVisit.page), 0) +
+        db.func.coalesce(db.func.length(SiteVisit.ip_address), 0) +
+        db.func.coalesce(db.func.length(SiteVisit.user_agent), 0) +
+        db.func.coalesce(db.func.length(SiteVisit.referrer), 0)
+    )).filter(SiteVisit.id.in_(ids)).scalar() or 0
+    return int(text_bytes) + ROW_OVERHEAD_BYTES * len(ids)
+
+
+def compact_site_visits(max_age_days=DEFAULT_RETENTION_DAYS, batch_size=DEFAULT_BATCH_SIZE,
+                        pause=DEFAULT_BATCH_PAUSE, vacuum=False):
+    """
+    Downsample and delete raw site visits older than ``max_age_days``.
+
+    Args:
+        max_age_days: Raw visits from before the start of this many days ago are removed
+        batch_size: Rows deleted per transaction
+        pause: Seconds to sleep between batches
+        vacuum: Reclaim file space afterwards (VACUUM; locks the table/database)
+
+    Returns:
+        Report dictionary with rows and estimated bytes reclaimed
+    """
+    started = time.perf_counter()
+    cutoff = retention_cutoff(max_age_days)
+    report = {
+        'cutoff': cutoff.isoformat(sep=' '),
+        'downsampled_visits': _downsample(cutoff),
+        'hour_rollups_deleted': 0,
+        'rows_deleted': 0,
+        'bytes_reclaimed': 0,
+        'batches': 0
+    }
+
+    # From here on the rollups are the only record of visits before cutoff
+    previous = compacted_before()
+    if previous is None or cutoff > previous:
+        MaintenanceState.set_value(COMPACTED_BEFORE_KEY, cutoff.isoformat())
+    report['hour_rollups_deleted'] = db.session.execute(
+        db.delete(PageVisitRollup).where(
+            PageVisitRollup.granularity == 'hour',
+            PageVisitRollup.bucket_start < cutoff
+        )
+    ).rowcount
+    db.session.commit()
+
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(SiteVisit.id).filter(
+            SiteVisit.visit_date < cutoff
+        ).order_by(SiteVisit.id).limit(batch_size)]
+        if not ids:
+            break
+
+        report['bytes_reclaimed'] += _row_bytes(ids)
+        db.session.execute(db.delete(SiteVisit).where(SiteVisit.id.in_(ids)))
+        db.session.commit()
+
+        report['rows_deleted'] += len(ids)
+        report['batches'] += 1
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+
+    if vacuum and report['rows_deleted']:
+        _vacuum()
+
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+    logger.info(f"Site visit retention: {report}")
+    return report
+
+
+def _vacuum():
+    """Return freed space to the filesystem (SQLite) or the table (Postgres)"""
+    dialect = db.engine.dialect.name
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if dialect == 'sqlite':
+            conn.exec_driver_sql('VACUUM')
+        elif dialect == 'postgresql':
+            conn.exec_driver_sql('VACUUM (ANALYZE) site_visits')
+
+
+def _claim_run(interval):
+    """Take the retention lease if the last run is older than ``interval``"""
+    now = datetime.now()
+    last_run = MaintenanceState.get_value(LEASE_KEY)
+    if last_run and datetime.fromisoformat(last_run) > now - interval:
+        return False
+
+    if last_run is None:
+        try:
+            db.session.add(MaintenanceState(key=LEASE_KEY, value=now.isoformat()))
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            return False
+
+    # Compare-and-swap so concurrent workers cannot both claim the run
+    claimed = db.session.execute(
+        db.update(MaintenanceState).where(
+            MaintenanceState.key == LEASE_KEY,
+            MaintenanceState.value == last_run
+        ).values(value=now.isoformat())
+    ).rowcount == 1
+    db.session.commit()
+    return claimed
+
+
+class RetentionScheduler:
+    """Background thread running compaction every VISIT_RETENTION_INTERVAL hours"""
+
+    def __init__(self):
+        self.app = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Start the scheduler if VISIT_RETENTION_SCHEDULE is enabled"""
+        if not app.config.get('VISIT_RETENTION_SCHEDULE'):
+            return
+        self.app = app
+        self._start()
+        # Threads do not survive fork, so restart in each gunicorn worker
+        os.register_at_fork(after_in_child=self._start)
+
+    def stop(self):
+        self._stopping.set()
+
+    def run_once(self):
+        """Compact if this worker wins the lease; returns the report or None"""
+        config = self.app.config
+        interval = timedelta(hours=config.get('VISIT_RETENTION_INTERVAL', DEFAULT_INTERVAL_HOURS))
+        with self.app.app_context():
+            try:
+                if not _claim_run(interval):
+                    return None
+                return compact_site_visits(
+                    max_age_days=config.get('VISIT_RETENTION_DAYS', DEFAULT_RETENTION_DAYS),
+                    batch_size=config.get('VISIT_RETENTION_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+                    pause=config.get('VISIT_RETENTION_PAUSE', DEFAULT_BATCH_PAUSE)
+                )
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Scheduled site visit retention failed: {e}")
+                return None
+            finally:
+                db.session.remove()
+
+    def _start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='visit-retention', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Check shortly after start, then hourly; the lease decides whether a
+        # run is actually due
+        delay = 60
+        while not self._stopping.wait(delay):
+            self.run_once()
+            delay = 3600
+
+
+# Shared scheduler, enabled per app with retention_scheduler.init_app(app)
+retention_scheduler = RetentionScheduler()
@@ -0,0 +1,268 @@
+"""
+Pre-aggregated analytics rollups for the admin dashboard.
+
+``page_visit_rollups`` holds visit counts per page per hour, per day and in
+total; it is incremented by the analytics writer in the same transaction as
+each batch of SiteVisit inserts. ``job_count_rollups`` holds job counts per
+(category, is_active) and is kept current by ORM events on Job. The
+dashboard reads a few dozen rollup rows instead of grouping raw tables.
+
+Core-level bulk writes to ``jobs`` bypass the ORM events; run
+``flask backfill-rollups`` after those. Existing databases are seeded by
+migration 8.
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+
+from db import db
+from models import Job, JobCountRollup, MaintenanceState, PageVisitRollup, SiteVisit
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'total')
+
+# Bucket used for the all-time 'total' granularity
+TOTAL_BUCKET = datetime(1970, 1, 1)
+
+# Raw visits before this moment were compacted away (see retention.py); their
+# day and total rollups are the only record left and must not be recomputed
+COMPACTED_BEFORE_KEY = 'site_visits.compacted_before'
+
+
+def bucket_start(moment, granularity):
+    """Start of the rollup bucket containing ``moment``"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return TOTAL_BUCKET
+
+
+def _increment(connection, table, key_columns, rows):
+    """Add ``count`` from each row to its rollup row, creating it if needed"""
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={'count': table.c.count + statement.excluded['count']}
+        )
+        connection.execute(statement, rows)
+        return
+
+    # Portable fallback: update, then insert the rows that did not exist
+    for row in rows:
+        condition = db.and_(*(table.c[column] == row[column] for column in key_columns))
+        result = connection.execute(
+            db.update(table).where(condition).values(count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(db.insert(table), [row])
+
+
+# ==== Page visits ====
+
+def add_visit_counts(connection, counts):
+    """Add {(granularity, bucket_start, page): count} to the visit rollups"""
+    _increment(
+        connection,
+        PageVisitRollup.__table__,
+        ['granularity', 'bucket_start', 'page'],
+        [
+            {'granularity': granularity, 'bucket_start': start, 'page': page, 'count': count}
+            for (granularity, start, page), count in counts.items()
+        ]
+    )
+
+
+def record_visits(connection, visits):
+    """Fold a batch of SiteVisit dicts into the page visit rollups"""
+    counts = Counter()
+    for visit in visits:
+        for granularity in GRANULARITIES:
+            counts[(granularity, bucket_start(visit['visit_date'], granularity), visit['page'])] += 1
+    add_visit_counts(connection, counts)
+
+
+def compacted_before():
+    """Moment before which raw visits have been compacted, or None"""
+    value = MaintenanceState.get_value(COMPACTED_BEFORE_KEY)
+    return datetime.fromisoformat(value) if value else None
+
+
+def visit_bucket_expression(dialect, granularity):
+    """SQL expression truncating SiteVisit.visit_date to a bucket"""
+    if dialect == 'postgresql':
+        return db.func.date_trunc(granularity, SiteVisit.visit_date)
+    formats = {'hour': '%Y-%m-%d %H:00:00', 'day': '%Y-%m-%d 00:00:00'}
+    return db.func.strftime(formats[granularity], SiteVisit.visit_date)
+
+
+def top_pages(limit=5):
+    """All-time most visited pages as (page, count) rows"""
+    return db.session.query(
+        PageVisitRollup.page,
+        PageVisitRollup.count
+    ).filter_by(granularity='total').order_by(PageVisitRollup.count.desc()).limit(limit).all()
+
+
+def visits_by_day(limit=7):
+    """Most recent days with visits as (date, count) rows, newest first"""
+    rows = db.session.query(
+        PageVisitRollup.bucket_start.label('date'),
+        db.func.sum(PageVisitRollup.count).label('count')
+    ).filter_by(granularity='day').group_by(PageVisitRollup.bucket_start).order_by(
+        PageVisitRollup.bucket_start.desc()
+    ).limit(limit).all()
+    return [(row.date.date(), row.count) for row in rows]
+
+
+# ==== Jobs ====
+
+def _job_key(category, is_active):
+    """Rollup key for a job; NULL category is stored as ''"""
+    return (category or '', True if is_active is None else bool(is_active))
+
+
+def _job_rows(changes):
+    """Merge ((category, is_active), delta) pairs into rollup rows"""
+    totals = Counter()
+    for (category, is_active), delta in changes:
+        totals[_job_key(category, is_active)] += delta
+    return [
+        {'category': category, 'is_active': is_active, 'count': delta}
+        for (category, is_active), delta in totals.items() if delta
+    ]
+
+
+def _adjust_jobs(connection, changes):
+    _increment(connection, JobCountRollup.__table__, ['category', 'is_active'], _job_rows(changes))
+
+
+@db.event.listens_for(Job.category, 'set', active_history=True)
+@db.event.listens_for(Job.is_active, 'set', active_history=True)
+def _load_previous_value(target, value, oldvalue, initiator):
+    # active_history makes an expired attribute load its old value on set,
+    # so after_update can tell which rollup row the job is leaving
+    return value
+
+
+@db.event.listens_for(Job, 'after_insert')
+def _job_inserted(mapper, connection, target):
+    _adjust_jobs(connection, [((target.category, target.is_active), 1)])
+
+
+@db.event.listens_for(Job, 'after_delete')
+def _job_deleted(mapper, connection, target):
+    _adjust_jobs(connection, [((target.category, target.is_active), -1)])
+
+
+@db.event.listens_for(Job, 'after_update')
+def _job_updated(mapper, connection, target):
+    state = db.inspect(target)
+    category = state.attrs.category.history
+    is_active = state.attrs.is_active.history
+    if not (category.has_changes() or is_active.has_changes()):
+        return
+
+    old_category = category.deleted[0] if category.deleted else target.category
+    old_active = is_active.deleted[0] if is_active.deleted else target.is_active
+    _adjust_jobs(connection, [
+        ((old_category, old_active), -1),
+        ((target.category, target.is_active), 1)
+    ])
+
+
+def job_counts():
+    """Totals for the dashboard: (total, active, [(category, count), ...])"""
+    rows = JobCountRollup.query.filter(JobCountRollup.count != 0).all()
+
+    by_category = Counter()
+    for row in rows:
+        by_category[row.category or None] += row.count
+
+    total = sum(row.count for row in rows)
+    active = sum(row.count for row in rows if row.is_active)
+    return total, active, sorted(by_category.items(), key=lambda item: -item[1])
+
+
+# ==== Backfill ====
+
+def backfill_rollups(connection=None):
+    """
+    Recompute every rollup from the raw tables.
+
+    Visit rollups for periods already compacted by retention are kept as
+    they are, since their raw rows no longer exist; totals are rebuilt from
+    the day rollups so they include those periods.
+
+    Args:
+        connection: Connection to write on, left for the caller to commit
+            (migrations); defaults to the session, committed at the end
+
+    Returns:
+        Dictionary with the number of rollup rows written per table
+    """
+    if connection is None:
+        written = backfill_rollups(db.session.connection())
+        db.session.commit()
+        return written
+
+    dialect = connection.dialect.name
+    value = connection.execute(
+        db.select(MaintenanceState.value).where(MaintenanceState.key == COMPACTED_BEFORE_KEY)
+    ).scalar()
+    horizon = datetime.fromisoformat(value) if value else None
+    visit_rows = []
+
+    for granularity in ('hour', 'day'):
+        bucket = visit_bucket_expression(dialect, granularity).label('bucket')
+        grouped = db.select(bucket, SiteVisit.page, db.func.count(SiteVisit.id))
+        if horizon:
+            grouped = grouped.where(SiteVisit.visit_date >= horizon)
+        for start, page, count in connection.execute(grouped.group_by(bucket, SiteVisit.page)):
+            if isinstance(start, str):
+                start = datetime.fromisoformat(start)
+            visit_rows.append({'granularity': granularity, 'bucket_start': start, 'page': page, 'count': count})
+
+    # NULL and '' categories (or NULL is_active) collapse onto one key
+    job_rows = _job_rows(
+        ((category, is_active), count)
+        for category, is_active, count in connection.execute(
+            db.select(Job.category, Job.is_active, db.func.count(Job.id)).group_by(Job.category, Job.is_active)
+        )
+    )
+
+    stale_visits = db.delete(PageVisitRollup)
+    if horizon:
+        stale_visits = stale_visits.where(
+            (PageVisitRollup.granularity == 'total') | (PageVisitRollup.bucket_start >= horizon)
+        )
+    connection.execute(stale_visits)
+    connection.execute(db.delete(JobCountRollup))
+    if visit_rows:
+        connection.execute(db.insert(PageVisitRollup), visit_rows)
+    if job_rows:
+        connection.execute(db.insert(JobCountRollup), job_rows)
+
+    totals = connection.execute(
+        db.select(PageVisitRollup.page, db.func.sum(PageVisitRollup.count))
+        .where(PageVisitRollup.granularity == 'day').group_by(PageVisitRollup.page)
+    ).all()
+    if totals:
+        connection.execute(db.insert(PageVisitRollup), [
+            {'granularity': 'total', 'bucket_start': TOTAL_BUCKET, 'page': page, 'count': count}
+            for page, count in totals
+        ])
+        visit_rows.extend(totals)
+
+    logger.info(f"Backfilled {len(visit_rows)} page visit and {len(job_rows)} job rollup rows")
+    return {'page_visit_rollups': len(visit_rows), 'job_count_rollups': len(job_rows)}
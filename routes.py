@@ -11,10 +11,40 @@ from datetime import datetime
 # Import database models
 from models import UserAccount, Job, BlogPost, SiteVisit, WebsiteContent, JobApplication
 from db import db
+from view_counter import view_counter
+from analytics import visit_recorder
+from rollups import job_counts, top_pages, visits_by_day
 
 # Import scraper for URL-based job extraction
-from scraper import extract_job_details
-from web_scraper import get_website_text_content
+from scraper import extract_job_details, stage_stats
+
+# Full-text search over job postings
+from search import search_jobs
+
+# Location normaliser (search tokens are derived from the cleaned form)
+from locations import clean_location
+
+# Filter counts for the jobs sidebar
+from facets import apply_facets, facet_counts, selected_facets
+
+# Keyset pagination for listing pages
+from pagination import Page, get_page_args, keyset_paginate, page_url
+
+# Rendered-page cache for public pages
+from response_cache import response_cache
+from fragment_cache import fragment_cache
+
+# Pooled HTTP session used by the scrapers
+from http_fetch import fetcher
+
+# Concurrent scraping of URL lists for the admin bulk scrape
+from bulk_scrape import bulk_scraper, request_urls
+
+# Background queue for page fetches requested by visitors
+from task_queue import TaskConflict, accepted, result_response, status_response, task_queue
+
+# ETag / Last-Modified validators and 304 responses
+from conditional import conditional, export_validators, job_validators, listing_validators
 
 def register_routes(app):
     """Register all application routes with the Flask app"""
@@ -32,16 +62,33 @@ def register_routes(app):
         
     # ==== Utility Functions ====
     def track_page_visit(page):
-        """Track a page visit for analytics"""
-        visit = SiteVisit(
+        """Track a page visit for analytics (queued, written in the background)"""
+        visit_recorder.record(
             page=page,
             ip_address=request.remote_addr,
             user_agent=request.user_agent.string,
             referrer=request.referrer,
             user_id=current_user.id if current_user.is_authenticated else None
         )
-        db.session.add(visit)
-        db.session.commit()
+    
+    def track_job_view(job_id):
+        """Visit and view count for a job page served from the response cache"""
+        track_page_visit(f'job/{job_id}')
+        view_counter.increment('jobs', job_id)
+    
+    def jobs_page_validators():
+        """Listing validators plus the content versions the page shows"""
+        return listing_validators(g.content_store.versions())
+    
+    def search_filtered_jobs(query, min_salary=None, ranked=False):
+        """Active jobs matching the keyword search and pay floor, before facet filters"""
+        job_query = Job.query.filter_by(is_active=True)
+        if query:
+            job_query = search_jobs(job_query, query, ranked=ranked)
+        if min_salary:
+            # Range scan on ix_jobs_active_salary_annual
+            job_query = job_query.filter(Job.salary_annual >= min_salary)
+        return job_query
     
     # ==== Context Processors ====
     @app.context_processor
@@ -55,7 +102,7 @@ def register_routes(app):
                     return date
             return date.strftime('%B %d, %Y')
         
-        return dict(format_date=format_date)
+        return dict(format_date=format_date, page_url=page_url)
     
     # ==== Error Handlers ====
     @app.errorhandler(404)
@@ -70,6 +117,7 @@ def register_routes(app):
     
     # ==== Public Routes ====
     @app.route('/')
+    @response_cache.cached('jobs', 'content', on_hit=lambda: track_page_visit('home'))
     def index():
         """Homepage with featured jobs and search bar"""
         track_page_visit('home')
@@ -84,53 +132,70 @@ def register_routes(app):
         )
         
     @app.route('/jobs')
+    @conditional(jobs_page_validators, on_not_modified=lambda: track_page_visit('jobs'))
+    @response_cache.cached('jobs', 'content', on_hit=lambda: track_page_visit('jobs'))
     def jobs():
         """Job listings page with all available jobs"""
         track_page_visit('jobs')
         
-        # Get search query
+        # Get search query and facet selections (category, subcategory, job type)
         query = request.args.get('q', '')
-        category = request.args.get('category', '')
+        sort = request.args.get('sort', '')
+        min_salary = request.args.get('min_salary', type=int)
+        selected = selected_facets(request.args)
         
-        # Base query
-        job_query = Job.query.filter_by(is_active=True)
+        # Keyword search (full-text index, ranked on request) and pay floor, then facets
+        job_query = apply_facets(search_filtered_jobs(query, min_salary, ranked=(sort == 'relevance')), selected)
         
-        # Apply search filter if provided
-        if query:
-            search = f"%{query}%"
-            job_query = job_query.filter(
-                (Job.title.ilike(search)) | 
-                (Job.description.ilike(search)) | 
-                (Job.company.ilike(search)) | 
-                (Job.location.ilike(search))
-            )
-            
-        # Apply category filter if provided
-        if category:
-            job_query = job_query.filter(Job.category == category)
+        # Counts for every filter value, from one grouped query
+        facets = facet_counts(search_filtered_jobs(query, min_salary), {'q': query, 'min_salary': min_salary}, selected)
         
-        # Get jobs
-        all_jobs = job_query.order_by(Job.posted_date.desc()).all()
+        # Get one page of jobs
+        cursor, per_page = get_page_args()
+        if query and sort == 'relevance':
+            # Relevance order has no stable keyset, so only the best page is shown
+            page = Page(job_query.order_by(Job.posted_date.desc()).limit(per_page).all())
+        else:
+            page = keyset_paginate(job_query, Job.posted_date, Job.id, cursor, per_page)
         
         return render_template(
             'jobs.html',
-            jobs=all_jobs,
+            jobs=page.items,
+            page=page,
             query=query,
-            category=category,
+            category=selected.get('category', ''),
+            subcategory=selected.get('subcategory', ''),
+            job_type=selected.get('job_type', ''),
+            min_salary=min_salary,
+            sort=sort,
+            facets=facets,
             categories=g.content_store.get_section('categories')
         )
         
+    @app.route('/api/jobs/facets')
+    @conditional(listing_validators)
+    def api_job_facets():
+        """Facet counts for the current job filters as JSON"""
+        query = request.args.get('q', '')
+        min_salary = request.args.get('min_salary', type=int)
+        return jsonify(facet_counts(
+            search_filtered_jobs(query, min_salary),
+            {'q': query, 'min_salary': min_salary},
+            selected_facets(request.args)
+        ))
+        
     @app.route('/jobs/<int:job_id>')
+    @conditional(job_validators, on_not_modified=track_job_view)
+    @response_cache.cached('jobs', on_hit=track_job_view)
     def job_detail(job_id):
         """Job detail page with full information"""
         track_page_visit(f'job/{job_id}')
         
-        # Get job by ID
-        job = Job.query.get_or_404(job_id)
+        # Get job by ID, with the full description and requirements
+        job = Job.query.options(db.undefer_group('full_text')).get_or_404(job_id)
         
-        # Increment view counter
-        job.views += 1
-        db.session.commit()
+        # Count the view (buffered, written in the background)
+        view_counter.increment('jobs', job.id)
         
         return render_template('job_detail.html', job=job)
         
@@ -144,7 +209,7 @@ def register_routes(app):
             job_data = {
                 'title': request.form.get('title'),
                 'company': request.form.get('company'),
-                'location': request.form.get('location'),
+                'location': clean_location(request.form.get('location')),
                 'salary': request.form.get('salary'),
                 'job_type': request.form.get('job_type'),
                 'category': request.form.get('category'),
@@ -168,29 +233,43 @@ def register_routes(app):
         
     @app.route('/api/extract-job', methods=['POST'])
     def api_extract_job():
-        """API endpoint for URL-based job detail extraction"""
+        """API endpoint for URL-based job detail extraction; 202 with the task to poll"""
         url = request.json.get('url')
         
         if not url:
             return jsonify({'error': 'No URL provided'}), 400
             
-        # Extract job details
-        job_data = extract_job_details(url)
+        # Extracted by a task worker; GET /tasks/<id>/result returns the job data
+        try:
+            task = task_queue.enqueue('scrape_job', {'url': url}, key=request.headers.get('Idempotency-Key'))
+        except TaskConflict as e:
+            return jsonify({'error': str(e)}), 422
+        return accepted(task)
         
-        if not job_data:
-            return jsonify({'error': 'Failed to extract job details'}), 400
-            
-        return jsonify(job_data)
+    @app.route('/tasks/<task_id>')
+    def task_status(task_id):
+        """Status of a queued scrape or extraction"""
+        return status_response(task_id, admin=current_user.is_authenticated and current_user.is_admin())
+        
+    @app.route('/tasks/<task_id>/result')
+    def task_result(task_id):
+        """Result of a queued scrape or extraction (202 until it is done)"""
+        return result_response(task_id, admin=current_user.is_authenticated and current_user.is_admin())
         
     @app.route('/blog')
+    @response_cache.cached('blog', on_hit=lambda: track_page_visit('blog'))
     def blog():
         """Blog listing page"""
         track_page_visit('blog')
         
-        # Get all published blog posts
-        posts = BlogPost.query.filter_by(is_published=True).order_by(BlogPost.created_at.desc()).all()
+        # Get one page of published blog posts
+        cursor, per_page = get_page_args()
+        page = keyset_paginate(
+            BlogPost.query.filter_by(is_published=True),
+            BlogPost.created_at, BlogPost.id, cursor, per_page
+        )
         
-        return render_template('blog.html', posts=posts)
+        return render_template('blog.html', posts=page.items, page=page)
         
     @app.route('/blog/<int:post_id>')
     def blog_post(post_id):
@@ -200,9 +279,8 @@ def register_routes(app):
         # Get post by ID
         post = BlogPost.query.get_or_404(post_id)
         
-        # Increment view counter
-        post.views += 1
-        db.session.commit()
+        # Count the view (buffered, written in the background)
+        view_counter.increment('blog_posts', post.id)
         
         return render_template('blog_post.html', post=post)
         
@@ -211,15 +289,24 @@ def register_routes(app):
         """Page for extracting text content from any website"""
         track_page_visit('text-extractor')
         
-        extracted_text = None
-        url = None
-        
         if request.method == 'POST':
             url = request.form.get('url')
-            if url:
-                extracted_text = get_website_text_content(url)
-                
-        return render_template('text_extractor.html', extracted_text=extracted_text, url=url)
+            if not url:
+                return render_template('text_extractor.html')
+            # 202 page that polls the task, then reloads as ?task=<id>
+            task = task_queue.enqueue('website_text', {'url': url})
+            return render_template('text_extractor.html', task=task, url=url), 202
+            
+        task_id = request.args.get('task')
+        task = task_queue.get(task_id, with_result=True) if task_id else None
+        if task is None:
+            return render_template('text_extractor.html')
+        url = task['payload'].get('url')
+        if task['status'] == 'done':
+            return render_template('text_extractor.html', extracted_text=task['result'], url=url)
+        if task['status'] == 'failed':
+            return render_template('text_extractor.html', extracted_text=task.get('result') or f"Error extracting content: {task['error']}", url=url)
+        return render_template('text_extractor.html', task=task, url=url), 202
         
     # ==== Admin Routes ====
     @app.route('/admin/login', methods=['GET', 'POST'])
@@ -261,28 +348,15 @@ def register_routes(app):
         """Admin dashboard page"""
         track_page_visit('admin/dashboard')
         
-        # Get analytics data
-        total_jobs = Job.query.count()
-        active_jobs = Job.query.filter_by(is_active=True).count()
+        # Get analytics data (pre-aggregated rollups, see rollups.py)
+        total_jobs, active_jobs, job_categories = job_counts()
         total_users = UserAccount.query.count()
         
         # Get site visits by page
-        page_visits = db.session.query(
-            SiteVisit.page, 
-            db.func.count(SiteVisit.id).label('count')
-        ).group_by(SiteVisit.page).order_by(db.desc('count')).limit(5).all()
+        page_visits = top_pages(5)
         
         # Get visits by date
-        date_visits = db.session.query(
-            db.func.date(SiteVisit.visit_date).label('date'),
-            db.func.count(SiteVisit.id).label('count')
-        ).group_by('date').order_by(db.desc('date')).limit(7).all()
-        
-        # Get job categories
-        job_categories = db.session.query(
-            Job.category,
-            db.func.count(Job.id).label('count')
-        ).group_by(Job.category).all()
+        date_visits = visits_by_day(7)
         
         return render_template(
             'admin/dashboard.html',
@@ -294,6 +368,27 @@ def register_routes(app):
             job_categories=job_categories
         )
         
+    @app.route('/admin/analytics/stats')
+    @login_required
+    @admin_required
+    def admin_analytics_stats():
+        """Analytics ingestion counters (queued, written, dropped, failed)"""
+        return jsonify(visit_recorder.stats())
+        
+    @app.route('/admin/cache/stats')
+    @login_required
+    @admin_required
+    def admin_cache_stats():
+        """Response and fragment cache counters and hit ratios for this worker"""
+        return jsonify(dict(response_cache.stats(), fragments=fragment_cache.stats()))
+        
+    @app.route('/admin/fetch/stats')
+    @login_required
+    @admin_required
+    def admin_fetch_stats():
+        """Scraper HTTP counters, connection reuse per host, extraction stage timings and task queue"""
+        return jsonify(dict(fetcher.stats(), extraction=stage_stats(), tasks=task_queue.stats()))
+        
     @app.route('/admin/content', methods=['GET', 'POST'])
     @login_required
     @admin_required
@@ -312,11 +407,22 @@ def register_routes(app):
         content_data = request.form.get('content')
         
         try:
-            # Parse content data as JSON
-            content_data = json.loads(content_data)
-            
-            # Update content
-            g.content_store.update_section(section, content_data)
+            if content_data is not None:
+                # Whole section posted as JSON
+                g.content_store.update_section(section, json.loads(content_data))
+            else:
+                # Form fields named <section>_<key>[.<subkey>]; merge only those keys
+                changes = {}
+                prefix = f'{section}_'
+                for field, value in request.form.items():
+                    if not field.startswith(prefix):
+                        continue
+                    *parents, key = field[len(prefix):].split('.')
+                    target = changes
+                    for parent in parents:
+                        target = target.setdefault(parent, {})
+                    target[key] = value
+                g.content_store.update_section(section, changes, merge=True)
             
             flash('Content updated successfully', 'success')
         except Exception as e:
@@ -340,6 +446,7 @@ def register_routes(app):
         """Add a carousel item"""
         item_data = {
             'title': request.form.get('title'),
+            'description': request.form.get('description'),
             'subtitle': request.form.get('subtitle'),
             'image_url': request.form.get('image_url'),
             'cta_text': request.form.get('cta_text'),
@@ -358,6 +465,7 @@ def register_routes(app):
         """Update a carousel item"""
         item_data = {
             'title': request.form.get('title'),
+            'description': request.form.get('description'),
             'subtitle': request.form.get('subtitle'),
             'image_url': request.form.get('image_url'),
             'cta_text': request.form.get('cta_text'),
@@ -394,10 +502,11 @@ def register_routes(app):
         """Job management page"""
         track_page_visit('admin/jobs')
         
-        # Get all jobs
-        all_jobs = Job.query.order_by(Job.posted_date.desc()).all()
+        # Get one page of jobs
+        cursor, per_page = get_page_args()
+        page = keyset_paginate(Job.query, Job.posted_date, Job.id, cursor, per_page)
         
-        return render_template('admin/jobs.html', jobs=all_jobs)
+        return render_template('admin/jobs.html', jobs=page.items, page=page)
         
     @app.route('/admin/jobs/delete/<int:job_id>')
     @login_required
@@ -415,6 +524,7 @@ def register_routes(app):
     @app.route('/admin/jobs/export')
     @login_required
     @admin_required
+    @conditional(export_validators)
     def admin_export_jobs():
         """Export jobs to Excel"""
         # Get query parameters
@@ -517,6 +627,24 @@ def register_routes(app):
                 
         return render_template('admin/scrape_job.html')
         
+    @app.route('/admin/scrape-jobs/bulk', methods=['POST'])
+    @login_required
+    @admin_required
+    def admin_bulk_scrape():
+        """Queue a bulk scrape of a pasted or uploaded list of job URLs; 202 with the task to poll"""
+        track_page_visit('admin/scrape-jobs/bulk')
+        
+        urls = request_urls(request.form, request.files)
+        if not urls:
+            return jsonify({'error': 'Paste or upload at least one URL'}), 400
+        if len(urls) > bulk_scraper.max_urls:
+            return jsonify({'error': f'At most {bulk_scraper.max_urls} URLs per run, got {len(urls)}'}), 400
+        
+        save_to_db = request.form.get('save_to_db', 'yes') == 'yes'
+        # Run by a task worker, saving in batches; the page polls the task's progress
+        task = task_queue.enqueue('bulk_scrape', {'urls': urls, 'save': save_to_db})
+        return accepted(task)
+        
     @app.route('/admin/users', methods=['GET', 'POST'])
     @login_required
     @admin_required
@@ -552,10 +680,11 @@ def register_routes(app):
                 
                 flash('User added successfully', 'success')
                 
-        # Get all users
-        users = UserAccount.query.all()
+        # Get one page of users
+        cursor, per_page = get_page_args()
+        page = keyset_paginate(UserAccount.query, UserAccount.created_at, UserAccount.id, cursor, per_page)
         
-        return render_template('admin/users.html', users=users)
+        return render_template('admin/users.html', users=page.items, page=page)
         
     @app.route('/admin/users/delete/<username>')
     @login_required
@@ -0,0 +1,153 @@
+"""
+Salary parser for free-text pay descriptions.
+
+Turns strings such as "$90,000 - $120,000", "$35 - $45 per hour",
+"£50k-£60k a year", "€4.000/month" or "Up to 100K USD" into a minimum,
+maximum, ISO currency code, pay period and an annualised figure, so
+salaries can be stored in indexed columns and range-filtered in SQL.
+
+Only numbers next to a currency symbol or code, or forming a range with
+another number, count as amounts, so "401k match" or "15 days PTO" next
+to the pay are ignored. Text without any such number falls back to a
+leading number ("90000", "35 per hour").
+
+When no period is stated it is inferred from the amount: up to 500 is
+treated as hourly, up to 20,000 as monthly and anything larger as yearly.
+"""
+import re
+
+PERIODS = ('hour', 'day', 'week', 'month', 'year')
+
+# Multipliers to a yearly figure (40-hour weeks, 52 weeks, 260 working days)
+ANNUAL_FACTORS = {'hour': 2080, 'day': 260, 'week': 52, 'month': 12, 'year': 1}
+
+# Longest symbols first so "CA$" wins over "$"
+CURRENCY_SYMBOLS = (
+    ('CA$', 'CAD'), ('C$', 'CAD'), ('AU$', 'AUD'), ('A$', 'AUD'),
+    ('$', 'USD'), ('£', 'GBP'), ('€', 'EUR'), ('₹', 'INR'), ('¥', 'JPY'),
+)
+CURRENCY_CODES = ('USD', 'GBP', 'EUR', 'CAD', 'AUD', 'INR', 'JPY', 'CHF', 'NZD', 'SGD')
+
+_PERIOD_PATTERNS = (
+    ('hour', r'per\s+hour|an\s+hour|/\s*h(?:ou)?r\b|/\s*h\b|hourly|\bph\b'),
+    ('day', r'per\s+day|a\s+day|/\s*day|daily'),
+    ('week', r'per\s+week|a\s+week|/\s*w(?:ee)?k\b|weekly'),
+    ('month', r'per\s+month|a\s+month|/\s*mo(?:nth)?\b|monthly|\bpcm\b'),
+    ('year', r'per\s+(?:year|annum)|a\s+year|/\s*y(?:ea)?r\b|/\s*annum|annual(?:ly)?|yearly|\bp\.?\s?a\b'),
+)
+_PERIOD_RES = [(period, re.compile(pattern, re.IGNORECASE)) for period, pattern in _PERIOD_PATTERNS]
+
+# 90,000 / 90.000 / 90 000 / 35.50 / 90k / 1.2m
+_AMOUNT_RE = re.compile(
+    r'(?<![\w.])(\d{1,3}(?:[,.\s]\d{3})+|\d+(?:\.\d+)?)\s*([kKmM])?(?![\w])'
+)
+_CODE_RE = re.compile(r'\b(' + '|'.join(CURRENCY_CODES) + r')\b', re.IGNORECASE)
+
+# A currency symbol or code right before or right after an amount
+_SYMBOLS = ''.join(sorted({symbol[-1] for symbol, _ in CURRENCY_SYMBOLS}))
+_CURRENCY_BEFORE_RE = re.compile(r'(?:[' + _SYMBOLS + r']|\b(?:' + '|'.join(CURRENCY_CODES) + r'))\s*$', re.IGNORECASE)
+_CURRENCY_AFTER_RE = re.compile(r'\s*(?:[' + _SYMBOLS + r']|(?:' + '|'.join(CURRENCY_CODES) + r')\b)', re.IGNORECASE)
+# What may separate the two bounds of a range: "50-60k", "$90,000 to $120,000"
+_RANGE_RE = re.compile(r'\s*[' + _SYMBOLS + r']?\s*(?:-|–|—|to)\s*[A-Z]{0,2}[' + _SYMBOLS + r']?\s*', re.IGNORECASE)
+
+
+def _amount(number, suffix):
+    if re.fullmatch(r'\d{1,3}(?:[,.\s]\d{3})+', number):
+        value = float(re.sub(r'[,.\s]', '', number))
+    else:
+        value = float(number)
+    if suffix in ('k', 'K'):
+        value *= 1000
+    elif suffix in ('m', 'M'):
+        value *= 1000000
+    return value
+
+
+def _currency(text):
+    for symbol, code in CURRENCY_SYMBOLS:
+        if symbol in text:
+            return code
+    match = _CODE_RE.search(text)
+    return match.group(1).upper() if match else None
+
+
+def _period(text, amount):
+    for period, pattern in _PERIOD_RES:
+        if pattern.search(text):
+            return period
+    if amount <= 500:
+        return 'hour'
+    if amount <= 20000:
+        return 'month'
+    return 'year'
+
+
+def _salary_numbers(text):
+    """(number, suffix) pairs of the amounts that are part of the pay"""
+    matches = list(_AMOUNT_RE.finditer(text))
+    in_range = set()
+    for index in range(len(matches) - 1):
+        if _RANGE_RE.fullmatch(text, matches[index].end(), matches[index + 1].start()):
+            in_range.update((index, index + 1))
+
+    numbers = [
+        match.groups() for index, match in enumerate(matches)
+        if index in in_range
+        or _CURRENCY_BEFORE_RE.search(text, 0, match.start())
+        or _CURRENCY_AFTER_RE.match(text, match.end())
+    ]
+    if not numbers and matches and not text[:matches[0].start()].strip():
+        numbers = [matches[0].groups()]
+    return numbers
+
+
+def parse_salary(text):
+    """
+    Parse a free-text salary.
+
+    Returns:
+        Dictionary with ``salary_min``, ``salary_max``, ``salary_currency``,
+        ``salary_period`` and ``salary_annual`` (annualised maximum), all
+        None when no amount could be found
+
+    >>> parse_salary("$90,000 - $120,000")['salary_annual']
+    120000
+    >>> parse_salary("£50k-£60k a year")['salary_min']
+    50000.0
+    >>> parse_salary("$80,000 (401k match)")['salary_max']
+    80000.0
+    >>> parse_salary("$90k + 401k")['salary_min'], parse_salary("$90k + 401k")['salary_max']
+    (90000.0, None)
+    >>> parse_salary("$120,000/yr, 15 days PTO")['salary_min']
+    120000.0
+    >>> parse_salary("Competitive, 401k")['salary_max'] is None
+    True
+    """
+    empty = dict.fromkeys(('salary_min', 'salary_max', 'salary_currency', 'salary_period', 'salary_annual'))
+    if not text:
+        return empty
+
+    amounts = [_amount(number, suffix) for number, suffix in _salary_numbers(text)]
+    # A "k" on the upper bound usually applies to both ("50-60k")
+    if len(amounts) >= 2 and amounts[1] >= 1000 > amounts[0] and amounts[1] / 1000 >= amounts[0]:
+        amounts[0] *= 1000
+    amounts = [amount for amount in amounts[:2] if amount > 0]
+    if not amounts:
+        return empty
+
+    lowered = text.lower()
+    low, high = min(amounts), max(amounts)
+    if len(amounts) == 1:
+        if re.search(r'\b(up to|max(imum)?)\b', lowered):
+            low = None
+        elif re.search(r'\b(from|min(imum)?|starting)\b|\+', lowered):
+            high = None
+
+    period = _period(text, high if high is not None else low)
+    return {
+        'salary_min': low,
+        'salary_max': high,
+        'salary_currency': _currency(text),
+        'salary_period': period,
+        'salary_annual': int(round((high if high is not None else low) * ANNUAL_FACTORS[period])),
+    }
@@ -1,9 +1,13 @@
-import requests
 from bs4 import BeautifulSoup
 import logging
-import re
+import threading
+import time
+from contextlib import contextmanager
 from urllib.parse import urlparse
-from web_scraper import get_website_text_content, summarize_webpage
+from web_scraper import summarize_webpage
+from locations import clean_location
+from http_fetch import fetcher
+import heuristics
 
 # Deferred import of trafilatura to improve startup time
 def _import_trafilatura():
@@ -20,13 +24,98 @@ def is_valid_url(url):
         return False
 
 
+# Total milliseconds and runs per pipeline stage, for this worker
+_stage_totals = {}
+_stage_lock = threading.Lock()
+
+
+class ExtractionPipeline:
+    """
+    Fetch -> decode -> parse -> text + metadata, each stage run once.
+
+    Intermediate results (page, html, tree) are kept on the pipeline so
+    every later stage works from them instead of downloading or parsing
+    the page again. Stage durations are kept in ``timings`` (ms).
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.page = None
+        self.html = None
+        self.tree = None
+        self.text = None
+        self.metadata = None
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - started) * 1000
+
+    def run(self):
+        """Run the stages up to text extraction; returns the page's main text"""
+        trafilatura = _import_trafilatura()
+
+        with self.stage('fetch'):
+            self.page = fetcher.fetch(self.url)
+        if not self.page.ok or not self.page.content:
+            raise Exception(f"Failed to download page content (status {self.page.status_code})")
+
+        with self.stage('decode'):
+            self.html = self.page.text
+
+        with self.stage('parse'):
+            self.tree = trafilatura.load_html(self.html)
+        if self.tree is None:
+            raise Exception("Failed to parse page content")
+
+        # extract() works on a copy, so metadata and text share one parsed tree
+        with self.stage('metadata'):
+            try:
+                self.metadata = trafilatura.extract_metadata(self.tree)
+            except Exception as e:
+                logging.warning(f"Metadata extraction failed for {self.url}: {e}")
+
+        with self.stage('text'):
+            self.text = trafilatura.extract(self.tree)
+        if not self.text:
+            raise Exception("Failed to extract text content")
+        return self.text
+
+    def record(self):
+        """Log this run's stage timings and add them to the worker totals"""
+        if not self.timings:
+            return
+        with _stage_lock:
+            for name, ms in self.timings.items():
+                total = _stage_totals.setdefault(name, {'runs': 0, 'ms': 0.0})
+                total['runs'] += 1
+                total['ms'] += ms
+        size = len(self.page.content) if self.page is not None else 0
+        stages = ', '.join(f"{name} {ms:.1f}" for name, ms in self.timings.items())
+        logging.info(f"Extracted {self.url} ({size} bytes) in {sum(self.timings.values()):.0f} ms: {stages}")
+
+
+def stage_stats():
+    """Average milliseconds per extraction stage in this worker"""
+    with _stage_lock:
+        return {
+            name: {'runs': total['runs'], 'avg_ms': round(total['ms'] / total['runs'], 2)}
+            for name, total in _stage_totals.items()
+        }
+
+
 def extract_job_details(url):
     """
     Extract job details from a given URL.
     
     This function attempts to scrape job information from common job posting sites.
-    It first uses trafilatura for general text extraction, then applies heuristics
-    to identify job details from the extracted content.
+    The page is fetched, decoded and parsed once; trafilatura's text and
+    metadata extraction then share the parsed tree, and heuristics are
+    applied to the extracted text to identify job details.
     
     Returns a dictionary with extracted job details.
     """
@@ -46,168 +135,89 @@ def extract_job_details(url):
         "source_url": url
     }
     
+    pipeline = ExtractionPipeline(url)
     try:
-        # First try using our enhanced web scraper
-        text_content = get_website_text_content(url)
-        if "Failed to download content" in text_content or "Error extracting content" in text_content:
-            # Try using the original method as fallback
-            trafilatura = _import_trafilatura()
-            downloaded = trafilatura.fetch_url(url)
-            if not downloaded:
-                raise Exception("Failed to download page content")
-            
-            text_content = trafilatura.extract(downloaded)
-            if not text_content:
-                raise Exception("Failed to extract text content")
-                
-        # Try to get additional metadata using the summarize function
-        summary = summarize_webpage(url)
-        if not isinstance(summary, dict) or "error" in summary:
-            logging.warning(f"Could not extract metadata: {summary.get('error', 'Unknown error')}")
-        else:
-            # Use metadata from summary if available
-            if summary.get("title") and not job_data["title"]:
-                job_data["title"] = summary.get("title")
-            if summary.get("author") and not job_data["company"]:
-                job_data["company"] = summary.get("author")
-        
-        # Extract specific job details using heuristics
-        # Parse the content and try to identify job details
+        text_content = pipeline.run()
         
-        # Extract job title (usually at the beginning)
-        title_patterns = [
-            r"(?i)position:?\s*([^\n\.]+)",
-            r"(?i)job title:?\s*([^\n\.]+)",
-            r"(?i)role:?\s*([^\n\.]+)",
-            r"(?i)^([^\n\.]{5,50})\s*\n"  # First line if it's reasonable length for a title
-        ]
-        
-        for pattern in title_patterns:
-            match = re.search(pattern, text_content)
-            if match:
-                job_data["title"] = match.group(1).strip()
-                break
-                
-        # Extract company name
-        company_patterns = [
-            r"(?i)company:?\s*([^\n\.]+)",
-            r"(?i)at\s+([A-Z][^\n\.]{2,30})",
-            r"(?i)with\s+([A-Z][^\n\.]{2,30})\s+is"
-        ]
-        
-        for pattern in company_patterns:
-            match = re.search(pattern, text_content)
-            if match:
-                job_data["company"] = match.group(1).strip()
-                break
-                
-        # Extract location (focusing on remote work)
-        if re.search(r"(?i)remote", text_content):
-            # Try to determine if there are location restrictions
-            remote_patterns = [
-                r"(?i)remote\s*\(([^\)]+)\)",
-                r"(?i)remote[\s\-]+([A-Za-z0-9\s,]+)",
-                r"(?i)location:?\s*remote\s*([A-Za-z0-9\s,]+)"
-            ]
-            
-            for pattern in remote_patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    job_data["location"] = f"Remote ({match.group(1).strip()})"
-                    break
-            else:
-                job_data["location"] = "Remote (Worldwide)"
-                
-        # Extract salary information if available
-        salary_patterns = [
-            r"(?i)salary:?\s*([^\n\.]+)",
-            r"(?i)compensation:?\s*([^\n\.]+)",
-            r"(?i)pay:?\s*([^\n\.]+)",
-            r"(?i)\$\s*(\d{2,3}[,\.]?\d{3})\s*[-–]\s*\$?\s*(\d{2,3}[,\.]?\d{3})"
-        ]
-        
-        for pattern in salary_patterns:
-            match = re.search(pattern, text_content)
-            if match:
-                if pattern.endswith(")"):
-                    job_data["salary_range"] = match.group(1).strip()
-                else:
-                    try:
-                        # If it's the pattern with actual numbers, format it nicely
-                        min_salary = match.group(1)
-                        max_salary = match.group(2)
-                        job_data["salary_range"] = f"${min_salary} - ${max_salary}"
-                    except:
-                        job_data["salary_range"] = match.group(1).strip()
-                break
-        
-        # Extract job type
-        job_type_patterns = [
-            r"(?i)job type:?\s*([^\n\.]+)",
-            r"(?i)employment type:?\s*([^\n\.]+)",
-            r"(?i)(full[\s-]*time|part[\s-]*time|contract|freelance|temporary)"
-        ]
-        
-        for pattern in job_type_patterns:
-            match = re.search(pattern, text_content)
-            if match:
-                job_data["job_type"] = match.group(1).strip().title()
-                break
-                
-        # Try to determine job category (blue/white/grey-collar)
-        blue_collar_keywords = [
-            r"(?i)(manufacturing|factory|construction|maintenance|technician|mechanic|electrician|plumber|driver|operator|laborer|warehouse|assembly)",
-            r"(?i)(physical labor|trades|craft|repair|hands-on|mechanical|technical|installation|field service)"
-        ]
-        
-        grey_collar_keywords = [
-            r"(?i)(healthcare|nurse|medical|teacher|education|culinary|chef|hospitality|retail|service industry)",
-            r"(?i)(firefighter|police|security|childcare|elder care|salon|cosmetology|customer service)"
-        ]
-        
-        # First check for blue-collar
-        for pattern in blue_collar_keywords:
-            if re.search(pattern, text_content):
-                job_data["job_category"] = "Blue-collar"
-                break
-                
-        # Then check for grey-collar if not already categorized as blue-collar
-        if job_data["job_category"] == "White-collar":  # default value
-            for pattern in grey_collar_keywords:
-                if re.search(pattern, text_content):
-                    job_data["job_category"] = "Grey-collar"
-                    break
-        
-        # If neither blue nor grey collar patterns are found, stick with the default white-collar
-        
-        # For description, extract a relevant portion of text
-        # Look for sections that might contain job descriptions
-        description_sections = re.findall(r"(?i)(job description|about the role|responsibilities|about the position)(.+?)(requirements|qualifications|about you|who you are|apply now|apply today)", text_content, re.DOTALL)
-        if description_sections:
-            job_data["description"] = description_sections[0][1].strip()
+        # Use metadata from the page if available
+        metadata = pipeline.metadata
+        if metadata is None:
+            logging.warning(f"Could not extract metadata from {url}")
         else:
-            # If no clear sections, take the first few paragraphs
-            paragraphs = text_content.split('\n\n')
-            job_data["description"] = '\n\n'.join(paragraphs[1:min(4, len(paragraphs))])
+            if metadata.title and not job_data["title"]:
+                job_data["title"] = metadata.title
+            if metadata.author and not job_data["company"]:
+                job_data["company"] = metadata.author
         
-        # Extract requirements section
-        requirements_sections = re.findall(r"(?i)(requirements|qualifications|what you'll need|what we're looking for|who you are)(.+?)(benefits|perks|why join|how to apply|apply now)", text_content, re.DOTALL)
-        if requirements_sections:
-            job_data["requirements"] = requirements_sections[0][1].strip()
+        with pipeline.stage('heuristics'):
+            apply_heuristics(job_data, text_content)
         
         # Use the original URL as application URL if no specific one is found
         job_data["application_url"] = url
         
-        # Clean up and limit long text fields
-        for field in ["description", "requirements"]:
-            if len(job_data[field]) > 2000:
-                job_data[field] = job_data[field][:2000] + "..."
-        
         return job_data
         
     except Exception as e:
         logging.error(f"Error extracting job details: {str(e)}")
         return {"error": f"Could not extract job details: {str(e)}", "source_url": url}
+    finally:
+        pipeline.record()
+
+
+def apply_heuristics(job_data, text):
+    """Fill job_data fields from patterns in the page's main text (rules in heuristics.py)"""
+    page = heuristics.PageText(text)
+    
+    # Extract job title (usually at the beginning)
+    title = heuristics.TITLE.first_group(page)
+    if title is not None:
+        job_data["title"] = title.strip()
+    
+    # Extract company name
+    company = heuristics.COMPANY.first_group(page)
+    if company is not None:
+        job_data["company"] = company.strip()
+    
+    # Extract location (focusing on remote work), noting any location restrictions
+    if heuristics.REMOTE.matches(page):
+        region = heuristics.REMOTE_REGION.first_group(page)
+        job_data["location"] = f"Remote ({region.strip()})" if region is not None else "Remote (Worldwide)"
+    
+    # Extract salary information if available (for a "$min - $max" range, the minimum)
+    salary = heuristics.SALARY.first_group(page)
+    if salary is not None:
+        job_data["salary_range"] = salary.strip()
+    
+    # Extract job type
+    job_type = heuristics.JOB_TYPE.first_group(page)
+    if job_type is not None:
+        job_data["job_type"] = job_type.strip().title()
+    
+    # Try to determine job category: blue-collar, then grey-collar, else the default white-collar
+    if heuristics.BLUE_COLLAR.matches(page):
+        job_data["job_category"] = "Blue-collar"
+    elif job_data["job_category"] == "White-collar" and heuristics.GREY_COLLAR.matches(page):
+        job_data["job_category"] = "Grey-collar"
+    
+    # Description and requirements sections, located by their headings
+    sections = heuristics.split_sections(page)
+    if sections["description"] is not None:
+        job_data["description"] = sections["description"].strip()
+    else:
+        # If no clear sections, take the first few paragraphs
+        paragraphs = text.split('\n\n')
+        job_data["description"] = '\n\n'.join(paragraphs[1:min(4, len(paragraphs))])
+    
+    if sections["requirements"] is not None:
+        job_data["requirements"] = sections["requirements"].strip()
+    
+    # Same location form as posted jobs, so location search indexes it alike
+    job_data["location"] = clean_location(job_data["location"]) or "Remote"
+    
+    # Clean up and limit long text fields
+    for field in ["description", "requirements"]:
+        if len(job_data[field]) > 2000:
+            job_data[field] = job_data[field][:2000] + "..."
 
 
 def fallback_extraction(url):
@@ -237,10 +247,7 @@ def fallback_extraction(url):
             }
         
         # If that fails, try direct HTML parsing with BeautifulSoup
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetcher.fetch(url)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         # Extract title from page title or h1
@@ -0,0 +1,187 @@
+"""
+Full-text search index for job postings.
+
+On SQLite the index is an external-content FTS5 table (``jobs_fts``) kept in
+sync with ``jobs`` by triggers. On PostgreSQL it is a generated ``tsvector``
+column with a GIN index, which the database maintains on every write. Any
+other backend (or a SQLite build without FTS5) falls back to the ILIKE scan.
+"""
+import logging
+import re
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# Columns covered by the index, in weight order (title matters most)
+SEARCH_COLUMNS = ('title', 'company', 'location', 'description')
+
+# Per-column BM25 weights for FTS5, same order as SEARCH_COLUMNS
+FTS5_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# Postgres tsvector weights, same order as SEARCH_COLUMNS
+TSVECTOR_WEIGHTS = ('A', 'B', 'C', 'D')
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, location, description,
+        content='jobs', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company, location, description)
+        VALUES (new.id, new.title, new.company, new.location, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, description)
+        VALUES ('delete', old.id, old.title, old.company, old.location, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF title, company, location, description ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, description)
+        VALUES ('delete', old.id, old.title, old.company, old.location, old.description);
+        INSERT INTO jobs_fts(rowid, title, company, location, description)
+        VALUES (new.id, new.title, new.company, new.location, new.description);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    + " || ".join(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+        for column, weight in zip(SEARCH_COLUMNS, TSVECTOR_WEIGHTS)
+    )
+    + ") STORED",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector)",
+]
+
+# Dialect of the engine the index was created on, or None if unavailable
+_index_dialect = None
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tokenize(query):
+    """Split a free-text query into index-safe tokens"""
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _fts5_query(tokens):
+    """Build an FTS5 MATCH expression: every token, prefix-matched"""
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def _tsquery(tokens):
+    """Build a to_tsquery expression: every token, prefix-matched"""
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def init_search_index():
+    """Create the full-text index for the current database if supported"""
+    global _index_dialect
+
+    dialect = db.engine.dialect.name
+    statements = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(dialect)
+
+    if statements is None:
+        logger.info(f"Full-text search not supported on {dialect}, using ILIKE")
+        _index_dialect = None
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            created = dialect == 'sqlite' and not db.inspect(conn).has_table('jobs_fts')
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            if created:
+                # External-content table starts empty; index existing rows
+                conn.exec_driver_sql("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+        _index_dialect = dialect
+        return True
+    except Exception as e:
+        logger.warning(f"Could not create full-text index, using ILIKE: {e}")
+        _index_dialect = None
+        return False
+
+
+def rebuild_search_index():
+    """Rebuild the full-text index from the jobs table"""
+    if _index_dialect is None and not init_search_index():
+        return False
+
+    with db.engine.begin() as conn:
+        if _index_dialect == 'sqlite':
+            conn.exec_driver_sql("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+            conn.exec_driver_sql("INSERT INTO jobs_fts(jobs_fts) VALUES ('optimize')")
+        else:
+            # The tsvector column is generated, so only the GIN index needs work
+            conn.exec_driver_sql("REINDEX INDEX ix_jobs_search_vector")
+    return True
+
+
+def ilike_filter(job_query, query):
+    """Filter a Job query with the legacy four-column ILIKE scan"""
+    from models import Job
+
+    search = f"%{query}%"
+    return job_query.filter(
+        (Job.title.ilike(search)) |
+        (Job.description.ilike(search)) |
+        (Job.company.ilike(search)) |
+        (Job.location.ilike(search))
+    )
+
+
+def search_jobs(job_query, query, ranked=False):
+    """
+    Restrict a Job query to postings matching a free-text search.
+
+    Args:
+        job_query: Base ``Job.query`` to filter
+        query: User-supplied search text
+        ranked: Order results by relevance (BM25 on SQLite, ts_rank_cd on
+            Postgres) instead of leaving ordering to the caller
+
+    Returns:
+        The filtered query
+    """
+    from models import Job
+
+    tokens = _tokenize(query)
+    if not tokens:
+        return job_query
+
+    if _index_dialect == 'sqlite':
+        match = db.text('jobs_fts MATCH :fts_query').bindparams(fts_query=_fts5_query(tokens))
+        if not ranked:
+            # IN (subquery) runs MATCH once; a join would let SQLite walk the
+            # jobs index and run MATCH again for every active job
+            matching_ids = db.select(db.literal_column('rowid')).select_from(db.table('jobs_fts')).where(match)
+            return job_query.filter(Job.id.in_(matching_ids))
+
+        weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS)
+        matches = db.select(
+            db.literal_column('rowid').label('job_id'),
+            db.literal_column(f'bm25(jobs_fts, {weights})').label('rank')
+        ).select_from(db.table('jobs_fts')).where(match).subquery()
+
+        # bm25() is lower-is-better
+        return job_query.join(matches, Job.id == matches.c.job_id).order_by(matches.c.rank.asc())
+
+    if _index_dialect == 'postgresql':
+        tsquery = db.func.to_tsquery('english', _tsquery(tokens))
+        search_vector = db.literal_column('jobs.search_vector')
+
+        job_query = job_query.filter(search_vector.op('@@')(tsquery))
+        if ranked:
+            job_query = job_query.order_by(db.func.ts_rank_cd(search_vector, tsquery).desc())
+        return job_query
+
+    return ilike_filter(job_query, query)
@@ -2,6 +2,8 @@ import os
 import logging
 import datetime
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from locations import LocationIndex, clean_location
+import compression
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -13,8 +15,12 @@ app = Flask(__name__)
 # Configure app
 app.secret_key = os.environ.get("SESSION_SECRET") or "remotework_secret_key_2025"
 
+# Compress HTML/JSON responses
+compression.init_app(app)
+
 # Simplified in-memory storage
 jobs = []
+location_index = LocationIndex()  # Token and trigram index over job locations
 admin_user = {
     "username": "admin",
     "password": "remotework_admin2025"
@@ -71,6 +77,9 @@ def initialize_data():
             "views": 36
         })
         
+        for job in jobs:
+            location_index.add(job["id"], job["location"])
+        
         logger.info(f"Initialized with {len(jobs)} sample jobs")
 
 # Context processor to make functions available in templates
@@ -111,8 +120,8 @@ def jobs_list():
         filtered_jobs = [job for job in filtered_jobs if job["job_type"] == job_type]
     
     if location:
-        location = location.lower()
-        filtered_jobs = [job for job in filtered_jobs if location in job["location"].lower()]
+        matching_ids = location_index.search(location)
+        filtered_jobs = [job for job in filtered_jobs if job["id"] in matching_ids]
     
     # Sort by date (newest first)
     filtered_jobs.sort(key=lambda x: x["posted_date"], reverse=True)
@@ -151,7 +160,7 @@ def post_job():
             "id": new_id,
             "title": request.form.get('title'),
             "company": request.form.get('company'),
-            "location": request.form.get('location'),
+            "location": clean_location(request.form.get('location')),
             "category": request.form.get('category'),
             "job_type": request.form.get('job_type'),
             "salary": request.form.get('salary'),
@@ -165,6 +174,7 @@ def post_job():
         }
         
         jobs.append(new_job)
+        location_index.add(new_id, new_job["location"])
         flash('Job posted successfully!', 'success')
         return redirect(url_for('job_detail', job_id=new_id))
     
@@ -259,6 +269,7 @@ def admin_delete_job(job_id):
     
     if job_index is not None:
         del jobs[job_index]
+        location_index.remove(job_id)
         flash('Job deleted successfully', 'success')
     else:
         flash('Job not found', 'danger')
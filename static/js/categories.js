@@ -25,12 +25,16 @@ function updateSubcategories() {
     defaultOption.textContent = selectedCategory ? 'Select Subcategory' : 'Select a category first';
     subcategorySelect.appendChild(defaultOption);
     
+    // Counts for the current filters, when the page provides them
+    const counts = window.JOB_FACETS ? window.JOB_FACETS.subcategory : null;
+    
     // If a category is selected, add its subcategories
     if (selectedCategory && JOB_CATEGORIES[selectedCategory]) {
         JOB_CATEGORIES[selectedCategory].forEach(subcategory => {
             const option = document.createElement('option');
             option.value = subcategory;
-            option.textContent = subcategory;
+            option.textContent = counts ? `${subcategory} (${counts[subcategory] || 0})` : subcategory;
+            option.selected = subcategory === subcategorySelect.dataset.selected;
             subcategorySelect.appendChild(option);
         });
     }
@@ -1,5 +1,24 @@
 // Job form functionality including URL extraction
 
+// Extraction endpoints answer 202 with a background task to poll; this
+// resolves with the task's result (what the endpoint returns once done)
+async function waitForTask(response, { interval = 1000, timeout = 120000 } = {}) {
+    if (response.status !== 202) {
+        return response.json();
+    }
+    
+    const task = await response.json();
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        const result = await fetch(task.result_url);
+        if (result.status !== 202) {
+            return result.json();
+        }
+    }
+    return { error: 'Extraction is taking longer than expected. Please try again in a moment.' };
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const extractBtn = document.getElementById('extract-btn');
     const jobUrlInput = document.getElementById('job-url');
@@ -85,7 +104,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: JSON.stringify({ url: url })
             });
             
-            return await response.json();
+            // Queued: poll until the job details are ready
+            return await waitForTask(response);
         } catch (error) {
             console.error('Error in API request:', error);
             throw error;
@@ -0,0 +1,519 @@
+"""
+Persistent background queue for scraping and text extraction.
+
+Endpoints that fetch other sites (``/extract-job``, ``/api/extract-job``,
+``/text-extractor``, the admin bulk scrape) enqueue a task and answer 202 straight away instead
+of holding a web worker while a slow site responds. Worker threads run the
+tasks; clients poll ``/tasks/<id>`` for the status and
+``/tasks/<id>/result`` for what the endpoint used to return.
+
+* Persistent: tasks live in a SQLite file (``TASK_QUEUE_PATH``) in WAL
+  mode, so they survive restarts and every gunicorn worker process shares
+  one queue without any external service.
+* Idempotent: a task's id is a hash of its kind and payload, or of the
+  client's ``Idempotency-Key``. Submitting the same extraction again
+  returns the existing task (and its result, while younger than
+  ``TASK_RESULT_TTL``) instead of fetching the page again. Reusing a key
+  with a different payload raises ``TaskConflict`` (422 from the routes).
+* Failures are not reused: a handler raises ``TaskFailed`` when the page
+  could not be fetched or read, so the next submission runs it again. The
+  error result is kept for the client that is polling.
+* Leases: a running task belongs to its worker for ``TASK_LEASE_SECONDS``.
+  If the process dies, another worker runs it again, up to
+  ``TASK_MAX_ATTEMPTS`` runs in total.
+* Access: tasks of kinds registered with ``admin=True`` (the bulk scrape)
+  are only shown to admins; ``status_response`` and ``result_response``
+  answer 404 to anyone else, since task ids can be derived from a payload.
+* Progress: a long handler calls ``task_queue.report(progress)``; the
+  status shows the latest report and the lease is renewed with it.
+
+Each process starts ``TASK_QUEUE_WORKERS`` worker threads the first time it
+uses the queue. With ``TASK_QUEUE_WORKERS = 0`` the web processes only
+enqueue and ``flask task-worker`` runs the tasks in a process of its own.
+
+Config:
+    TASK_QUEUE_PATH: SQLite file (default instance/tasks.db)
+    TASK_QUEUE_WORKERS: Worker threads per process (default 2)
+    TASK_LEASE_SECONDS: Time a worker has to finish a task (default 300)
+    TASK_MAX_ATTEMPTS: Runs before a task is given up (default 3)
+    TASK_RESULT_TTL: Seconds a result is reused for the same request (default 600)
+    TASK_RETENTION: Seconds finished tasks are kept (default 86400)
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TASK_QUEUE_PATH': None,
+    'TASK_QUEUE_WORKERS': 2,
+    'TASK_LEASE_SECONDS': 300,
+    'TASK_MAX_ATTEMPTS': 3,
+    'TASK_RESULT_TTL': 600,
+    'TASK_RETENTION': 86400,
+}
+# Seconds an idle worker waits before looking for tasks queued by other processes
+POLL_INTERVAL = 0.5
+# Seconds between deletions of expired tasks, per process
+PURGE_INTERVAL = 600
+# Seconds to wait for another connection's write lock
+BUSY_TIMEOUT = 10
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    progress TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_tasks_status_created ON tasks (status, created_at);
+"""
+
+
+class TaskConflict(ValueError):
+    """An Idempotency-Key was reused for a request with a different payload"""
+
+
+class TaskFailed(Exception):
+    """Raised by a handler whose result is an error; the task fails but keeps ``result``"""
+
+    def __init__(self, error, result=None):
+        super().__init__(error)
+        self.result = result
+
+
+def make_task_id(kind, payload):
+    """Stable id for a request: the same kind and payload give the same task"""
+    key = json.dumps([kind, payload], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+@contextmanager
+def _transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front, so claims cannot race"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _timestamp(value):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(value)) if value else None
+
+
+class TaskQueue:
+    """SQLite-backed task table plus the worker threads of this process"""
+
+    def __init__(self):
+        self.config = dict(DEFAULTS)
+        self.app = None
+        self.path = None
+        self.handlers = {}
+        # Kinds whose status and result only admins may see
+        self.admin_kinds = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._last_purge = 0.0
+        # (task id, worker) of the task the current thread is running
+        self._local = threading.local()
+
+    def init_app(self, app):
+        """Configure from the app and create the task table"""
+        for key, default in DEFAULTS.items():
+            self.config[key] = app.config.get(key, default)
+        self.app = app
+        self.path = self.config['TASK_QUEUE_PATH'] or os.path.join(app.instance_path, 'tasks.db')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Files created before tasks reported progress
+            if 'progress' not in {row['name'] for row in conn.execute('PRAGMA table_info(tasks)')}:
+                conn.execute('ALTER TABLE tasks ADD COLUMN progress TEXT')
+        atexit.register(self.stop)
+
+    def handler(self, kind, admin=False):
+        """Decorator registering the function that runs tasks of ``kind`` (admin-only with ``admin``)"""
+        def register(function):
+            self.handlers[kind] = function
+            if admin:
+                self.admin_kinds.add(kind)
+            return function
+        return register
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous = NORMAL')
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ==== Client side ====
+
+    def enqueue(self, kind, payload, key=None):
+        """
+        Queue a task, or find the one already queued for the same request.
+
+        Args:
+            kind: A registered handler name
+            payload: JSON-serialisable arguments for the handler
+            key: Client idempotency key; defaults to the payload itself
+
+        Returns:
+            The task's status dictionary (see ``get``)
+
+        Raises:
+            TaskConflict: ``key`` belongs to a task with another payload
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for task kind {kind!r}")
+        task_id = make_task_id(kind, payload if key is None else {'key': key})
+        now = time.time()
+        with self._connect() as conn:
+            with _transaction(conn):
+                row = conn.execute('SELECT status, payload, finished_at FROM tasks WHERE id = ?', (task_id,)).fetchone()
+                if row is not None and key is not None and json.loads(row['payload']) != payload:
+                    raise TaskConflict(f"Idempotency-Key {key!r} was already used for a different request")
+                if row is None:
+                    conn.execute(
+                        'INSERT INTO tasks (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                        (task_id, kind, json.dumps(payload), QUEUED, now)
+                    )
+                elif row['status'] == FAILED or (
+                        row['status'] == DONE and row['finished_at'] < now - self.config['TASK_RESULT_TTL']):
+                    # Stale or failed: run it again under the same id
+                    conn.execute(
+                        'UPDATE tasks SET status = ?, payload = ?, attempts = 0, result = NULL, error = NULL, '
+                        'worker = NULL, created_at = ?, started_at = NULL, finished_at = NULL, lease_until = NULL, progress = NULL '
+                        'WHERE id = ?',
+                        (QUEUED, json.dumps(payload), now, task_id)
+                    )
+            task = self._describe(conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone())
+
+        if task['status'] == QUEUED:
+            self._ensure_workers()
+            self._wake.set()
+        return task
+
+    def get(self, task_id, with_result=False):
+        """
+        Status dictionary of a task, or None if there is no such task.
+
+        Has 'id', 'kind', 'payload', 'status' (queued, running, done or failed),
+        'attempts', 'error', the handler's last 'progress' and timestamps; with ``with_result``, also the
+        handler's return value under 'result' once the task is done (or the
+        error result of a failed one).
+        """
+        self._ensure_workers()
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return self._describe(row, with_result) if row is not None else None
+
+    def _describe(self, row, with_result=False):
+        task = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'error': row['error'],
+            'progress': json.loads(row['progress']) if row['progress'] else None,
+            'created_at': _timestamp(row['created_at']),
+            'started_at': _timestamp(row['started_at']),
+            'finished_at': _timestamp(row['finished_at']),
+        }
+        if with_result and row['result'] is not None:
+            task['result'] = json.loads(row['result'])
+        return task
+
+    def stats(self):
+        """Tasks per status and the age of the oldest queued task, in seconds"""
+        with self._connect() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+            oldest = conn.execute('SELECT MIN(created_at) FROM tasks WHERE status = ?', (QUEUED,)).fetchone()[0]
+        return {
+            'statuses': counts,
+            'oldest_queued_seconds': round(time.time() - oldest, 1) if oldest else None,
+            'workers': len(self._threads) if self._pid == os.getpid() else 0,
+        }
+
+    # ==== Worker side ====
+
+    def report(self, progress):
+        """Record the progress of the task this thread is running and renew its lease"""
+        current = getattr(self._local, 'task', None)
+        if current is None:
+            return
+        task_id, worker = current
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE tasks SET progress = ?, lease_until = ? WHERE id = ? AND worker = ? AND status = ?',
+                (json.dumps(progress), time.time() + self.config['TASK_LEASE_SECONDS'], task_id, worker, RUNNING)
+            )
+
+    def run_next(self, worker):
+        """Claim and run one task; returns False when nothing was waiting"""
+        row = self._claim(worker)
+        if row is None:
+            self._purge()
+            return False
+
+        started = time.perf_counter()
+        handler = self.handlers.get(row['kind'])
+        self._local.task = (row['id'], worker)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for task kind {row['kind']!r}")
+            with self.app.app_context():
+                result = handler(json.loads(row['payload']))
+            self._finish(row['id'], worker, DONE, result=json.dumps(result))
+        except TaskFailed as e:
+            logger.warning(f"Task {row['id']} ({row['kind']}) failed: {e}")
+            self._finish(row['id'], worker, FAILED, result=json.dumps(e.result), error=str(e))
+        except Exception as e:
+            logger.error(f"Task {row['id']} ({row['kind']}) failed: {e}")
+            self._finish(row['id'], worker, FAILED, error=str(e))
+        finally:
+            self._local.task = None
+        logger.info(f"Ran task {row['id']} ({row['kind']}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
+
+    def _claim(self, worker):
+        """Lease the oldest runnable task to ``worker``; returns its row or None"""
+        now = time.time()
+        runnable = 'status = ? OR (status = ? AND lease_until < ?)'
+        with self._connect() as conn:
+            # Cheap check without the write lock, since idle workers poll
+            if conn.execute(f'SELECT 1 FROM tasks WHERE {runnable} LIMIT 1', (QUEUED, RUNNING, now)).fetchone() is None:
+                return None
+            with _transaction(conn):
+                conn.execute(
+                    'UPDATE tasks SET status = ?, error = ?, finished_at = ?, lease_until = NULL '
+                    'WHERE status = ? AND lease_until < ? AND attempts >= ?',
+                    (FAILED, 'Worker stopped while running the task', now, RUNNING, now, self.config['TASK_MAX_ATTEMPTS'])
+                )
+                row = conn.execute(
+                    f'SELECT * FROM tasks WHERE {runnable} ORDER BY created_at LIMIT 1', (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    'UPDATE tasks SET status = ?, attempts = attempts + 1, worker = ?, started_at = ?, lease_until = ? '
+                    'WHERE id = ?',
+                    (RUNNING, worker, now, now + self.config['TASK_LEASE_SECONDS'], row['id'])
+                )
+        return row
+
+    def _finish(self, task_id, worker, status, result=None, error=None):
+        # Only while still leased to this worker, so a task taken over after
+        # an expired lease is not overwritten by the late first run
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL '
+                'WHERE id = ? AND worker = ? AND status = ?',
+                (status, result, error, time.time(), task_id, worker, RUNNING)
+            )
+
+    def _purge(self):
+        """Delete finished tasks older than TASK_RETENTION, at most every PURGE_INTERVAL"""
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        try:
+            with self._connect() as conn:
+                deleted = conn.execute(
+                    'DELETE FROM tasks WHERE status IN (?, ?) AND finished_at < ?',
+                    (DONE, FAILED, now - self.config['TASK_RETENTION'])
+                ).rowcount
+            if deleted:
+                logger.info(f"Purged {deleted} finished tasks")
+        except sqlite3.Error as e:
+            logger.error(f"Purging finished tasks failed: {e}")
+
+    def _worker_prefix(self):
+        return f'{socket.gethostname()}:{os.getpid()}:'
+
+    def work(self, threads=None):
+        """Run worker threads in the foreground until interrupted (flask task-worker)"""
+        self._start_workers(threads or self.config['TASK_QUEUE_WORKERS'] or 1)
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(1)
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop this process's workers and hand their unfinished tasks back to the queue"""
+        if self._pid != os.getpid() or not self._threads:
+            return
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'UPDATE tasks SET status = ?, attempts = attempts - 1, worker = NULL, lease_until = NULL '
+                    'WHERE status = ? AND worker LIKE ?',
+                    (QUEUED, RUNNING, self._worker_prefix() + '%')
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Releasing unfinished tasks failed: {e}")
+        self._threads = []
+
+    def _ensure_workers(self):
+        """Start the worker threads lazily, once per (forked) process"""
+        if self._pid == os.getpid() or not self.config['TASK_QUEUE_WORKERS']:
+            return
+        self._start_workers(self.config['TASK_QUEUE_WORKERS'])
+
+    def _start_workers(self, count):
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f'task-worker-{number}', daemon=True)
+                for number in range(count)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self):
+        worker = self._worker_prefix() + threading.current_thread().name
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_next(worker)
+            except sqlite3.Error as e:
+                logger.error(f"Task worker {worker}: {e}")
+                ran = False
+            if not ran:
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+
+
+# Shared queue, configured per app with task_queue.init_app(app)
+task_queue = TaskQueue()
+
+
+# ==== Responses ====
+
+def _with_urls(task):
+    from flask import url_for
+    return dict(
+        task,
+        status_url=url_for('task_status', task_id=task['id']),
+        result_url=url_for('task_result', task_id=task['id'])
+    )
+
+
+def accepted(task):
+    """202 response pointing the client at the task's status and result"""
+    from flask import jsonify
+    task = _with_urls(task)
+    return jsonify(task), 202, {'Location': task['status_url'], 'Retry-After': '1'}
+
+
+def _visible(task, admin):
+    return task is not None and (admin or task['kind'] not in task_queue.admin_kinds)
+
+
+def status_response(task_id, admin=False):
+    """Body of GET /tasks/<id>; ``admin`` is whether the visitor may see admin tasks"""
+    from flask import jsonify
+    task = task_queue.get(task_id)
+    if not _visible(task, admin):
+        return jsonify({'error': 'Unknown task'}), 404
+    return jsonify(_with_urls(task))
+
+
+def result_response(task_id, admin=False):
+    """
+    Body of GET /tasks/<id>/result: what the enqueuing endpoint used to
+    return once the task is done (or failed with an error result), 202
+    while it is still waiting or running
+    """
+    from flask import jsonify
+    task = task_queue.get(task_id, with_result=True)
+    if not _visible(task, admin):
+        return jsonify({'error': 'Unknown task'}), 404
+    if task['status'] == DONE or (task['status'] == FAILED and task.get('result') is not None):
+        return jsonify(task['result'])
+    if task['status'] == FAILED:
+        return jsonify({'success': False, 'error': task['error']}), 500
+    return accepted(task)
+
+
+# ==== Handlers ====
+
+def _checked(result):
+    """``result``, or TaskFailed when it reports a failed fetch or extraction"""
+    if isinstance(result, str):
+        if result.startswith(('Failed to download', 'Error extracting')):
+            raise TaskFailed(result, result)
+    elif not result:
+        raise TaskFailed('Failed to extract job details', {'error': 'Failed to extract job details'})
+    elif result.get('error') or result.get('success') is False:
+        raise TaskFailed(result.get('error') or 'Failed to extract job details', result)
+    return result
+
+
+@task_queue.handler('extract_job')
+def _extract_job(payload):
+    """web_scraper's extraction, as returned by /extract-job"""
+    from web_scraper import extract_job_details
+    return _checked(extract_job_details(payload['url']))
+
+
+@task_queue.handler('scrape_job')
+def _scrape_job(payload):
+    """scraper's extraction, as returned by /api/extract-job"""
+    from scraper import extract_job_details
+    return _checked(extract_job_details(payload['url']))
+
+
+@task_queue.handler('website_text')
+def _website_text(payload):
+    """Main text of a page for /text-extractor (fails with the error string if it cannot be read)"""
+    from web_scraper import get_website_text_content
+    return _checked(get_website_text_content(payload['url']))
+
+
+@task_queue.handler('bulk_scrape', admin=True)
+def _bulk_scrape(payload):
+    """bulk_scraper's run over a URL list for the admin page, saving jobs as it goes"""
+    from bulk_scrape import bulk_scraper
+    return bulk_scraper.scrape(payload['urls'], save=payload['save'], report=task_queue.report)
@@ -0,0 +1,79 @@
+"""
+Jinja bytecode cache and worker warm-up.
+
+``template_cache.init_app(app)`` stores compiled templates in a directory
+shared by every worker (``TEMPLATE_CACHE_DIR``, default
+``instance/jinja_cache``). Only the first process to compile a template
+after a deploy pays for it; the rest load the bytecode. Jinja checks the
+source mtime, so edited templates are recompiled automatically.
+
+``warm_up(app)`` compiles every template and requests the main routes
+(``WARMUP_ROUTES``) through a test client, logging how long each step
+took. gunicorn.conf.py runs it in ``post_worker_init``, before the worker
+accepts connections, when ``TEMPLATE_WARMUP`` is on (the default).
+``flask warm-templates`` fills the cache at deploy time.
+"""
+import logging
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_ROUTES = ('/', '/jobs')
+
+
+def init_app(app):
+    """Give the app's Jinja environment an on-disk bytecode cache"""
+    directory = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Template bytecode cache disabled, cannot create {directory}: {e}")
+        return None
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    return directory
+
+
+def compile_templates(app):
+    """Load every template once (compiling or reading bytecode); returns how many"""
+    count = 0
+    for name in app.jinja_env.list_templates():
+        if not name.endswith(('.html', '.txt', '.xml')):
+            continue
+        try:
+            app.jinja_env.get_template(name)
+            count += 1
+        except Exception as e:
+            logger.warning(f"Template {name} failed to compile: {e}")
+    return count
+
+
+def warm_up(app, routes=None):
+    """
+    Precompile templates and exercise the main routes once.
+
+    Returns:
+        Dictionary of timings in milliseconds
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    count = compile_templates(app)
+    timings['templates'] = (time.perf_counter() - started) * 1000
+    logger.info(f"Warm-up: {count} templates loaded in {timings['templates']:.0f} ms")
+
+    client = app.test_client()
+    for route in routes or app.config.get('WARMUP_ROUTES', DEFAULT_WARMUP_ROUTES):
+        route_started = time.perf_counter()
+        try:
+            status = client.get(route, headers={'User-Agent': 'warm-up'}).status_code
+        except Exception as e:
+            status = f'error: {e}'
+        timings[route] = (time.perf_counter() - route_started) * 1000
+        logger.info(f"Warm-up: GET {route} -> {status} in {timings[route]:.0f} ms")
+
+    timings['total'] = (time.perf_counter() - started) * 1000
+    logger.info(f"Warm-up finished in {timings['total']:.0f} ms (pid {os.getpid()})")
+    return timings
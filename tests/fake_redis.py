@@ -0,0 +1,134 @@
+"""
+Local stand-in for a Redis server, for testing RedisBackend.
+
+Speaks enough of the Redis protocol (RESP) for the response cache: AUTH,
+SELECT, PING, GET, SET (with PX/EX), MGET, INCR and DEL, with one keyspace
+per database number and expiry on read. Replies are built by hand, so the
+client's RESP parser is exercised with real bulk strings, nulls, integers,
+arrays and errors.
+
+    with FakeRedisServer(password='secret') as server:
+        backend = RedisBackend(server.url(db=2))
+"""
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _error(message):
+    return b'-ERR ' + message.encode() + b'\r\n'
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        db = 0
+        authenticated = server.password is None
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            server.commands.append(name.decode())
+            if name == b'AUTH':
+                authenticated = args[1].decode() == server.password
+                reply = b'+OK\r\n' if authenticated else _error('invalid password')
+            elif not authenticated:
+                reply = b'-NOAUTH Authentication required.\r\n'
+            elif name == b'SELECT':
+                db = int(args[1])
+                reply = b'+OK\r\n'
+            else:
+                with server.lock:
+                    reply = server.run(server.keyspaces[db], name, args[1:])
+            self.wfile.write(reply)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, as typed into telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server on a free localhost port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.password = password
+        self.lock = threading.Lock()
+        # db number -> key -> (value, expires at or None)
+        self.keyspaces = defaultdict(dict)
+        # Command names received, in order
+        self.commands = []
+        self._thread = None
+
+    def url(self, db=0):
+        auth = f':{self.password}@' if self.password else ''
+        return f'redis://{auth}127.0.0.1:{self.server_address[1]}/{db}'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def _get(self, keyspace, key):
+        entry = keyspace.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and time.monotonic() >= expires:
+            del keyspace[key]
+            return None
+        return value
+
+    def run(self, keyspace, name, args):
+        """Reply to one data command against ``keyspace``"""
+        if name == b'PING':
+            return b'+PONG\r\n'
+        if name == b'GET':
+            return _bulk(self._get(keyspace, args[0]))
+        if name == b'MGET':
+            return b'*%d\r\n' % len(args) + b''.join(_bulk(self._get(keyspace, key)) for key in args)
+        if name == b'SET':
+            expires = None
+            options = [arg.upper() for arg in args[2:]]
+            if b'PX' in options:
+                expires = time.monotonic() + int(args[2 + options.index(b'PX') + 1]) / 1000
+            elif b'EX' in options:
+                expires = time.monotonic() + int(args[2 + options.index(b'EX') + 1])
+            keyspace[args[0]] = (args[1], expires)
+            return b'+OK\r\n'
+        if name == b'INCR':
+            current = self._get(keyspace, args[0])
+            try:
+                value = int(current or 0) + 1
+            except ValueError:
+                return _error('value is not an integer or out of range')
+            keyspace[args[0]] = (str(value).encode(), keyspace.get(args[0], (None, None))[1])
+            return b':%d\r\n' % value
+        if name == b'DEL':
+            removed = sum(keyspace.pop(key, None) is not None for key in args)
+            return b':%d\r\n' % removed
+        return _error(f"unknown command '{name.decode()}'")
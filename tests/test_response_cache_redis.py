@@ -0,0 +1,94 @@
+"""RedisBackend and the response cache against a local RESP stand-in (fake_redis.py)"""
+import time
+
+import pytest
+from flask import Flask
+
+from fake_redis import FakeRedisServer
+from response_cache import RedisBackend, ResponseCache
+
+
+@pytest.fixture
+def server():
+    with FakeRedisServer(password='secret') as server:
+        yield server
+
+
+@pytest.fixture
+def backend(server):
+    return RedisBackend(server.url(db=2))
+
+
+@pytest.fixture
+def app(backend):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    cache = ResponseCache()
+    cache.init_app(app, backend=backend)
+    app.extensions['test_response_cache'] = cache
+    app.renders = 0
+
+    @app.route('/jobs')
+    @cache.cached('jobs')
+    def jobs():
+        app.renders += 1
+        return f'render {app.renders}'
+
+    return app
+
+
+def test_connects_with_auth_and_database(server, backend):
+    assert backend.get('missing') is None
+    assert server.commands[:3] == ['AUTH', 'SELECT', 'GET']
+
+
+def test_set_get_and_expiry(server, backend):
+    backend.set('key', b'value\r\nwith crlf', ttl=0.05)
+    assert backend.get('key') == b'value\r\nwith crlf'
+    assert server.keyspaces[2]
+    time.sleep(0.1)
+    assert backend.get('key') is None
+
+
+def test_counters_and_incr(backend):
+    assert backend.counters(['a', 'b']) == [0, 0]
+    assert backend.incr('a') == 1
+    assert backend.incr('a') == 2
+    assert backend.counters(['a', 'b']) == [2, 0]
+
+
+def test_error_reply_raises(backend):
+    backend.set('text', b'not a number', ttl=10)
+    with pytest.raises(RuntimeError, match='not an integer'):
+        backend.incr('text')
+    # The connection is still usable after an error reply
+    assert backend.get('text') == b'not a number'
+
+
+def test_hit_miss_and_generation_invalidation(app, backend):
+    cache = app.extensions['test_response_cache']
+    client = app.test_client()
+
+    first = client.get('/jobs')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.get_data(as_text=True) == 'render 1'
+
+    second = client.get('/jobs')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data(as_text=True) == 'render 1'
+
+    cache.invalidate('jobs')
+    assert backend.counters(['response-cache:generation:jobs']) == [1]
+    third = client.get('/jobs')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert third.get_data(as_text=True) == 'render 2'
+    assert client.get('/jobs').headers['X-Cache'] == 'HIT'
+
+    # Other namespaces do not affect jobs pages
+    cache.invalidate('blog')
+    assert client.get('/jobs').headers['X-Cache'] == 'HIT'
+
+    backend.clear()
+    assert client.get('/jobs').get_data(as_text=True) == 'render 3'
+    assert cache.stats()['errors'] == 0
+
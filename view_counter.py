@@ -0,0 +1,147 @@
+"""
+Write-behind view counters for job postings and blog posts.
+
+Detail pages call ``view_counter.increment('jobs', job_id)`` instead of
+``job.views += 1; db.session.commit()``. Increments are aggregated per row in
+memory and written by a background thread as one batched
+``UPDATE ... SET views = views + ?`` per table, either every
+``VIEW_FLUSH_INTERVAL`` seconds or as soon as ``VIEW_FLUSH_MAX_PENDING``
+distinct rows are waiting, whichever comes first.
+
+Pending counts are flushed on normal interpreter exit (gunicorn worker
+shutdown or recycle). Maximum loss window: if a worker is killed hard
+(SIGKILL, OOM) it loses at most the views recorded in the last
+``VIEW_FLUSH_INTERVAL`` seconds. A failed flush keeps its counts pending and
+retries on the next cycle.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_MAX_PENDING = 500
+
+# Tables with a ``views`` column that may be counted
+COUNTED_TABLES = ('jobs', 'blog_posts')
+
+
+def sqlalchemy_writer(app):
+    """Return a writer that applies increments through Flask-SQLAlchemy"""
+    from db import db
+
+    def write(table, increments):
+        statement = db.text(f"UPDATE {table} SET views = views + :amount WHERE id = :id")
+        with app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(statement, [
+                    {'amount': amount, 'id': row_id} for row_id, amount in increments
+                ])
+
+    return write
+
+
+class ViewCounter:
+    """In-process buffer of view increments, flushed in batches"""
+
+    def __init__(self, writer=None, interval=DEFAULT_FLUSH_INTERVAL, max_pending=DEFAULT_MAX_PENDING):
+        self.writer = writer
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = defaultdict(lambda: defaultdict(int))
+        self._size = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app, writer=None):
+        """Configure from the app and register the exit-time flush"""
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', self.interval)
+        self.max_pending = app.config.get('VIEW_FLUSH_MAX_PENDING', self.max_pending)
+        self.writer = writer or self.writer or sqlalchemy_writer(app)
+        atexit.register(self.stop)
+
+    def increment(self, table, row_id, amount=1):
+        """Record ``amount`` views for a row; never touches the database"""
+        if table not in COUNTED_TABLES:
+            raise ValueError(f"Views are not counted for table {table!r}")
+
+        self._ensure_thread()
+        with self._lock:
+            counts = self._pending[table]
+            if row_id not in counts:
+                self._size += 1
+            counts[row_id] += amount
+            full = self._size >= self.max_pending
+
+        if full:
+            self._wake.set()
+
+    def pending(self, table, row_id):
+        """Views recorded for a row that are not yet in the database"""
+        with self._lock:
+            return self._pending.get(table, {}).get(row_id, 0)
+
+    def flush(self):
+        """Write all pending increments; returns the number of rows updated"""
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+            self._size = 0
+
+        if not batch or self.writer is None:
+            return 0
+
+        written = 0
+        for table, counts in batch.items():
+            increments = sorted(counts.items())
+            try:
+                self.writer(table, increments)
+                written += len(increments)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(increments)} view counts for {table}: {e}")
+                self._requeue(table, increments)
+        return written
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still pending"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.interval + 1)
+        self.flush()
+
+    def _requeue(self, table, increments):
+        """Put counts from a failed flush back so they are retried"""
+        with self._lock:
+            counts = self._pending[table]
+            for row_id, amount in increments:
+                if row_id not in counts:
+                    self._size += 1
+                counts[row_id] += amount
+
+    def _ensure_thread(self):
+        """Start the flush thread lazily, once per (forked) process"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+
+# Shared buffer, configured per app with view_counter.init_app(app)
+view_counter = ViewCounter()
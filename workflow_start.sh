@@ -4,5 +4,11 @@
 pkill gunicorn || true
 sleep 2
 
+# Build fingerprinted, precompressed static assets
+flask --app main build-assets
+
+# Compile templates into the bytecode cache shared by the workers
+flask --app main warm-templates
+
 # Run Flask application with gunicorn
-gunicorn --bind 0.0.0.0:5000 --reload main:app
\ No newline at end of file
+gunicorn -c gunicorn.conf.py --bind 0.0.0.0:5000 --reload main:app
\ No newline at end of file